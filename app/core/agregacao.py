@@ -0,0 +1,64 @@
+# app/core/agregacao.py
+
+from typing import List, Optional
+
+import pandas as pd
+from fastapi import HTTPException
+from pandas.api.types import is_numeric_dtype
+
+# Funções de agregação aceitas em ?agg=
+AGREGACOES = ("sum", "mean", "max")
+
+
+def separar_lista(valor: Optional[str]) -> List[str]:
+    """"ano, paises" → ["ano", "paises"] (ignora itens vazios e repetidos, mantendo a ordem)."""
+    itens = [item.strip() for item in (valor or "").split(",")]
+    return list(dict.fromkeys(item for item in itens if item))
+
+
+def agregar(
+    frame: pd.DataFrame,
+    group_by: List[str],
+    metricas: List[str],
+    agg: str,
+) -> pd.DataFrame:
+    """
+    Agrega 'metricas' por 'group_by' direto no DataFrame (groupby vetorizado).
+    Devolve um frame com as colunas de agrupamento seguidas das métricas,
+    ordenado pelas chaves. Chaves nulas formam um grupo próprio.
+    Colunas ou agregação inválidas → HTTPException 400.
+    """
+    if agg not in AGREGACOES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Agregação inválida: {agg}. Use uma de {list(AGREGACOES)}"
+        )
+    if not group_by:
+        raise HTTPException(status_code=400, detail="Informe ao menos uma coluna em 'group_by'.")
+    if not metricas:
+        raise HTTPException(status_code=400, detail="Informe ao menos uma coluna em 'metric'.")
+
+    desconhecidas = [c for c in group_by + metricas if c not in frame.columns]
+    if desconhecidas:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Coluna(s) inexistente(s): {desconhecidas}. Disponíveis: {frame.columns.tolist()}"
+        )
+    nao_numericas = [c for c in metricas if not is_numeric_dtype(frame[c])]
+    if nao_numericas:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Métrica(s) não numérica(s): {nao_numericas}"
+        )
+    repetidas = [c for c in metricas if c in group_by]
+    if repetidas:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Coluna(s) em 'group_by' e 'metric' ao mesmo tempo: {repetidas}"
+        )
+
+    return (
+        frame.groupby(group_by, sort=True, dropna=False)[metricas]
+        .agg(agg)
+        .reset_index()
+    )
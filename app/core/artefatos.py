@@ -0,0 +1,172 @@
+# app/core/artefatos.py
+
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Dict, Optional
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# Artefatos Parquet gerados a partir dos CSVs de data/ (os CSVs continuam
+# sendo a fonte da verdade; os artefatos são só uma forma mais rápida de carregá-los)
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+ARTEFATOS_DIR = os.environ.get("ARTEFATOS_DIR", os.path.join(ROOT, "data", "parquet"))
+MANIFESTO = "manifest.json"
+# DATASETS_MMAP=1: carrega os datasets de arquivos Arrow IPC mapeados em memória
+# (zero-copy), para que vários workers do uvicorn compartilhem as mesmas páginas
+MMAP_ATIVO = os.environ.get("DATASETS_MMAP", "0") == "1"
+
+_lock_manifesto = threading.Lock()
+
+
+def sha256_arquivo(caminho: str) -> str:
+    h = hashlib.sha256()
+    with open(caminho, "rb") as f:
+        for bloco in iter(lambda: f.read(1 << 20), b""):
+            h.update(bloco)
+    return h.hexdigest()
+
+
+def caminho_artefato(nome: str, diretorio: Optional[str] = None, extensao: str = "parquet") -> str:
+    return os.path.join(diretorio or ARTEFATOS_DIR, f"{nome}.{extensao}")
+
+
+def ler_manifesto(diretorio: Optional[str] = None) -> Dict[str, dict]:
+    """Lê o manifest.json (nome → metadados do artefato). Ausente ou corrompido → {}."""
+    try:
+        with open(os.path.join(diretorio or ARTEFATOS_DIR, MANIFESTO), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _gravar_atomico(caminho: str, conteudo: bytes) -> None:
+    """Grava em arquivo temporário e renomeia: leitores nunca veem arquivo pela metade."""
+    tmp = f"{caminho}.tmp-{os.getpid()}"
+    with open(tmp, "wb") as f:
+        f.write(conteudo)
+    os.replace(tmp, caminho)
+
+
+def gravar_artefato(
+    nome: str,
+    caminho_csv: str,
+    frame: pd.DataFrame,
+    diretorio: Optional[str] = None,
+    arrow: bool = False,
+) -> dict:
+    """
+    Grava o frame (já normalizado, validado e ordenado por ano) como
+    <nome>.parquet e registra no manifesto o checksum do CSV de origem e
+    do próprio Parquet. Com arrow=True grava também <nome>.arrow (Arrow IPC
+    sem compressão, próprio para memory-map). Retorna a entrada do manifesto.
+    """
+    diretorio = diretorio or ARTEFATOS_DIR
+    os.makedirs(diretorio, exist_ok=True)
+
+    tabela = pa.Table.from_pandas(frame, preserve_index=False)
+    buffer = pa.BufferOutputStream()
+    pq.write_table(tabela, buffer, compression="zstd")
+    conteudo = buffer.getvalue().to_pybytes()
+
+    destino = caminho_artefato(nome, diretorio)
+    _gravar_atomico(destino, conteudo)
+
+    st = os.stat(caminho_csv)
+    entrada = {
+        "csv": os.path.basename(caminho_csv),
+        "csv_sha256": sha256_arquivo(caminho_csv),
+        "csv_tamanho": st.st_size,
+        "csv_mtime_ns": st.st_mtime_ns,
+        "parquet": os.path.basename(destino),
+        "parquet_sha256": hashlib.sha256(conteudo).hexdigest(),
+        "linhas": len(frame),
+        "colunas": list(frame.columns),
+        "gerado_em": time.time(),
+    }
+
+    if arrow:
+        buffer = pa.BufferOutputStream()
+        with pa.ipc.new_file(buffer, tabela.schema) as escritor:
+            escritor.write_table(tabela)
+        conteudo_arrow = buffer.getvalue().to_pybytes()
+        destino_arrow = caminho_artefato(nome, diretorio, "arrow")
+        # os.replace troca o arquivo atomicamente: workers que já mapearam a
+        # versão anterior continuam lendo o inode antigo até recarregarem
+        _gravar_atomico(destino_arrow, conteudo_arrow)
+        entrada["arrow"] = os.path.basename(destino_arrow)
+        entrada["arrow_tamanho"] = len(conteudo_arrow)
+
+    with _lock_manifesto:
+        manifesto = ler_manifesto(diretorio)
+        manifesto[nome] = entrada
+        _gravar_atomico(
+            os.path.join(diretorio, MANIFESTO),
+            json.dumps(manifesto, indent=2, ensure_ascii=False).encode("utf-8"),
+        )
+    return entrada
+
+
+def carregar_artefato(
+    nome: str,
+    caminho_csv: str,
+    diretorio: Optional[str] = None,
+    mmap: bool = False,
+) -> Optional[pd.DataFrame]:
+    """
+    Devolve o frame do artefato Parquet de 'nome' se ele corresponde ao CSV
+    atual; caso contrário (sem artefato, CSV alterado, Parquet corrompido),
+    devolve None e quem chamou segue pelo caminho do CSV.
+
+    O CSV é conferido primeiro por (tamanho, mtime); se o mtime mudou sem
+    mudar o tamanho (ex.: git checkout), conferimos o sha256 do conteúdo.
+
+    Com mmap=True e um <nome>.arrow no manifesto, o arquivo Arrow IPC é
+    mapeado em memória: as colunas numéricas do DataFrame apontam direto
+    para as páginas do arquivo (page cache do SO, compartilhado entre
+    processos); só as colunas de texto viram objetos Python em cada worker.
+    """
+    diretorio = diretorio or ARTEFATOS_DIR
+    entrada = ler_manifesto(diretorio).get(nome)
+    if not entrada:
+        return None
+
+    try:
+        st = os.stat(caminho_csv)
+        if st.st_size != entrada["csv_tamanho"]:
+            return None
+        if st.st_mtime_ns != entrada["csv_mtime_ns"] and sha256_arquivo(caminho_csv) != entrada["csv_sha256"]:
+            return None
+
+        if mmap and "arrow" in entrada:
+            frame = _mapear_arrow(caminho_artefato(nome, diretorio, "arrow"), entrada["arrow_tamanho"])
+            if frame is not None:
+                return frame
+
+        with open(caminho_artefato(nome, diretorio), "rb") as f:
+            conteudo = f.read()
+        if hashlib.sha256(conteudo).hexdigest() != entrada["parquet_sha256"]:
+            return None
+        return pq.read_table(pa.BufferReader(conteudo)).to_pandas()
+    except (OSError, KeyError, pa.ArrowException):
+        return None
+
+
+def _mapear_arrow(caminho: str, tamanho: int) -> Optional[pd.DataFrame]:
+    """
+    Abre o Arrow IPC via memory-map (sem ler o arquivo inteiro nem conferir
+    sha256, o que anularia o ganho). A integridade fica por conta do tamanho
+    registrado no manifesto e do footer do formato IPC.
+    """
+    try:
+        if os.path.getsize(caminho) != tamanho:
+            return None
+        tabela = pa.ipc.open_file(pa.memory_map(caminho, "r")).read_all()
+    except (OSError, pa.ArrowException):
+        return None
+    # split_blocks evita consolidar colunas em blocos novos (que copiariam os dados)
+    return tabela.to_pandas(split_blocks=True)
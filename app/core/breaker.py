@@ -0,0 +1,102 @@
+# app/core/breaker.py
+
+import asyncio
+import os
+import time
+from typing import Awaitable, Callable, Optional, TypeVar
+
+# Falhas consecutivas para abrir o circuito e tempo (s) aberto antes de testar de novo
+CIRCUIT_LIMITE_FALHAS = int(os.environ.get("CIRCUIT_LIMITE_FALHAS", "5"))
+CIRCUIT_COOLDOWN = float(os.environ.get("CIRCUIT_COOLDOWN", "30"))
+
+FECHADO = "fechado"
+ABERTO = "aberto"
+MEIO_ABERTO = "meio_aberto"
+
+T = TypeVar("T")
+
+
+class CircuitoAberto(Exception):
+    """Levantada quando o circuito está aberto: a chamada ao vivo nem é tentada."""
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker para o upstream da Embrapa:
+      • fechado:     chamadas passam; N falhas consecutivas → abre;
+      • aberto:      chamadas falham na hora (CircuitoAberto) durante 'cooldown' s;
+      • meio_aberto: após o cooldown, UMA única chamada de teste passa:
+                     sucesso → fecha; falha → abre de novo.
+    """
+
+    def __init__(self, nome: str, limite_falhas: int, cooldown: float):
+        self.nome = nome
+        self.limite_falhas = limite_falhas
+        self.cooldown = cooldown
+        self.estado = FECHADO
+        self.falhas_consecutivas = 0
+        self.aberto_em: Optional[float] = None
+        self._sondando = False
+
+    def permite(self) -> bool:
+        """Decide se uma chamada pode ir ao upstream (reserva a sonda no meio-aberto)."""
+        if self.estado == FECHADO:
+            return True
+        if self.estado == ABERTO:
+            if time.time() - self.aberto_em < self.cooldown:
+                return False
+            self.estado = MEIO_ABERTO
+            self._sondando = False
+        # MEIO_ABERTO: só uma sonda por vez
+        if self._sondando:
+            return False
+        self._sondando = True
+        return True
+
+    def bloqueando(self) -> bool:
+        """True se o circuito está aberto e ainda dentro do cooldown (não altera o estado)."""
+        return self.estado == ABERTO and time.time() - self.aberto_em < self.cooldown
+
+    def registrar_sucesso(self) -> None:
+        self.estado = FECHADO
+        self.falhas_consecutivas = 0
+        self.aberto_em = None
+        self._sondando = False
+
+    def registrar_falha(self) -> None:
+        self.falhas_consecutivas += 1
+        self._sondando = False
+        if self.estado == MEIO_ABERTO or self.falhas_consecutivas >= self.limite_falhas:
+            self.estado = ABERTO
+            self.aberto_em = time.time()
+
+    async def chamar(self, func: Callable[[], Awaitable[T]]) -> T:
+        if not self.permite():
+            raise CircuitoAberto(f"Circuito '{self.nome}' aberto; usando fallback.")
+        try:
+            resultado = await func()
+        except asyncio.CancelledError:
+            # Cancelada no meio: não conta como sucesso nem falha, só libera a sonda
+            self._sondando = False
+            raise
+        except Exception:
+            self.registrar_falha()
+            raise
+        self.registrar_sucesso()
+        return resultado
+
+    def status(self) -> dict:
+        restante = None
+        if self.estado == ABERTO:
+            restante = max(0.0, round(self.cooldown - (time.time() - self.aberto_em), 3))
+        return {
+            "estado": self.estado,
+            "falhas_consecutivas": self.falhas_consecutivas,
+            "limite_falhas": self.limite_falhas,
+            "cooldown_segundos": self.cooldown,
+            "reabre_em_segundos": restante,
+        }
+
+
+# Circuito único para todas as chamadas ao vivo (vitibrasil.cnpuv.embrapa.br)
+EMBRAPA_BREAKER = CircuitBreaker("embrapa", CIRCUIT_LIMITE_FALHAS, CIRCUIT_COOLDOWN)
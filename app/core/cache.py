@@ -0,0 +1,267 @@
+# app/core/cache.py
+
+import asyncio
+import functools
+import gzip
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, Hashable, Optional, Type
+
+import pandas as pd
+from pydantic import BaseModel
+
+from app.core.breaker import EMBRAPA_BREAKER, CircuitBreaker
+from app.core.http import limite_upstream
+from app.core.indices import IndiceColunas, construir_indice
+from app.core.resultado import FONTE_FRESH, FONTE_STALE, Resultado
+from app.core.store import ordenar_por_ano
+from app.core.validacao import validar_frame
+from app.core.workers import WORKERS
+
+# TTL (s) de um resultado ao vivo; depois disso ele é servido como "stale"
+LIVE_CACHE_TTL = float(os.environ.get("LIVE_CACHE_TTL", "600"))
+# Idade máxima (s) para ainda servir um resultado "stale"; acima disso é descartado
+LIVE_CACHE_MAX_STALE = float(os.environ.get("LIVE_CACHE_MAX_STALE", "86400"))
+
+
+@dataclass(frozen=True)
+class _Entrada:
+    frame: pd.DataFrame
+    gerado_em: float
+    indice: Optional[IndiceColunas] = None
+
+
+class LiveCache:
+    """
+    Cache stale-while-revalidate dos resultados de scraping ao vivo, por chave
+    (recurso, ano):
+      • dentro do TTL → devolve o frame em cache ("fresh");
+      • expirado (mas abaixo de max_stale) → devolve o frame antigo na hora
+        ("stale") e agenda UMA única tarefa em segundo plano para atualizá-lo;
+      • sem entrada → busca ao vivo agora (erros sobem para quem chamou, que
+        então cai no fallback). A carga roda numa tarefa própria, protegida
+        por asyncio.shield: quem desistir de esperar (ex.: o hedge, quando o
+        fallback ganha a corrida) não a cancela — ela termina em segundo
+        plano e preenche o cache. Chamadas à mesma chave aguardam a mesma carga.
+    Com 'schema', cada frame é validado uma vez, ao entrar no cache; um frame
+    inválido conta como falha do scraping. Com 'upstream', no máximo
+    UPSTREAM_MAX_CONCORRENTES cargas rodam ao mesmo tempo (limite_upstream).
+    Com 'breaker', cada carga (todas as páginas de uma busca) conta como UMA
+    chamada do circuito: uma página com erro é uma falha, não várias, e a
+    sonda do meio-aberto é a busca inteira.
+    """
+
+    def __init__(
+        self,
+        ttl: float,
+        max_stale: float,
+        upstream: Optional[str] = None,
+        breaker: Optional[CircuitBreaker] = None,
+    ):
+        self.ttl = ttl
+        self.max_stale = max_stale
+        self.upstream = upstream
+        self.breaker = breaker
+        self._entradas: Dict[Hashable, _Entrada] = {}
+        self._atualizando: Dict[Hashable, asyncio.Task] = {}
+        self._carregando: Dict[Hashable, asyncio.Task] = {}
+
+    async def obter(
+        self,
+        chave: Hashable,
+        carregar: Callable[[], Awaitable[pd.DataFrame]],
+        schema: Optional[Type[BaseModel]] = None,
+    ) -> Resultado:
+        entrada = self._entradas.get(chave)
+        idade = time.time() - entrada.gerado_em if entrada is not None else None
+
+        if entrada is not None and idade < self.ttl:
+            return self._resultado(entrada, FONTE_FRESH)
+
+        if entrada is not None and idade < self.max_stale:
+            self._agendar_atualizacao(chave, carregar, schema)
+            return self._resultado(entrada, FONTE_STALE)
+
+        tarefa = self._carregando.get(chave)
+        if tarefa is None or tarefa.done() or tarefa.get_loop() is not asyncio.get_running_loop():
+            tarefa = asyncio.ensure_future(self._carregar(chave, carregar, schema))
+            self._carregando[chave] = tarefa
+            tarefa.add_done_callback(functools.partial(self._carga_concluida, chave))
+        entrada = await asyncio.shield(tarefa)
+        return self._resultado(entrada, FONTE_FRESH)
+
+    def espiar(self, chave: Hashable) -> Optional[Resultado]:
+        """Entrada ainda dentro do TTL, sem buscar nem agendar atualização (None se não houver)."""
+        entrada = self._entradas.get(chave)
+        if entrada is None or time.time() - entrada.gerado_em >= self.ttl:
+            return None
+        return self._resultado(entrada, FONTE_FRESH)
+
+    def por_versao(self, chave: Hashable, versao: str) -> Optional[Resultado]:
+        """
+        A entrada de 'chave', se ainda for a da 'versao' dada e ainda servível
+        (abaixo de max_stale) — sem buscar nem agendar atualização. Usado para
+        continuar uma paginação na versão em que o cursor foi emitido.
+        """
+        entrada = self._entradas.get(chave)
+        if entrada is None:
+            return None
+        idade = time.time() - entrada.gerado_em
+        resultado = self._resultado(entrada, FONTE_FRESH if idade < self.ttl else FONTE_STALE)
+        if resultado.versao != versao or idade >= self.max_stale:
+            return None
+        return resultado
+
+    def invalidar(self, chave: Optional[Hashable] = None) -> None:
+        if chave is None:
+            self._entradas.clear()
+        else:
+            self._entradas.pop(chave, None)
+
+    async def _carregar(self, chave, carregar, schema) -> _Entrada:
+        async def _buscar() -> pd.DataFrame:
+            if self.upstream is not None:
+                async with limite_upstream(self.upstream):
+                    return await carregar()
+            return await carregar()
+
+        frame = await (self.breaker.chamar(_buscar) if self.breaker is not None else _buscar())
+        # Validação, ordenação e índices são CPU: rodam no pool de trabalho
+        entrada = await WORKERS.executar(self._preparar, frame, schema)
+        self._entradas[chave] = entrada
+        return entrada
+
+    @staticmethod
+    def _preparar(frame: pd.DataFrame, schema: Optional[Type[BaseModel]]) -> _Entrada:
+        if schema is not None:
+            frame = validar_frame(frame, schema)
+        # Ordena por ano (estável) como no STORE e reinicia o índice 0..n-1
+        # crescente (chave da paginação por keyset); monta os índices de filtro
+        frame, _ = ordenar_por_ano(frame)
+        return _Entrada(frame=frame, gerado_em=time.time(), indice=construir_indice(frame))
+
+    def _carga_concluida(self, chave: Hashable, tarefa: asyncio.Task) -> None:
+        if self._carregando.get(chave) is tarefa:
+            del self._carregando[chave]
+        # Marca a exceção como “vista” mesmo se ninguém esperou até o fim
+        if not tarefa.cancelled():
+            tarefa.exception()
+
+    def _agendar_atualizacao(self, chave, carregar, schema) -> None:
+        tarefa = self._atualizando.get(chave)
+        # Já existe uma atualização em andamento neste event loop → não duplica
+        if tarefa is not None and not tarefa.done() and tarefa.get_loop() is asyncio.get_running_loop():
+            return
+        self._atualizando[chave] = asyncio.create_task(self._atualizar(chave, carregar, schema))
+
+    async def _atualizar(self, chave, carregar, schema) -> None:
+        try:
+            await self._carregar(chave, carregar, schema)
+        except Exception as e:
+            # Mantém a entrada antiga; a próxima requisição tenta de novo
+            print(f"→ [CACHE] Falha ao atualizar {chave} em segundo plano: {e}")
+        finally:
+            self._atualizando.pop(chave, None)
+
+    @staticmethod
+    def _resultado(entrada: _Entrada, fonte: str) -> Resultado:
+        return Resultado(
+            frame=entrada.frame,
+            fonte=fonte,
+            versao=f"live-{int(entrada.gerado_em * 1000)}",
+            gerado_em=entrada.gerado_em,
+            indice=entrada.indice,
+        )
+
+
+# Instância única, compartilhada pelos cinco módulos CRUD
+LIVE_CACHE = LiveCache(LIVE_CACHE_TTL, LIVE_CACHE_MAX_STALE, upstream="embrapa", breaker=EMBRAPA_BREAKER)
+
+
+# ─── Cache LRU das respostas já serializadas (bytes) ───────────────────────────
+# Limite total (bytes) somando todas as respostas guardadas
+RESPOSTA_CACHE_MAX_BYTES = int(os.environ.get("RESPOSTA_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+# Respostas a partir deste tamanho também são guardadas comprimidas (gzip)
+RESPOSTA_GZIP_MIN_BYTES = int(os.environ.get("RESPOSTA_GZIP_MIN_BYTES", "1024"))
+RESPOSTA_GZIP_NIVEL = int(os.environ.get("RESPOSTA_GZIP_NIVEL", "6"))
+
+
+@dataclass(frozen=True)
+class RespostaSerializada:
+    conteudo: bytes
+    codificacao: Optional[str] = None       # None (identidade) ou "gzip"
+    proximo_cursor: Optional[str] = None
+
+
+class ByteCache:
+    """
+    LRU de respostas prontas (bytes), limitado pelo total de bytes.
+
+    A chave é (escopo, versão, consulta normalizada), em que 'escopo' agrupa
+    respostas que vêm do mesmo dataset — por exemplo (recurso, ano). Quando
+    um escopo aparece com uma versão nova, as entradas das versões antigas
+    daquele escopo são descartadas na hora.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self._entradas: "OrderedDict[Hashable, RespostaSerializada]" = OrderedDict()
+        self._versoes: Dict[Hashable, str] = {}
+        self._lock = threading.Lock()
+
+    def obter(self, escopo: Hashable, versao: str, consulta: Hashable) -> Optional[RespostaSerializada]:
+        chave = (escopo, versao, consulta)
+        with self._lock:
+            resposta = self._entradas.get(chave)
+            if resposta is not None:
+                self._entradas.move_to_end(chave)
+            return resposta
+
+    def guardar(self, escopo: Hashable, versao: str, consulta: Hashable, resposta: RespostaSerializada) -> None:
+        tamanho = len(resposta.conteudo)
+        if tamanho > self.max_bytes:
+            return
+        chave = (escopo, versao, consulta)
+        with self._lock:
+            if self._versoes.get(escopo) != versao:
+                self._descartar_escopo(escopo)
+                self._versoes[escopo] = versao
+
+            antiga = self._entradas.pop(chave, None)
+            if antiga is not None:
+                self.total_bytes -= len(antiga.conteudo)
+            self._entradas[chave] = resposta
+            self.total_bytes += tamanho
+
+            while self.total_bytes > self.max_bytes:
+                _, removida = self._entradas.popitem(last=False)
+                self.total_bytes -= len(removida.conteudo)
+
+    def limpar(self) -> None:
+        with self._lock:
+            self._entradas.clear()
+            self._versoes.clear()
+            self.total_bytes = 0
+
+    def _descartar_escopo(self, escopo: Hashable) -> None:
+        for chave in [c for c in self._entradas if c[0] == escopo]:
+            self.total_bytes -= len(self._entradas.pop(chave).conteudo)
+
+    def status(self) -> dict:
+        return {
+            "entradas": len(self._entradas),
+            "bytes": self.total_bytes,
+            "max_bytes": self.max_bytes,
+        }
+
+
+def comprimir(conteudo: bytes) -> bytes:
+    return gzip.compress(conteudo, compresslevel=RESPOSTA_GZIP_NIVEL)
+
+
+# Instância única, usada pela rota /{recurso}/
+RESPOSTA_CACHE = ByteCache(RESPOSTA_CACHE_MAX_BYTES)
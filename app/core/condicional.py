@@ -0,0 +1,84 @@
+# app/core/condicional.py
+
+import hashlib
+import os
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Hashable, Optional
+
+from fastapi import Request, Response
+
+from app.core.breaker import EMBRAPA_BREAKER
+from app.core.cache import LIVE_CACHE
+from app.core.resultado import Resultado
+from app.core.store import STORE
+
+# Cache-Control padrão das respostas de dados; por recurso: CACHE_CONTROL_<RECURSO>
+CACHE_CONTROL_PADRAO = os.environ.get("CACHE_CONTROL_PADRAO", "private, max-age=60")
+
+
+def cache_control(recurso: str) -> str:
+    return os.environ.get(f"CACHE_CONTROL_{recurso.upper()}", CACHE_CONTROL_PADRAO)
+
+
+def gerar_etag(recurso: str, versao: str, consulta: Hashable) -> str:
+    """ETag fraca (a mesma para gzip ou não), derivada da versão dos dados + consulta."""
+    digest = hashlib.sha1(f"{recurso}|{versao}|{consulta!r}".encode()).hexdigest()[:24]
+    return f'W/"{digest}"'
+
+
+def data_http(timestamp: float) -> str:
+    return formatdate(timestamp, usegmt=True)
+
+
+def cabecalhos_validacao(recurso: str, etag: str, modificado_em: float) -> dict:
+    return {
+        "ETag": etag,
+        "Last-Modified": data_http(modificado_em),
+        "Cache-Control": cache_control(recurso),
+    }
+
+
+def nao_modificado(request: Request, etag: str, modificado_em: float) -> bool:
+    """
+    Avalia If-None-Match (comparação fraca, tem precedência) e, na ausência
+    dele, If-Modified-Since (com resolução de segundos, como o header HTTP).
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        if if_none_match.strip() == "*":
+            return True
+        nossa = etag.removeprefix("W/")
+        return any(tag.strip().removeprefix("W/") == nossa for tag in if_none_match.split(","))
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since is not None:
+        try:
+            desde = parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+        return int(modificado_em) <= desde
+    return False
+
+
+def resposta_304(recurso: str, etag: str, modificado_em: float, fonte: str) -> Response:
+    headers = cabecalhos_validacao(recurso, etag, modificado_em)
+    headers["X-Fonte-Dados"] = fonte
+    return Response(status_code=304, headers=headers)
+
+
+async def versao_sem_crud(recurso: str, ano: Optional[int]) -> Optional[Resultado]:
+    """
+    Descobre, sem chamar o buscar_* (nenhuma rede, nenhum parsing), qual
+    versão dos dados a função CRUD devolveria agora — quando isso é certo:
+      • há resultado ao vivo dentro do TTL no LIVE_CACHE → essa versão;
+      • o circuito da Embrapa está aberto → o CRUD cairia no fallback → versão do STORE.
+    Nos demais casos (entrada “stale” que precisa ser revalidada, ou tentativa
+    ao vivo pendente) devolve None e a requisição segue o caminho normal.
+    """
+    ao_vivo = LIVE_CACHE.espiar((recurso, ano))
+    if ao_vivo is not None:
+        return ao_vivo
+    if EMBRAPA_BREAKER.bloqueando():
+        dataset = await STORE.obter_async(recurso)
+        return dataset.resultado(ano)
+    return None
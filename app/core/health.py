@@ -0,0 +1,79 @@
+# app/core/health.py
+
+import asyncio
+import os
+import time
+from typing import Dict, Optional
+
+from app.core.http import sondar
+
+# Intervalo (s) entre duas rodadas de verificação das URLs “ao vivo”
+HEALTHZ_INTERVALO = float(os.environ.get("HEALTHZ_INTERVALO", "30"))
+
+# 5 URLs “ao vivo” (Embrapa)
+URLS_LIVE = {
+    "producao":       "http://vitibrasil.cnpuv.embrapa.br/index.php?opcao=opt_02",
+    "processamento":  "http://vitibrasil.cnpuv.embrapa.br/index.php?opcao=opt_03",
+    "comercializacao":"http://vitibrasil.cnpuv.embrapa.br/index.php?opcao=opt_04",
+    "importacao":     "http://vitibrasil.cnpuv.embrapa.br/index.php?opcao=opt_05",
+    "exportacao":     "http://vitibrasil.cnpuv.embrapa.br/index.php?opcao=opt_06",
+}
+
+
+class MonitorSaude:
+    """
+    Verifica as URLs “ao vivo” em segundo plano (todas em paralelo, a cada
+    'intervalo' segundos) e guarda o último resultado. O endpoint /healthz/
+    apenas lê esse resultado, sem fazer nenhuma chamada de rede.
+    """
+
+    def __init__(self, urls: Dict[str, str], intervalo: float):
+        self.urls = urls
+        self.intervalo = intervalo
+        self.resultado: Dict[str, str] = {f"live_{key}": "pendente" for key in urls}
+        self.verificado_em: Optional[float] = None
+        self._tarefa: Optional[asyncio.Task] = None
+
+    async def _verificar_url(self, key: str, url: str):
+        try:
+            status = await sondar(url)
+            return key, "ok" if status == 200 else f"HTTP {status}"
+        except Exception as e:
+            return key, f"falha ({type(e).__name__})"
+
+    async def verificar(self) -> Dict[str, str]:
+        """Executa uma rodada de HEADs concorrentes e atualiza o cache."""
+        pares = await asyncio.gather(
+            *(self._verificar_url(key, url) for key, url in self.urls.items())
+        )
+        self.resultado = {f"live_{key}": status for key, status in pares}
+        self.verificado_em = time.time()
+        return self.resultado
+
+    def idade(self) -> Optional[float]:
+        """Segundos desde a última verificação (None se ainda não houve nenhuma)."""
+        if self.verificado_em is None:
+            return None
+        return time.time() - self.verificado_em
+
+    async def _executar(self) -> None:
+        while True:
+            await self.verificar()
+            await asyncio.sleep(self.intervalo)
+
+    def iniciar(self) -> None:
+        if self._tarefa is None or self._tarefa.done():
+            self._tarefa = asyncio.create_task(self._executar())
+
+    async def parar(self) -> None:
+        if self._tarefa is not None:
+            self._tarefa.cancel()
+            try:
+                await self._tarefa
+            except asyncio.CancelledError:
+                pass
+            self._tarefa = None
+
+
+# Instância única, iniciada/parada no lifespan da aplicação
+MONITOR = MonitorSaude(URLS_LIVE, HEALTHZ_INTERVALO)
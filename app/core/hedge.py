@@ -0,0 +1,82 @@
+# app/core/hedge.py
+
+import asyncio
+import os
+from typing import Awaitable, Callable, Optional
+
+from app.core.resultado import Resultado
+from app.core.store import STORE
+
+# Orçamento de latência (s) de uma busca; por recurso: LATENCIA_ORCAMENTO_<RECURSO>.
+# 0 = sem orçamento (espera o ao vivo o quanto for preciso, como antes)
+LATENCIA_ORCAMENTO = float(os.environ.get("LATENCIA_ORCAMENTO", "2"))
+
+
+def orcamento(recurso: str) -> float:
+    return float(os.environ.get(f"LATENCIA_ORCAMENTO_{recurso.upper()}", LATENCIA_ORCAMENTO))
+
+
+async def _fallback(recurso: str, ano: Optional[int]) -> Resultado:
+    dataset = await STORE.obter_async(recurso)
+    return dataset.resultado(ano)
+
+
+async def _cancelar(tarefa: asyncio.Task) -> None:
+    """Cancela e espera a tarefa terminar de fato (libera semáforos, conexões)."""
+    if tarefa.done():
+        if not tarefa.cancelled():
+            tarefa.exception()  # já tratada (ou descartada) por quem chamou
+        return
+    tarefa.cancel()
+    try:
+        await tarefa
+    except BaseException:
+        pass
+
+
+async def ao_vivo_ou_fallback(
+    recurso: str,
+    ano: Optional[int],
+    ao_vivo: Callable[[], Awaitable[Resultado]],
+    limite: Optional[float] = None,
+) -> Resultado:
+    """
+    Busca com orçamento de latência ('limite', padrão orcamento(recurso)):
+      1) dispara o ao vivo (LIVE_CACHE → scraping);
+      2) respondeu (com sucesso) dentro de metade do orçamento → é ele;
+         falhou → fallback na hora;
+      3) metade do orçamento gasta → dispara também o fallback (STORE) e fica
+         com a primeira resposta aceitável (sem erro) das duas — o ao vivo
+         ganha empates. Deixamos de esperar pela perdedora (cancelada e
+         aguardada); a carga ao vivo em si, protegida no LIVE_CACHE, termina
+         em segundo plano e preenche o cache para as próximas requisições.
+    A fonte da resposta vem em Resultado.fonte ("fresh"/"stale" ou "fallback").
+    Erro dos dois lados → sobe o erro do fallback (ex.: 503 sem CSV).
+    """
+    limite = orcamento(recurso) if limite is None else limite
+    tarefa_ao_vivo = asyncio.ensure_future(ao_vivo())
+    tarefa_fallback: Optional[asyncio.Task] = None
+    try:
+        await asyncio.wait({tarefa_ao_vivo}, timeout=limite / 2 if limite > 0 else None)
+        if tarefa_ao_vivo.done():
+            erro = tarefa_ao_vivo.exception()
+            if erro is None:
+                return tarefa_ao_vivo.result()
+            print(f"→ [{recurso.upper()}] Falha no LIVE scraping ({erro}); usando fallback.")
+            return await _fallback(recurso, ano)
+
+        # Metade do orçamento gasta: corrida entre o ao vivo e o fallback
+        tarefa_fallback = asyncio.ensure_future(_fallback(recurso, ano))
+        pendentes = {tarefa_ao_vivo, tarefa_fallback}
+        while pendentes:
+            _, pendentes = await asyncio.wait(pendentes, return_when=asyncio.FIRST_COMPLETED)
+            for tarefa in (tarefa_ao_vivo, tarefa_fallback):
+                if tarefa.done() and tarefa.exception() is None:
+                    if tarefa is tarefa_fallback:
+                        print(f"→ [{recurso.upper()}] LIVE acima de {limite / 2:.2f}s; respondendo com o fallback.")
+                    return tarefa.result()
+        raise tarefa_fallback.exception()
+    finally:
+        await _cancelar(tarefa_ao_vivo)
+        if tarefa_fallback is not None:
+            await _cancelar(tarefa_fallback)
@@ -0,0 +1,138 @@
+# app/core/http.py
+
+import asyncio
+import os
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlparse
+
+import httpx
+
+# ─── Configurações do cliente HTTP (via ambiente) ──────────────────────────────
+HTTP_TIMEOUT = float(os.environ.get("HTTP_TIMEOUT", "5"))                  # leitura/escrita (s)
+HTTP_CONNECT_TIMEOUT = float(os.environ.get("HTTP_CONNECT_TIMEOUT", "3"))  # conexão (s)
+HTTP_MAX_CONEXOES = int(os.environ.get("HTTP_MAX_CONEXOES", "20"))         # total do pool
+HTTP_MAX_CONEXOES_POR_HOST = int(os.environ.get("HTTP_MAX_CONEXOES_POR_HOST", "6"))
+HTTP_MAX_KEEPALIVE = int(os.environ.get("HTTP_MAX_KEEPALIVE", "10"))
+HTTP_KEEPALIVE_EXPIRY = float(os.environ.get("HTTP_KEEPALIVE_EXPIRY", "30"))
+# Cargas ao vivo (download + parsing) simultâneas por upstream, somando todos os recursos
+UPSTREAM_MAX_CONCORRENTES = int(os.environ.get("UPSTREAM_MAX_CONCORRENTES", "2"))
+# ────────────────────────────────────────────────────────────────────────────────
+
+_cliente: Optional[httpx.AsyncClient] = None
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_limites_por_host: Dict[str, asyncio.Semaphore] = {}
+_limites_upstream: Dict[str, Tuple[asyncio.AbstractEventLoop, asyncio.Semaphore]] = {}
+
+
+def criar_cliente() -> httpx.AsyncClient:
+    """
+    Cria o AsyncClient compartilhado: keep-alive com pool de conexões e
+    timeouts configuráveis. Os redirects são seguidos (o site da Embrapa
+    às vezes redireciona index.php).
+    """
+    return httpx.AsyncClient(
+        timeout=httpx.Timeout(HTTP_TIMEOUT, connect=HTTP_CONNECT_TIMEOUT),
+        limits=httpx.Limits(
+            max_connections=HTTP_MAX_CONEXOES,
+            max_keepalive_connections=HTTP_MAX_KEEPALIVE,
+            keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+        ),
+        follow_redirects=True,
+    )
+
+
+async def iniciar_cliente() -> httpx.AsyncClient:
+    """Chamado no lifespan da aplicação: cria o cliente no event loop do servidor."""
+    global _cliente, _loop
+    await fechar_cliente()
+    _cliente = criar_cliente()
+    _loop = asyncio.get_running_loop()
+    _limites_por_host.clear()
+    return _cliente
+
+
+async def fechar_cliente() -> None:
+    """Chamado no encerramento do lifespan: fecha as conexões do pool."""
+    global _cliente, _loop
+    if _cliente is not None and not _cliente.is_closed:
+        await _cliente.aclose()
+    _cliente = None
+    _loop = None
+    _limites_por_host.clear()
+
+
+def obter_cliente() -> httpx.AsyncClient:
+    """
+    Retorna o cliente compartilhado. Fora do lifespan (ex.: scripts, testes
+    sem 'with TestClient(...)') criamos um cliente sob demanda, vinculado ao
+    event loop atual, já que conexões do pool não podem trocar de loop.
+    """
+    global _cliente, _loop
+    loop = asyncio.get_running_loop()
+    if _cliente is None or _cliente.is_closed or _loop is not loop:
+        _descartar_cliente()
+        _cliente = criar_cliente()
+        _loop = loop
+        _limites_por_host.clear()
+    return _cliente
+
+
+def _descartar_cliente() -> None:
+    """
+    Fecha o cliente do loop anterior antes de trocá-lo, para não deixar
+    conexões do pool abertas: se aquele loop ainda roda (outra thread), o
+    aclose() é agendado nele; se já parou, nada mais pode aguardar o aclose()
+    e só largamos a referência (os sockets saem com o coletor de lixo).
+    """
+    global _cliente, _loop
+    antigo, loop_antigo = _cliente, _loop
+    _cliente = None
+    _loop = None
+    if antigo is None or antigo.is_closed or loop_antigo is None:
+        return
+    if loop_antigo.is_running() and not loop_antigo.is_closed():
+        asyncio.run_coroutine_threadsafe(antigo.aclose(), loop_antigo)
+
+
+def _limite_do_host(url: str) -> asyncio.Semaphore:
+    host = urlparse(url).netloc
+    if host not in _limites_por_host:
+        _limites_por_host[host] = asyncio.Semaphore(HTTP_MAX_CONEXOES_POR_HOST)
+    return _limites_por_host[host]
+
+
+def limite_upstream(nome: str) -> asyncio.Semaphore:
+    """
+    Semáforo de cargas ao vivo simultâneas contra o upstream 'nome' (ex.:
+    "embrapa"): limita quantas buscas diferentes martelam o site ao mesmo
+    tempo — as idênticas já são coalescidas antes (SINGLEFLIGHT).
+    Um por event loop, como o cliente compartilhado.
+    """
+    loop = asyncio.get_running_loop()
+    atual = _limites_upstream.get(nome)
+    if atual is None or atual[0] is not loop:
+        atual = (loop, asyncio.Semaphore(UPSTREAM_MAX_CONCORRENTES))
+        _limites_upstream[nome] = atual
+    return atual[1]
+
+
+async def baixar(url: str) -> httpx.Response:
+    """
+    GET assíncrono usando o cliente compartilhado, respeitando o limite de
+    conexões simultâneas por host. Levanta httpx.HTTPStatusError em 4xx/5xx.
+    O circuit breaker da Embrapa não conta cada página: ele envolve a carga
+    ao vivo inteira (LIVE_CACHE), que pode baixar várias páginas de uma vez.
+    """
+    cliente = obter_cliente()
+    async with _limite_do_host(url):
+        resposta = await cliente.get(url)
+    resposta.raise_for_status()
+    return resposta
+
+
+async def sondar(url: str) -> int:
+    """HEAD assíncrono (sem baixar o corpo), respeitando o limite por host. Retorna o status HTTP."""
+    cliente = obter_cliente()
+    async with _limite_do_host(url):
+        resposta = await cliente.head(url)
+    return resposta.status_code
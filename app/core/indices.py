@@ -0,0 +1,152 @@
+# app/core/indices.py
+
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+from fastapi import HTTPException
+
+# Colunas de texto com índice por valor (bitmap de linhas), quando existem no recurso
+COLUNAS_INDEXADAS = ("opcao", "paises", "categoria", "produto")
+
+
+@dataclass(frozen=True)
+class Filtros:
+    """
+    Filtros de uma consulta, já normalizados (e hasheáveis, para entrar na
+    chave do RESPOSTA_CACHE e do ETag):
+      • ano_inicio / ano_fim: faixa de anos (inclusiva)
+      • colunas: ((coluna, (valor, ...)), ...) — valores de uma coluna se somam (OU),
+                 colunas diferentes se intersectam (E)
+    """
+    ano_inicio: Optional[int] = None
+    ano_fim: Optional[int] = None
+    colunas: Tuple[Tuple[str, Tuple[str, ...]], ...] = ()
+
+    @classmethod
+    def criar(
+        cls,
+        ano_inicio: Optional[int] = None,
+        ano_fim: Optional[int] = None,
+        colunas: Optional[Dict[str, Optional[Iterable[str]]]] = None,
+    ) -> "Filtros":
+        if ano_inicio is not None and ano_fim is not None and ano_inicio > ano_fim:
+            raise HTTPException(status_code=400, detail="'ano_inicio' maior que 'ano_fim'.")
+        normalizadas = tuple(
+            (coluna, tuple(sorted(set(valores))))
+            for coluna, valores in sorted((colunas or {}).items())
+            if valores
+        )
+        return cls(ano_inicio, ano_fim, normalizadas)
+
+    @property
+    def vazio(self) -> bool:
+        return self.ano_inicio is None and self.ano_fim is None and not self.colunas
+
+
+@dataclass(frozen=True)
+class IndiceColunas:
+    """
+    Índices de um frame ordenado por ano, montados uma vez na carga:
+      • anos:    a coluna 'ano' (crescente) → faixa de anos via busca binária
+      • bitmaps: coluna → valor → linhas com aquele valor (bits empacotados,
+                 1 bit por linha), para combinar filtros com OU/E bit a bit
+    """
+    total: int
+    anos: np.ndarray
+    bitmaps: Dict[str, Dict[str, np.ndarray]] = field(default_factory=dict)
+
+    def posicoes(
+        self,
+        filtros: Filtros,
+        inicio: int = 0,
+        fim: Optional[int] = None,
+    ) -> Union[slice, np.ndarray]:
+        """
+        Linhas (posições no frame indexado, dentro de [inicio, fim)) que
+        atendem aos filtros. Só com faixa de anos → slice contígua; com
+        filtros de coluna → array de posições, da interseção dos bitmaps.
+        """
+        fim = self.total if fim is None else fim
+        if filtros.ano_inicio is not None:
+            inicio = max(inicio, int(np.searchsorted(self.anos, filtros.ano_inicio, side="left")))
+        if filtros.ano_fim is not None:
+            fim = min(fim, int(np.searchsorted(self.anos, filtros.ano_fim, side="right")))
+        if fim <= inicio:
+            return slice(inicio, inicio)
+        if not filtros.colunas:
+            return slice(inicio, fim)
+
+        mapa = None
+        nenhuma = np.zeros((self.total + 7) // 8, dtype=np.uint8)
+        for coluna, valores in filtros.colunas:
+            por_valor = self.bitmaps[coluna]
+            uniao = nenhuma
+            for valor in valores:
+                uniao = uniao | por_valor.get(valor, nenhuma)
+            mapa = uniao if mapa is None else mapa & uniao
+
+        # Desempacota só os bytes que cobrem [inicio, fim)
+        byte_inicio, byte_fim = inicio // 8, (fim + 7) // 8
+        bits = np.unpackbits(mapa[byte_inicio:byte_fim])
+        posicoes = np.flatnonzero(bits) + byte_inicio * 8
+        return posicoes[(posicoes >= inicio) & (posicoes < fim)]
+
+
+def construir_indice(frame: pd.DataFrame) -> Optional[IndiceColunas]:
+    """
+    Monta o IndiceColunas de um frame já ordenado por ano (como os do STORE e
+    do LIVE_CACHE). Sem coluna 'ano' ou fora de ordem → None.
+    """
+    if "ano" not in frame.columns or not frame["ano"].is_monotonic_increasing:
+        return None
+
+    bitmaps: Dict[str, Dict[str, np.ndarray]] = {}
+    for coluna in COLUNAS_INDEXADAS:
+        if coluna not in frame.columns:
+            continue
+        codigos, valores = pd.factorize(frame[coluna], use_na_sentinel=True)
+        bitmaps[coluna] = {
+            str(valor): np.packbits(codigos == codigo)
+            for codigo, valor in enumerate(valores)
+        }
+    return IndiceColunas(len(frame), frame["ano"].to_numpy(), bitmaps)
+
+
+def filtrar(
+    frame: pd.DataFrame,
+    filtros: Filtros,
+    indice: Optional[IndiceColunas] = None,
+    inicio: int = 0,
+) -> pd.DataFrame:
+    """
+    Aplica 'filtros' a 'frame', que ocupa as linhas [inicio, inicio+len(frame))
+    do frame coberto por 'indice'. Sem índice (ex.: frame montado à mão),
+    filtra com máscaras — o caminho normal sempre tem índice.
+    """
+    if filtros.vazio:
+        return frame
+
+    faltando = [coluna for coluna, _ in filtros.colunas if coluna not in frame.columns]
+    if faltando:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Filtro(s) não se aplicam a este recurso: {faltando}. Colunas: {frame.columns.tolist()}"
+        )
+
+    if indice is None:
+        mascara = np.ones(len(frame), dtype=bool)
+        if filtros.ano_inicio is not None:
+            mascara &= frame["ano"].to_numpy() >= filtros.ano_inicio
+        if filtros.ano_fim is not None:
+            mascara &= frame["ano"].to_numpy() <= filtros.ano_fim
+        for coluna, valores in filtros.colunas:
+            mascara &= frame[coluna].isin(valores).to_numpy()
+        return frame[mascara]
+
+    posicoes = indice.posicoes(filtros, inicio, inicio + len(frame))
+    if isinstance(posicoes, slice):
+        return frame.iloc[posicoes.start - inicio:posicoes.stop - inicio]
+    return frame.iloc[posicoes - inicio]
+
@@ -0,0 +1,94 @@
+# app/core/paginacao.py
+
+import base64
+import json
+import os
+from typing import Optional, Tuple
+
+import pandas as pd
+from fastapi import HTTPException
+
+from app.core.cache import RESPOSTA_GZIP_MIN_BYTES, RespostaSerializada, comprimir
+from app.core.indices import Filtros
+from app.core.resultado import Resultado
+
+# Tamanho máximo de página aceito em ?limit=
+PAGINA_MAX = int(os.environ.get("PAGINA_MAX", "5000"))
+
+
+def codificar_cursor(versao: str, ultima_chave: int) -> str:
+    """Cursor opaco: base64url de {"v": versão do dataset, "k": chave da última linha entregue}."""
+    bruto = json.dumps({"v": versao, "k": int(ultima_chave)}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(bruto.encode()).decode().rstrip("=")
+
+
+def _ler_cursor(cursor: str) -> Tuple[str, int]:
+    try:
+        preenchido = cursor + "=" * (-len(cursor) % 4)
+        dados = json.loads(base64.urlsafe_b64decode(preenchido.encode()))
+        return dados["v"], int(dados["k"])
+    except Exception:
+        raise HTTPException(status_code=400, detail="Cursor inválido.")
+
+
+def versao_do_cursor(cursor: str) -> str:
+    """Versão dos dados em que o cursor foi emitido (para servir a próxima página da mesma fonte)."""
+    return _ler_cursor(cursor)[0]
+
+
+def decodificar_cursor(cursor: str, versao: str) -> int:
+    """
+    Devolve a chave da última linha entregue. O cursor só vale para a mesma
+    versão dos dados (as chaves mudam quando o dataset é recarregado).
+    """
+    cursor_versao, chave = _ler_cursor(cursor)
+    if cursor_versao != versao:
+        raise HTTPException(
+            status_code=400,
+            detail="Cursor expirado: os dados foram atualizados. Recomece a paginação sem cursor."
+        )
+    return chave
+
+
+def paginar(
+    frame: pd.DataFrame,
+    versao: str,
+    limit: Optional[int],
+    cursor: Optional[str],
+) -> Tuple[pd.DataFrame, Optional[str]]:
+    """
+    Paginação por keyset: a chave de cada linha é o rótulo do índice do frame,
+    que segue a ordem do dataset (ano, ordem original) e é crescente. A
+    próxima página começa logo após a última chave entregue, via busca
+    binária (searchsorted) + fatia iloc, sem materializar o resto da lista.
+    Retorna (página, próximo cursor ou None).
+    """
+    if cursor is not None:
+        ultima_chave = decodificar_cursor(cursor, versao)
+        inicio = frame.index.searchsorted(ultima_chave, side="right")
+        frame = frame.iloc[inicio:]
+
+    if limit is None or len(frame) <= limit:
+        return frame, None
+
+    pagina = frame.iloc[:limit]
+    return pagina, codificar_cursor(versao, pagina.index[-1])
+
+
+def serializar_pagina(
+    resultado: Resultado,
+    filtros: Filtros,
+    limit: Optional[int],
+    cursor: Optional[str],
+    codificacao: Optional[str],
+) -> RespostaSerializada:
+    """
+    Filtra, recorta a página (keyset) e serializa em JSON; comprime se o
+    cliente aceitar gzip. Roda no pool de trabalho (rotas /{recurso}/ e /batch).
+    """
+    frame = resultado.filtrar(filtros)
+    pagina, proximo_cursor = paginar(frame, resultado.versao, limit, cursor)
+    conteudo = pagina.to_json(orient="records", force_ascii=False).encode("utf-8")
+    if codificacao == "gzip" and len(conteudo) >= RESPOSTA_GZIP_MIN_BYTES:
+        return RespostaSerializada(comprimir(conteudo), "gzip", proximo_cursor)
+    return RespostaSerializada(conteudo, None, proximo_cursor)
@@ -0,0 +1,77 @@
+# app/core/ranking.py
+
+import os
+from dataclasses import dataclass, field
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Métricas que podem ordenar o ranking e maior 'n' aceito em ?n=
+METRICAS_RANKING = ("quantidade", "valor_us")
+RANKING_MAX = int(os.environ.get("RANKING_MAX", "500"))
+# Linha de totais das tabelas da Embrapa: não é um país, fica fora dos rankings
+LINHA_TOTAL = "Total"
+
+
+@dataclass(frozen=True)
+class Rankings:
+    """
+    Rankings de países pré-calculados na carga do dataset.
+      • tabelas: métrica → frame ordenado por (ano, opcao, métrica desc, paises),
+                 com a coluna 'posicao' (1 = maior valor)
+      • indice:  (ano, opcao, métrica) → (início, fim) das linhas em tabelas[métrica];
+                 opcao=None é o ranking somando todas as opções do ano
+    """
+    tabelas: Dict[str, pd.DataFrame] = field(default_factory=dict)
+    indice: Dict[Tuple[int, Optional[str], str], Tuple[int, int]] = field(default_factory=dict)
+
+    def top(self, ano: int, opcao: Optional[str], metrica: str, n: int) -> pd.DataFrame:
+        """Os 'n' primeiros países do ranking (fatia contígua, sem ordenar nada por requisição)."""
+        tabela = self.tabelas[metrica]
+        inicio, fim = self.indice.get((ano, opcao, metrica), (0, 0))
+        return tabela.iloc[inicio:min(fim, inicio + n)]
+
+
+def calcular_rankings(frame: pd.DataFrame) -> Rankings:
+    """
+    Monta, para cada métrica, um único frame com os rankings de todos os
+    (ano, opcao) — e de cada ano somando as opções — ordenado de uma vez
+    (vetorizado); o índice guarda onde começa e termina cada ranking.
+    Empates na métrica são desempatados pelo nome do país; a linha "Total"
+    das tabelas originais é descartada.
+    """
+    metricas = [m for m in METRICAS_RANKING if m in frame.columns]
+    colunas = ["ano", "opcao", "paises", *metricas]
+
+    frame = frame[frame["paises"] != LINHA_TOTAL]
+    por_opcao = frame[colunas]
+    todas = frame.groupby(["ano", "paises"], sort=False, as_index=False)[metricas].sum()
+    todas.insert(1, "opcao", None)
+    base = pd.concat([por_opcao, todas], ignore_index=True)
+    # Chave de ordenação sem nulos: "" (todas as opções) vem antes de qualquer opção
+    base["_opcao"] = base["opcao"].fillna("")
+
+    tabelas: Dict[str, pd.DataFrame] = {}
+    indice: Dict[Tuple[int, Optional[str], str], Tuple[int, int]] = {}
+    for metrica in metricas:
+        ordenado = base.sort_values(
+            ["ano", "_opcao", metrica, "paises"],
+            ascending=[True, True, False, True],
+            kind="mergesort",
+        ).reset_index(drop=True)
+
+        anos = ordenado["ano"].to_numpy()
+        opcoes = ordenado["_opcao"].to_numpy()
+        mudou = np.ones(len(ordenado), dtype=bool)
+        mudou[1:] = (anos[1:] != anos[:-1]) | (opcoes[1:] != opcoes[:-1])
+        inicios = np.flatnonzero(mudou)
+        fins = np.append(inicios[1:], len(ordenado))
+
+        ordenado["posicao"] = np.arange(len(ordenado)) - np.repeat(inicios, fins - inicios) + 1
+        for inicio, fim in zip(inicios, fins):
+            opcao = opcoes[inicio] or None
+            indice[(int(anos[inicio]), opcao, metrica)] = (int(inicio), int(fim))
+        tabelas[metrica] = ordenado.drop(columns="_opcao")
+
+    return Rankings(tabelas, indice)
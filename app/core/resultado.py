@@ -0,0 +1,38 @@
+# app/core/resultado.py
+
+from dataclasses import dataclass
+from typing import List, Optional
+
+import pandas as pd
+
+from app.core.indices import Filtros, IndiceColunas, filtrar
+
+# Origem dos dados devolvidos por um buscar_*:
+#   • "fresh":    scraping ao vivo dentro do TTL do cache
+#   • "stale":    scraping ao vivo expirado (servido enquanto é atualizado em segundo plano)
+#   • "fallback": CSV local (data/*.csv)
+FONTE_FRESH = "fresh"
+FONTE_STALE = "stale"
+FONTE_FALLBACK = "fallback"
+
+
+@dataclass(frozen=True)
+class Resultado:
+    """
+    Resposta de uma função CRUD: os dados já normalizados e de onde vieram.
+    'indice' cobre o frame completo do dataset; 'inicio' é a posição de
+    'frame' dentro dele (quando 'frame' é a fatia de um ano).
+    """
+    frame: pd.DataFrame
+    fonte: str
+    versao: str
+    gerado_em: float
+    indice: Optional[IndiceColunas] = None
+    inicio: int = 0
+
+    def filtrar(self, filtros: Filtros) -> pd.DataFrame:
+        """Aplica faixa de anos e filtros por coluna usando os índices montados na carga."""
+        return filtrar(self.frame, filtros, self.indice, self.inicio)
+
+    def registros(self) -> List[dict]:
+        return self.frame.to_dict(orient="records")
@@ -0,0 +1,78 @@
+# app/core/singleflight.py
+
+import asyncio
+import functools
+import inspect
+from typing import Awaitable, Callable, Dict, Hashable, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """
+    Coalescência de chamadas idênticas em andamento: a primeira chamada com
+    uma chave ("líder") dispara o trabalho; as que chegam enquanto ele não
+    terminou ("seguidoras") aguardam o MESMO resultado (ou a mesma exceção).
+    Terminado o trabalho, a chave sai de cena — não é um cache: a próxima
+    chamada começa um trabalho novo (e passa pelo LIVE_CACHE / STORE).
+
+    Se quem disparou desistir (ex.: cliente desconectou), o trabalho segue
+    para as demais, protegido por asyncio.shield.
+    """
+
+    def __init__(self):
+        self._em_voo: Dict[Hashable, asyncio.Task] = {}
+        self.lideres = 0
+        self.seguidores = 0
+
+    async def executar(self, chave: Hashable, funcao: Callable[[], Awaitable[T]]) -> T:
+        tarefa = self._em_voo.get(chave)
+        # Tarefas são do event loop em que nasceram (ex.: cada TestClient tem o seu)
+        if tarefa is not None and not tarefa.done() and tarefa.get_loop() is asyncio.get_running_loop():
+            self.seguidores += 1
+            return await asyncio.shield(tarefa)
+
+        self.lideres += 1
+        tarefa = asyncio.ensure_future(funcao())
+        self._em_voo[chave] = tarefa
+        tarefa.add_done_callback(functools.partial(self._concluir, chave))
+        return await asyncio.shield(tarefa)
+
+    def _concluir(self, chave: Hashable, tarefa: asyncio.Task) -> None:
+        if self._em_voo.get(chave) is tarefa:
+            del self._em_voo[chave]
+        # Marca a exceção como “vista” mesmo se todos os interessados desistiram
+        if not tarefa.cancelled():
+            tarefa.exception()
+
+    def status(self) -> dict:
+        return {
+            "em_andamento": len(self._em_voo),
+            "lideres": self.lideres,
+            "seguidores": self.seguidores,
+        }
+
+
+# Instância única, na frente das cinco funções buscar_*
+SINGLEFLIGHT = SingleFlight()
+
+
+def coalescer(recurso: str, singleflight: SingleFlight = SINGLEFLIGHT):
+    """
+    Decorador das funções CRUD (async): chamadas simultâneas com os mesmos
+    argumentos — chave (recurso, parâmetros normalizados, ex.: (("ano", 2020),))
+    — compartilham uma única execução.
+    """
+    def decorador(funcao: Callable[..., Awaitable[T]]) -> Callable[..., Awaitable[T]]:
+        assinatura = inspect.signature(funcao)
+
+        @functools.wraps(funcao)
+        async def coalescida(*args, **kwargs) -> T:
+            argumentos = assinatura.bind(*args, **kwargs)
+            argumentos.apply_defaults()
+            chave = (recurso, tuple(argumentos.arguments.items()))
+            return await singleflight.executar(chave, lambda: funcao(*args, **kwargs))
+
+        return coalescida
+
+    return decorador
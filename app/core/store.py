@@ -0,0 +1,272 @@
+# app/core/store.py
+
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple, Type
+
+import numpy as np
+import pandas as pd
+from fastapi import HTTPException
+from pydantic import BaseModel
+
+from app.core.artefatos import ARTEFATOS_DIR, MANIFESTO, MMAP_ATIVO, carregar_artefato, gravar_artefato
+from app.core.indices import IndiceColunas, construir_indice
+from app.core.resultado import FONTE_FALLBACK, Resultado
+from app.core.validacao import ErroValidacao, validar_frame
+from app.core.workers import WORKERS
+
+# Caminho absoluto para a pasta data/ (onde ficam os CSVs de fallback)
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+DATA_DIR = os.path.join(ROOT, "data")
+
+
+@dataclass(frozen=True)
+class Dataset:
+    """
+    Snapshot já normalizado de um CSV de fallback.
+      • frame:       DataFrame tipado (ano int, quantidade float, ...), ordenado por ano
+      • versao:      identificador do snapshot ("<mtime_ns>-<tamanho>")
+      • assinatura:  (mtime_ns, tamanho) do arquivo no momento da carga
+      • carregado_em: timestamp (time.time()) da carga
+      • indice_anos: ano → (início, fim) das linhas daquele ano em 'frame'
+      • indice_colunas: faixa de anos + bitmaps por valor (opcao, paises, ...) para os filtros
+      • derivados:   estruturas pré-calculadas na carga (ex.: "ranking"), por nome
+      • artefato:    mtime_ns do manifesto dos artefatos na carga (None se não havia)
+    """
+    nome: str
+    frame: pd.DataFrame
+    versao: str
+    assinatura: Tuple[int, int]
+    carregado_em: float
+    indice_anos: Dict[int, Tuple[int, int]] = field(default_factory=dict)
+    indice_colunas: Optional[IndiceColunas] = None
+    derivados: Dict[str, Any] = field(default_factory=dict)
+    artefato: Optional[int] = None
+
+    @property
+    def modificado_em(self) -> float:
+        """mtime (s) do arquivo de origem: data do snapshot, igual em todos os workers."""
+        return self.assinatura[0] / 1e9
+
+    @property
+    def anos(self) -> List[int]:
+        """Anos disponíveis no dataset (em ordem crescente), sem varrer o frame."""
+        return list(self.indice_anos)
+
+    def por_ano(self, ano: int) -> pd.DataFrame:
+        """
+        Retorna as linhas de um ano como fatia contígua de 'frame' (O(1)).
+        Ano inexistente → DataFrame vazio com as mesmas colunas.
+        """
+        inicio, fim = self.indice_anos.get(ano, (0, 0))
+        return self.frame.iloc[inicio:fim]
+
+    def resultado(self, ano: Optional[int] = None) -> Resultado:
+        """O dataset (ou a fatia de um ano) como Resultado de fallback, com os índices de filtro."""
+        if ano is None:
+            return Resultado(self.frame, FONTE_FALLBACK, self.versao, self.modificado_em, self.indice_colunas)
+        inicio, _ = self.indice_anos.get(ano, (0, 0))
+        return Resultado(
+            self.por_ano(ano), FONTE_FALLBACK, self.versao, self.modificado_em, self.indice_colunas, inicio
+        )
+
+
+def ordenar_por_ano(frame: pd.DataFrame) -> Tuple[pd.DataFrame, Dict[int, Tuple[int, int]]]:
+    """
+    Ordena o frame por 'ano' (ordenação estável: dentro de um ano mantém a
+    ordem original do CSV) e monta o índice ano → (início, fim).
+    Se não houver coluna 'ano', devolve o frame como está e índice vazio.
+    """
+    if "ano" not in frame.columns:
+        return frame.reset_index(drop=True), {}
+
+    # Artefatos (Parquet/Arrow) já vêm ordenados: não reordenar evita copiar o
+    # frame (e preserva as colunas mapeadas em memória, zero-copy)
+    ja_ordenado = frame["ano"].is_monotonic_increasing and isinstance(frame.index, pd.RangeIndex) \
+        and frame.index.start == 0 and frame.index.step == 1
+    if not ja_ordenado:
+        frame = frame.sort_values("ano", kind="mergesort").reset_index(drop=True)
+    anos, inicios = np.unique(frame["ano"].to_numpy(), return_index=True)
+    fins = np.append(inicios[1:], len(frame))
+    indice = {
+        int(ano): (int(inicio), int(fim))
+        for ano, inicio, fim in zip(anos, inicios, fins)
+    }
+    return frame, indice
+
+
+@dataclass(frozen=True)
+class _Especificacao:
+    caminho: str
+    normalizar: Callable[[pd.DataFrame], pd.DataFrame]
+    schema: Optional[Type[BaseModel]] = None
+    derivados: Dict[str, Callable[[pd.DataFrame], Any]] = field(default_factory=dict)
+
+
+class DatasetStore:
+    """
+    Armazena em memória (uma vez por processo) os CSVs de fallback já normalizados.
+
+    Cada recurso registra o caminho do seu CSV e a função que normaliza o
+    DataFrame cru. Em obter(), fazemos apenas um os.stat() no arquivo (e
+    outro no manifesto dos artefatos): se nada mudou, devolvemos o snapshot
+    em memória; caso contrário, recarregamos — do artefato Parquet/Arrow
+    (scripts/build_parquet.py) quando ele corresponde ao CSV atual, senão
+    relendo e normalizando o CSV. Como o manifesto entra na chave, um worker
+    que recarregou do CSV antes de o artefato ser regravado passa a usá-lo.
+    """
+
+    def __init__(self, artefatos_dir: Optional[str] = ARTEFATOS_DIR, mmap: bool = MMAP_ATIVO):
+        # artefatos_dir=None desliga o uso dos artefatos Parquet/Arrow;
+        # mmap=True prefere o Arrow IPC mapeado em memória (compartilhado entre workers)
+        self._artefatos_dir = artefatos_dir
+        self._mmap = mmap
+        self._especificacoes: Dict[str, _Especificacao] = {}
+        self._datasets: Dict[str, Dataset] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+
+    def registrar(
+        self,
+        nome: str,
+        caminho: str,
+        normalizar: Callable[[pd.DataFrame], pd.DataFrame],
+        schema: Optional[Type[BaseModel]] = None,
+        derivados: Optional[Dict[str, Callable[[pd.DataFrame], Any]]] = None,
+    ) -> None:
+        """
+        Registra o CSV de um recurso. Com 'schema', o frame normalizado é
+        validado (vetorizado) uma única vez a cada carga e fica só com os
+        campos do schema — as requisições servem dados já validados.
+        'derivados' (nome → função do frame final) são calculados junto com
+        cada carga e ficam em Dataset.derivados: as requisições só consultam.
+        """
+        self._especificacoes[nome] = _Especificacao(caminho, normalizar, schema, dict(derivados or {}))
+        self._locks.setdefault(nome, threading.Lock())
+        # Se o recurso for re-registrado, o snapshot antigo deixa de valer
+        self._datasets.pop(nome, None)
+
+    def caminho(self, nome: str) -> str:
+        return self._especificacoes[nome].caminho
+
+    def obter(self, nome: str) -> Dataset:
+        """
+        Retorna o Dataset do recurso 'nome', recarregando somente se o CSV
+        (mtime ou tamanho) ou o manifesto dos artefatos mudou desde a última carga.
+        """
+        esp = self._especificacoes[nome]
+        assinatura, artefato = self._chave(esp.caminho)
+
+        atual = self._datasets.get(nome)
+        if atual is not None and (atual.assinatura, atual.artefato) == (assinatura, artefato):
+            return atual
+
+        with self._locks[nome]:
+            # Outra thread pode ter recarregado enquanto esperávamos o lock
+            atual = self._datasets.get(nome)
+            if atual is not None and (atual.assinatura, atual.artefato) == (assinatura, artefato):
+                return atual
+
+            frame = None
+            if self._artefatos_dir is not None:
+                frame = carregar_artefato(nome, esp.caminho, self._artefatos_dir, self._mmap)
+            if frame is None:
+                frame = self._ler_csv(nome, esp)
+            frame, indice_anos = ordenar_por_ano(frame)
+            dataset = Dataset(
+                nome=nome,
+                frame=frame,
+                versao=f"{assinatura[0]}-{assinatura[1]}",
+                assinatura=assinatura,
+                carregado_em=time.time(),
+                indice_anos=indice_anos,
+                indice_colunas=construir_indice(frame),
+                derivados={chave: calcular(frame) for chave, calcular in esp.derivados.items()},
+                artefato=artefato,
+            )
+            self._datasets[nome] = dataset
+            return dataset
+
+    async def obter_async(self, nome: str) -> Dataset:
+        """
+        obter() para o event loop: com o snapshot em dia, devolve na hora;
+        se for preciso (re)carregar (ler CSV/Parquet, normalizar, validar,
+        montar índices), faz isso no pool de trabalho (WORKERS).
+        """
+        atual = self._datasets.get(nome)
+        if atual is not None and (atual.assinatura, atual.artefato) == self._chave(self._especificacoes[nome].caminho):
+            return atual
+        return await WORKERS.executar(self.obter, nome)
+
+    def construir_artefato(self, nome: str, diretorio: Optional[str] = None, arrow: bool = False) -> dict:
+        """
+        Lê e normaliza o CSV de 'nome' (ignorando artefatos existentes) e grava
+        o Parquet correspondente (e o Arrow IPC, se arrow=True) + entrada no
+        manifesto. Retorna a entrada.
+        """
+        esp = self._especificacoes[nome]
+        self._assinatura(esp.caminho)  # 503 se o CSV não existir
+        frame, _ = ordenar_por_ano(self._ler_csv(nome, esp))
+        return gravar_artefato(nome, esp.caminho, frame, diretorio or self._artefatos_dir, arrow)
+
+    def nomes(self) -> List[str]:
+        return list(self._especificacoes)
+
+    def invalidar(self, nome: Optional[str] = None) -> None:
+        """Descarta o snapshot de um recurso (ou de todos), forçando nova carga."""
+        if nome is None:
+            self._datasets.clear()
+        else:
+            self._datasets.pop(nome, None)
+
+    @staticmethod
+    def _ler_csv(nome: str, esp: _Especificacao) -> pd.DataFrame:
+        """Lê o CSV cru, normaliza e valida contra o schema (se houver)."""
+        try:
+            df_raw = pd.read_csv(esp.caminho)
+        except Exception as e:
+            raise HTTPException(
+                status_code=500,
+                detail=f"Erro ao ler o CSV de fallback: {e}"
+            )
+
+        frame = esp.normalizar(df_raw)
+        if esp.schema is not None:
+            try:
+                frame = validar_frame(frame, esp.schema)
+            except ErroValidacao as e:
+                raise HTTPException(
+                    status_code=500,
+                    detail=f"CSV de fallback inválido para '{nome}': {e}"
+                )
+        return frame
+
+    def _chave(self, caminho: str) -> Tuple[Tuple[int, int], Optional[int]]:
+        """
+        Chave de recarga: assinatura do CSV + mtime_ns do manifesto dos
+        artefatos (None se não houver). A versão do snapshot continua vindo só
+        do CSV — o artefato tem os mesmos dados, então cursores e caches valem.
+        """
+        artefato = None
+        if self._artefatos_dir is not None:
+            try:
+                artefato = os.stat(os.path.join(self._artefatos_dir, MANIFESTO)).st_mtime_ns
+            except OSError:
+                pass
+        return self._assinatura(caminho), artefato
+
+    @staticmethod
+    def _assinatura(caminho: str) -> Tuple[int, int]:
+        try:
+            st = os.stat(caminho)
+        except OSError:
+            raise HTTPException(
+                status_code=503,
+                detail=f"CSV de fallback não encontrado em: {caminho}"
+            )
+        return (st.st_mtime_ns, st.st_size)
+
+
+# Instância única, compartilhada por todos os módulos CRUD
+STORE = DatasetStore()
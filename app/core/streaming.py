@@ -0,0 +1,31 @@
+# app/core/streaming.py
+
+import os
+from typing import Iterator
+
+import pandas as pd
+
+# Linhas por bloco enviado ao cliente
+EXPORT_BLOCO = int(os.environ.get("EXPORT_BLOCO", "2000"))
+
+FORMATOS_EXPORT = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+
+def gerar_ndjson(frame: pd.DataFrame, tamanho_bloco: int = EXPORT_BLOCO) -> Iterator[bytes]:
+    """Uma linha JSON por registro, serializada em blocos de 'tamanho_bloco' linhas."""
+    for inicio in range(0, len(frame), tamanho_bloco):
+        bloco = frame.iloc[inicio:inicio + tamanho_bloco]
+        yield bloco.to_json(orient="records", lines=True, force_ascii=False).encode("utf-8")
+
+
+def gerar_csv(frame: pd.DataFrame, tamanho_bloco: int = EXPORT_BLOCO) -> Iterator[bytes]:
+    """CSV com cabeçalho apenas no primeiro bloco (mesmo sem linhas, envia o cabeçalho)."""
+    if frame.empty:
+        yield frame.to_csv(index=False).encode("utf-8")
+        return
+    for inicio in range(0, len(frame), tamanho_bloco):
+        bloco = frame.iloc[inicio:inicio + tamanho_bloco]
+        yield bloco.to_csv(index=False, header=(inicio == 0)).encode("utf-8")
@@ -0,0 +1,65 @@
+# app/core/validacao.py
+
+from typing import Type
+
+import pandas as pd
+from pydantic import BaseModel
+
+
+class ErroValidacao(ValueError):
+    """O frame não obedece ao schema Pydantic do recurso."""
+
+
+def _linhas_exemplo(frame: pd.DataFrame, mascara: pd.Series, limite: int = 3) -> list:
+    return frame.loc[mascara].head(limite).to_dict(orient="records")
+
+
+def validar_frame(frame: pd.DataFrame, schema: Type[BaseModel]) -> pd.DataFrame:
+    """
+    Valida (e converte) um DataFrame inteiro contra o schema Pydantic, coluna a
+    coluna, de forma vetorizada — em vez de instanciar um modelo por linha a
+    cada requisição. Executado uma vez quando o dataset é carregado/atualizado.
+
+      • int   → numérico, sem nulos e sem parte fracionária → int64
+      • float → numérico, sem nulos → float64
+      • str   → sem nulos → str
+
+    Retorna um novo frame só com os campos do schema, na ordem do schema.
+    Levanta ErroValidacao descrevendo a coluna e algumas linhas inválidas.
+    """
+    faltando = [campo for campo in schema.model_fields if campo not in frame.columns]
+    if faltando:
+        raise ErroValidacao(
+            f"{schema.__name__}: colunas faltando {faltando}. Colunas atuais: {frame.columns.tolist()}"
+        )
+
+    colunas = {}
+    for campo, info in schema.model_fields.items():
+        serie = frame[campo]
+        tipo = info.annotation
+
+        if tipo in (int, float):
+            numerica = pd.to_numeric(serie, errors="coerce")
+            invalida = numerica.isna()
+            if tipo is int:
+                invalida |= numerica.notna() & (numerica % 1 != 0)
+            if invalida.any():
+                raise ErroValidacao(
+                    f"{schema.__name__}.{campo}: {int(invalida.sum())} valor(es) inválido(s) para "
+                    f"{tipo.__name__}. Exemplos: {_linhas_exemplo(frame, invalida)}"
+                )
+            colunas[campo] = numerica.astype("int64" if tipo is int else "float64")
+
+        elif tipo is str:
+            invalida = serie.isna()
+            if invalida.any():
+                raise ErroValidacao(
+                    f"{schema.__name__}.{campo}: {int(invalida.sum())} valor(es) nulo(s). "
+                    f"Exemplos: {_linhas_exemplo(frame, invalida)}"
+                )
+            colunas[campo] = serie.astype(str)
+
+        else:
+            colunas[campo] = serie
+
+    return pd.DataFrame(colunas, index=frame.index)
@@ -0,0 +1,133 @@
+# app/core/workers.py
+
+import asyncio
+import os
+import statistics
+import threading
+import time
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Optional, Tuple
+
+from fastapi import HTTPException
+
+# ─── Pool de trabalho da camada CRUD (via ambiente) ────────────────────────────
+WORKERS_THREADS = int(os.environ.get("WORKERS_THREADS", "4"))        # parsing, normalização, JSON, gzip
+WORKERS_PROCESSOS = int(os.environ.get("WORKERS_PROCESSOS", "0"))    # transformações pesadas; 0 = usa as threads
+WORKERS_FILA = int(os.environ.get("WORKERS_FILA", "64"))             # tarefas esperando além das em execução
+WORKERS_AMOSTRAS = int(os.environ.get("WORKERS_AMOSTRAS", "1024"))   # esperas guardadas para os percentis
+# ────────────────────────────────────────────────────────────────────────────────
+
+
+class PoolCheio(HTTPException):
+    """Fila do pool cheia: a requisição é recusada na hora (503 + Retry-After) em vez de acumular."""
+
+    def __init__(self):
+        super().__init__(
+            status_code=503,
+            detail="Servidor ocupado: fila de processamento cheia, tente novamente.",
+            headers={"Retry-After": "1"},
+        )
+
+
+def _cronometrado(funcao: Callable, args: tuple) -> Tuple[float, Any]:
+    """Roda no trabalhador: devolve (instante em que começou, resultado). Módulo-level para ser piclável."""
+    return time.time(), funcao(*args)
+
+
+class PoolTrabalho:
+    """
+    Tira do event loop o trabalho de CPU e de I/O bloqueante da camada CRUD
+    (leitura/normalização de CSV, validação, melt, to_json, gzip), para que
+    uma requisição pesada não segure as baratas do mesmo worker do uvicorn:
+      • executar(f, *args)                → thread pool ('threads' threads);
+      • executar(f, *args, processo=True) → process pool, se 'processos' > 0
+        (f e args precisam ser picláveis); senão, as mesmas threads;
+      • fila limitada: com 'fila' tarefas já esperando, novas são recusadas
+        (PoolCheio → 503), em vez de a latência crescer sem limite;
+      • métricas(): profundidade da fila (atual e pico) e tempo de espera
+        até começar a executar (p50/p95/máx.).
+    Os executores são criados sob demanda e valem para qualquer event loop.
+    """
+
+    def __init__(self, threads: int, processos: int, fila: int, amostras: int = WORKERS_AMOSTRAS):
+        self.threads = max(1, threads)
+        self.processos = max(0, processos)
+        self.fila = max(0, fila)
+        self._thread_pool: Optional[ThreadPoolExecutor] = None
+        self._process_pool: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._pendentes = {"threads": 0, "processos": 0}
+        self._pico_fila = 0
+        self._concluidas = 0
+        self._rejeitadas = 0
+        self._esperas: deque = deque(maxlen=amostras)
+
+    def _executor(self, processo: bool) -> Tuple[str, Executor, int]:
+        with self._lock:
+            if processo and self.processos > 0:
+                if self._process_pool is None:
+                    self._process_pool = ProcessPoolExecutor(max_workers=self.processos)
+                return "processos", self._process_pool, self.processos
+            if self._thread_pool is None:
+                self._thread_pool = ThreadPoolExecutor(max_workers=self.threads, thread_name_prefix="crud")
+            return "threads", self._thread_pool, self.threads
+
+    async def executar(self, funcao: Callable, *args, processo: bool = False) -> Any:
+        tipo, executor, trabalhadores = self._executor(processo)
+        with self._lock:
+            if self._pendentes[tipo] >= trabalhadores + self.fila:
+                self._rejeitadas += 1
+                raise PoolCheio()
+            self._pendentes[tipo] += 1
+            self._pico_fila = max(self._pico_fila, self._pendentes[tipo] - trabalhadores)
+
+        enviado = time.time()
+        try:
+            inicio, resultado = await asyncio.get_running_loop().run_in_executor(
+                executor, _cronometrado, funcao, args
+            )
+        finally:
+            with self._lock:
+                self._pendentes[tipo] -= 1
+        with self._lock:
+            self._concluidas += 1
+            self._esperas.append(max(0.0, inicio - enviado))
+        return resultado
+
+    def metricas(self) -> dict:
+        with self._lock:
+            esperas = sorted(self._esperas)
+            fila = sum(
+                max(0, pendentes - (self.threads if tipo == "threads" else self.processos))
+                for tipo, pendentes in self._pendentes.items()
+            )
+            metricas = {
+                "threads": self.threads,
+                "processos": self.processos,
+                "fila_max": self.fila,
+                "em_execucao_ou_fila": sum(self._pendentes.values()),
+                "fila": fila,
+                "pico_fila": self._pico_fila,
+                "concluidas": self._concluidas,
+                "rejeitadas": self._rejeitadas,
+            }
+        if esperas:
+            metricas["espera_ms"] = {
+                "p50": round(statistics.median(esperas) * 1000, 3),
+                "p95": round(esperas[min(len(esperas) - 1, int(len(esperas) * 0.95))] * 1000, 3),
+                "max": round(esperas[-1] * 1000, 3),
+            }
+        return metricas
+
+    def encerrar(self) -> None:
+        """Chamado no encerramento do lifespan."""
+        with self._lock:
+            pools, self._thread_pool, self._process_pool = (self._thread_pool, self._process_pool), None, None
+        for pool in pools:
+            if pool is not None:
+                pool.shutdown(wait=False, cancel_futures=True)
+
+
+# Instância única, compartilhada pelos módulos CRUD, STORE, LIVE_CACHE e rotas
+WORKERS = PoolTrabalho(WORKERS_THREADS, WORKERS_PROCESSOS, WORKERS_FILA)
@@ -1,86 +1,27 @@
 # app/crud/comercializacao.py
 
 import os
-from typing import List, Optional
+from typing import Optional
 
 import pandas as pd
 from fastapi import HTTPException
-import requests
 
-URL_COMERCIALIZACAO = "http://vitibrasil.cnpuv.embrapa.br/index.php?opcao=opt_04"
+from app.core.cache import LIVE_CACHE
+from app.core.hedge import ao_vivo_ou_fallback
+from app.core.resultado import Resultado
+from app.core.singleflight import coalescer
+from app.core.store import STORE
+from app.ingestion.download import obter_longo
+from app.ingestion.paginas import obter_ano
+from app.schemas.comercializacao import Comercializacao
 
 ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
 FALLBACK_CSV = os.path.join(ROOT, "data", "comercializacao.csv")
 
 
-async def buscar_comercializacao(ano: Optional[int] = None) -> List[dict]:
-    # TENTA LIVE
-    try:
-        head = requests.head(URL_COMERCIALIZACAO, timeout=5)
-        head.raise_for_status()
-        tables = pd.read_html(URL_COMERCIALIZACAO)
-        df_live = tables[-1].copy()
-
-        def clean_col(col: str) -> str:
-            s = col.strip().lower()
-            s = (
-                s.replace("quantidade (l.)", "quantidade")
-                 .replace("quantidade (l)", "quantidade")
-                 .replace("quantidade(l.)", "quantidade")
-                 .replace("quantidade(l)", "quantidade")
-                 .replace("produto", "produto")
-                 .replace("categoria", "categoria")
-                 .replace("ano", "ano")
-            )
-            s = "".join(c if c.isalnum() or c == "_" else "_" for c in s)
-            s = "_".join(s.split())
-            return s
-
-        df_live.columns = [clean_col(c) for c in df_live.columns]
-        if "ano" not in df_live.columns:
-            import urllib.parse as upp
-            parsed = upp.urlparse(URL_COMERCIALIZACAO)
-            query = upp.parse_qs(parsed.query)
-            try:
-                extracted = int(query.get("ano", [0])[0])
-            except:
-                extracted = 0
-            df_live["ano"] = extracted
-
-        obrig = {"ano", "categoria", "produto", "quantidade"}
-        if not obrig.issubset(set(df_live.columns)):
-            raise Exception("Colunas obrigatórias não encontradas no live.")
-
-        df_live["quantidade"] = (
-            df_live["quantidade"]
-            .astype(str)
-            .str.replace(r"[^\d\,\.]", "", regex=True)
-            .str.replace(",", ".", regex=False)
-            .str.replace(r"\.", "", regex=True)
-            .replace("", "0")
-            .astype(float)
-        )
-
-        if ano is not None:
-            df_live = df_live[df_live["ano"] == ano]
-
-        return df_live.to_dict(orient="records")
-
-    except Exception:
-        pass
-
-    # ------------------------------------------------------------
-    # Fallback-only CSV
-    # ------------------------------------------------------------
-    if not os.path.exists(FALLBACK_CSV):
-        raise HTTPException(503, f"CSV de fallback não encontrado: {FALLBACK_CSV}")
-
-    try:
-        df_fb = pd.read_csv(FALLBACK_CSV)
-    except Exception as e:
-        raise HTTPException(500, f"Erro ao ler CSV de fallback: {e}")
-
-    df_fb.rename(
+def _normalizar_fallback(df_fb: pd.DataFrame) -> pd.DataFrame:
+    # Executado uma vez por carga do data/comercializacao.csv no STORE
+    df_fb = df_fb.rename(
         columns={
             "Ano": "ano",
             "Categoria": "categoria",
@@ -88,7 +29,6 @@ async def buscar_comercializacao(ano: Optional[int] = None) -> List[dict]:
             "Quantidade(L.)": "quantidade",
             "Quantidade(L)": "quantidade",
         },
-        inplace=True,
         errors="ignore"
     )
 
@@ -106,9 +46,6 @@ async def buscar_comercializacao(ano: Optional[int] = None) -> List[dict]:
     if "ano" in df_fb.columns:
         df_fb["ano"] = df_fb["ano"].astype(int)
 
-    if ano is not None and "ano" in df_fb.columns:
-        df_fb = df_fb[df_fb["ano"] == ano]
-
     obrig = {"ano", "categoria", "produto", "quantidade"}
     if not obrig.issubset(df_fb.columns):
         raise HTTPException(
@@ -116,4 +53,29 @@ async def buscar_comercializacao(ano: Optional[int] = None) -> List[dict]:
             detail=f"Colunas obrigatórias faltando após mapeamento. Colunas atuais: {df_fb.columns.tolist()}"
         )
 
-    return df_fb.to_dict(orient="records")
+    return df_fb
+
+
+STORE.registrar("comercializacao", FALLBACK_CSV, _normalizar_fallback, Comercializacao)
+
+
+async def _buscar_live(ano: Optional[int] = None) -> pd.DataFrame:
+    """
+    Scraping ao vivo (levanta exceção em qualquer falha, inclusive página sem
+    tabela), no mesmo formato do CSV de fallback.
+    Sem 'ano', baixa o CSV “largo” Comercio.csv (todos os anos); com 'ano',
+    lê a tabela da página do ano no pool de trabalho (app/ingestion/paginas.py).
+    """
+    if ano is None:
+        return await obter_longo("comercializacao", normalizar=_normalizar_fallback)
+    return await obter_ano("comercializacao", ano, normalizar=_normalizar_fallback)
+
+
+@coalescer("comercializacao")
+async def buscar_comercializacao(ano: Optional[int] = None) -> Resultado:
+    # TENTA LIVE; fallback CSV (normalizado uma vez e mantido em memória) se
+    # falhar ou passar de metade do orçamento de latência
+    return await ao_vivo_ou_fallback(
+        "comercializacao", ano,
+        lambda: LIVE_CACHE.obter(("comercializacao", ano), lambda: _buscar_live(ano), Comercializacao),
+    )
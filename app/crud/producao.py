@@ -1,184 +1,33 @@
 # app/crud/producao.py
 
 import os
-from typing import List, Optional
+from typing import Optional
 
 import pandas as pd
 from fastapi import HTTPException
-import requests
 import asyncio
-import datetime
-from bs4 import BeautifulSoup
-import io
 
+from app.core.cache import LIVE_CACHE
+from app.core.hedge import ao_vivo_ou_fallback
+from app.core.resultado import Resultado
+from app.core.singleflight import coalescer
+from app.core.store import STORE
+from app.ingestion.download import obter_longo
+from app.ingestion.paginas import obter_ano
+from app.schemas.producao import Producao
 
-# URL para tentar live‐scraping
-URL_PRODUCAO = "http://vitibrasil.cnpuv.embrapa.br/index.php?opcao=opt_02"
 
 # Caminho absoluto para o CSV de fallback
 ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
 FALLBACK_CSV = os.path.join(ROOT, "data", "producao.csv")
 
-def extrair_categoria(control):
-    # Categorias principais (linhas que não começam com prefixo)
-    if not any(control.startswith(prefix) for prefix in ['vm_', 'vv_', 'su_', 'de_']):
-        return control
-    # Subcategorias de VINHO DE MESA
-    elif control.startswith('vm_'):
-        return 'VINHO DE MESA'
-    # Subcategorias de VINHO FINO (VINIFERA)
-    elif control.startswith('vv_'):
-        return 'VINHO FINO DE MESA (VINIFERA)'
-    # Subcategorias de SUCO
-    elif control.startswith('su_'):
-        return 'SUCO'
-    # Subcategorias de DERIVADOS
-    elif control.startswith('de_'):
-        return 'DERIVADOS'
-    else:
-        return '-'
-
-async def buscar_producao(ano: Optional[int] = None) -> List[dict]:
+def _normalizar_fallback(df_fb: pd.DataFrame) -> pd.DataFrame:
     """
-    1) Tenta ler via pandas.read_html (live scraping).
-    2) Se algo falhar, cai no CSV de fallback (data/producao.csv).
-    3) Normaliza colunas para: ano (int), categoria (str), produto (str), quantidade (float).
-    4) Filtra por ano (se fornecido) e devolve List[dict].
+    Normaliza o CSV cru de data/producao.csv (executado uma vez por carga no STORE):
+    colunas ano (int), categoria (str), produto (str), quantidade (float).
     """
-
-    # ─── 1) TENTATIVA DE LIVE‐SCRAPING ─────────────────────────────────────────────
-    try:
-                    
-        # if ano is not None:
-        if ano is None:
-
-            #Fazer o download do CSV do link: http://vitibrasil.cnpuv.embrapa.br/download/Producao.csv
-            url_csv = 'http://vitibrasil.cnpuv.embrapa.br/download/Producao.csv'
-            response = requests.get(url_csv, timeout=5)
-            response.raise_for_status()
-            
-            # Pegar os CSV disponível no site
-            df = pd.read_csv(io.StringIO(response.content.decode('utf-8')), sep=';')
-                    
-            # Passo 1: Identificar as colunas de anos
-            anos = [str(ano) for ano in range(1970, datetime.datetime.now().year-1)]  # Pegar sempre o ano anterior ao atual
-
-            # Passo 2: Derreter (melt) o DataFrame
-            df_transformado = df.melt(
-                id_vars=['control', 'produto'],
-                value_vars=anos,
-                var_name='Ano',
-                value_name='Quantidade'
-            )
-
-            df_transformado['Categoria'] = df_transformado['control'].apply(extrair_categoria)
-            df_transformado['Subcategoria'] = df_transformado.apply(
-                lambda x: '' if x['control'] == x['produto'] else x['produto'],
-                axis=1
-            )
-
-            #Excluir a coluna produto
-            df_transformado.drop(columns=['produto'], inplace=True)
-
-            #Renomear as colunas para ano, categoria, produto e quantidade
-            df_transformado = df_transformado.rename(
-                columns={
-                    'Ano': 'ano',
-                    'Categoria': 'categoria',
-                    'Subcategoria': 'produto',
-                    'Quantidade': 'quantidade'
-                }
-            )
-
-            #Verificar na coluna produto se é vazio, se for, colocar "-"
-            df_transformado['produto'] = df_transformado['produto'].replace('', '-')
-
-            df_final = df_transformado[['ano', 'categoria', 'produto', 'quantidade']]
-            df_final = df_final.sort_values(['ano', 'categoria', 'produto'])
-            df_final = df_final.reset_index(drop=True)
-            
-            # Visualizar resultado
-            return df_final.to_dict(orient="records")            
-
-        #Se tem o parâmetro de ANO
-        else:
-            url = "http://vitibrasil.cnpuv.embrapa.br/index.php?opcao=opt_02&ano="
-            CLASSE_TABELA = {'class': 'tb_base tb_dados'}
-
-            url = f"{url}{ano}"
-            response = requests.get(url)
-            response.raise_for_status()
-            dados_ano = []
-
-            #Fazer ir pro Exception se não conseguir pegar os dados    
-            if response.status_code == 200:                
-                soup = BeautifulSoup(response.text, 'html.parser')
-                tabela = soup.find('table', CLASSE_TABELA)
-
-                if not tabela:
-                    print(f"[{ano}] Tabela não encontrada.")
-                    return []
-
-                linhas = tabela.find_all('tr')
-                categoria_atual = None
-
-                for linha in linhas:
-                    colunas = linha.find_all('td')
-                    if not colunas:
-                        continue
-
-                    primeira_coluna = colunas[0]
-
-                    if 'tb_item' in primeira_coluna.get('class', []):
-                        categoria_atual = primeira_coluna.text.strip()
-                        quantidade = [col.text.strip() for col in colunas[1:]]
-
-                        dados_ano.append([
-                            ano,
-                            categoria_atual,
-                            "-",
-                            int(quantidade[0].replace('.','')) if quantidade[0] != '-' else 0
-                        ])
-                    elif 'tb_subitem' in primeira_coluna.get('class', []):
-                        produto = primeira_coluna.text.strip()
-                        quantidade = [col.text.strip() for col in colunas[1:]]
-
-                        dados_ano.append([
-                            ano,
-                            categoria_atual,
-                            produto,
-                            int(quantidade[0].replace('.','')) if quantidade[0] != '-' else 0
-                        ])
-            else:
-                print("Não conseguiu pegar os dados")
-                
-            df_final_from_year = pd.DataFrame(dados_ano, columns=['ano', 'categoria', 'produto', 'quantidade'])
-            return df_final_from_year.to_dict(orient="records")          
-
-    except Exception as e:
-        # Se qualquer erro ocorrer no bloco live, vamos ao fallback abaixo.
-        print("Live scraping falhou, usando fallback CSV.")
-        print(f"Erro: {e}")
-        pass
-
-
-    # ─── 2) FALLBACK‐ONLY (CSV local) ────────────────────────────────────────────────
-    if not os.path.exists(FALLBACK_CSV):
-        raise HTTPException(
-            status_code=503,
-            detail=f"CSV de fallback não encontrado em: {FALLBACK_CSV}"
-        )
-
-    try:
-        df_fb = pd.read_csv(FALLBACK_CSV)
-    except Exception as e:
-        raise HTTPException(
-            status_code=500,
-            detail=f"Erro ao ler o CSV de fallback: {e}"
-        )
-
-    # 2.1) Renomeia colunas para o padrão: ano, categoria, produto, quantidade
-    df_fb.rename(
+    # 1) Renomeia colunas para o padrão: ano, categoria, produto, quantidade
+    df_fb = df_fb.rename(
         columns={
             "Ano": "ano",
             "Categoria": "categoria",
@@ -187,11 +36,10 @@ async def buscar_producao(ano: Optional[int] = None) -> List[dict]:
             "Quantidade(L)": "quantidade",
             "Quantidade_L_": "quantidade",
         },
-        inplace=True,
         errors="ignore"
     )
 
-    # 2.2) Converte a coluna “quantidade” (que veio como "217.208.604" etc.) para float
+    # 2) Converte a coluna “quantidade” (que veio como "217.208.604" etc.) para float
     if "quantidade" in df_fb.columns:
         df_fb["quantidade"] = (
             df_fb["quantidade"]
@@ -206,30 +54,62 @@ async def buscar_producao(ano: Optional[int] = None) -> List[dict]:
             .astype(float)
         )
 
-    # 2.3) Converte “ano” para int
+    # 3) Converte “ano” para int
     if "ano" in df_fb.columns:
         df_fb["ano"] = df_fb["ano"].astype(int)
 
-    # 2.4) Filtra por ano, se veio como parametro
-    if ano is not None and "ano" in df_fb.columns:
-        df_fb = df_fb[df_fb["ano"] == ano]
-
-    # 2.5) Verifica novamente se todas as colunas obrigatórias estão lá
+    # 4) Verifica se todas as colunas obrigatórias estão lá
     obrig = {"ano", "categoria", "produto", "quantidade"}
     if not obrig.issubset(df_fb.columns):
         raise HTTPException(
             status_code=500,
             detail=f"Colunas obrigatórias faltando após mapeamento. Colunas atuais: {df_fb.columns.tolist()}"
         )
-    
 
-    return df_fb.to_dict(orient="records")
+    return df_fb
+
+
+STORE.registrar("producao", FALLBACK_CSV, _normalizar_fallback, Producao)
+
+
+async def _buscar_live(ano: Optional[int] = None) -> pd.DataFrame:
+    """
+    Scraping ao vivo (levanta exceção em qualquer falha, inclusive página sem
+    tabela), no mesmo formato do CSV de fallback:
+      • sem 'ano': baixa o CSV “largo” Producao.csv e derrete (melt) para o formato longo
+        (app/ingestion/download.py);
+      • com 'ano': lê a tabela da página do ano (app/ingestion/paginas.py).
+    """
+    if ano is None:
+        # Um único download (Producao.csv “largo”, todos os anos) → formato longo do CSV de fallback
+        return await obter_longo("producao", normalizar=_normalizar_fallback)
+    return await obter_ano("producao", ano, normalizar=_normalizar_fallback)
+
+
+@coalescer("producao")
+async def buscar_producao(ano: Optional[int] = None) -> Resultado:
+    """
+    1) Tenta ler ao vivo (cliente HTTP assíncrono compartilhado, sem bloquear o event loop),
+       passando pelo LIVE_CACHE (stale-while-revalidate por (recurso, ano)).
+    2) Se algo falhar — ou se o ao vivo estourar metade do orçamento de latência
+       e o fallback responder antes —, usa o CSV de fallback (data/producao.csv).
+    3) Normaliza colunas para: ano (int), categoria (str), produto (str), quantidade (float).
+    4) Filtra por ano (se fornecido) e devolve um Resultado (frame + fonte: fresh/stale/fallback).
+    """
+
+    # ─── 1) LIVE‐SCRAPING × FALLBACK (CSV já normalizado em memória) ───────────────
+    # Sob o orçamento de latência do recurso: passada a metade sem resposta ao
+    # vivo, o fallback entra na disputa (app/core/hedge.py)
+    return await ao_vivo_ou_fallback(
+        "producao", ano,
+        lambda: LIVE_CACHE.obter(("producao", ano), lambda: _buscar_live(ano), Producao),
+    )
 
 if __name__ == "__main__":
     # Teste rápido para verificar se o fallback funciona
     try:
         producao = asyncio.run(buscar_producao(ano=2023))
-        print(producao)
+        print(producao.fonte, producao.registros())
     except HTTPException as e:
         print(f"Erro: {e.detail}")
     except Exception as e:
@@ -0,0 +1,182 @@
+# app/ingestion/crawler.py
+
+import asyncio
+import os
+import random
+import statistics
+import time
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional
+from urllib.parse import urlparse
+
+import httpx
+
+# ─── Configurações do crawler (via ambiente) ───────────────────────────────────
+CRAWLER_CONCORRENCIA = int(os.environ.get("CRAWLER_CONCORRENCIA", "8"))   # requisições simultâneas
+CRAWLER_TAXA = float(os.environ.get("CRAWLER_TAXA", "4"))                 # requisições/s por host
+CRAWLER_RAJADA = int(os.environ.get("CRAWLER_RAJADA", "4"))               # capacidade do token bucket
+CRAWLER_TENTATIVAS = int(os.environ.get("CRAWLER_TENTATIVAS", "4"))
+CRAWLER_BACKOFF = float(os.environ.get("CRAWLER_BACKOFF", "1"))           # espera base (s) entre tentativas
+CRAWLER_TIMEOUT = float(os.environ.get("CRAWLER_TIMEOUT", "30"))
+# ────────────────────────────────────────────────────────────────────────────────
+
+# Status que valem nova tentativa (servidor sobrecarregado / instável)
+STATUS_RETENTAVEIS = {429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    """
+    Limite de taxa: 'taxa' fichas por segundo, acumulando até 'capacidade'
+    (rajada). Cada requisição consome uma ficha; sem ficha, espera a próxima.
+    """
+
+    def __init__(self, taxa: float, capacidade: int):
+        self.taxa = taxa
+        self.capacidade = max(1, capacidade)
+        self._fichas = float(self.capacidade)
+        self._ultimo = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def aguardar(self) -> None:
+        async with self._lock:
+            while True:
+                agora = time.monotonic()
+                self._fichas = min(self.capacidade, self._fichas + (agora - self._ultimo) * self.taxa)
+                self._ultimo = agora
+                if self._fichas >= 1:
+                    self._fichas -= 1
+                    return
+                await asyncio.sleep((1 - self._fichas) / self.taxa)
+
+
+@dataclass(frozen=True)
+class EstatisticaPagina:
+    """Tempo e resultado de uma página (somando todas as tentativas)."""
+    url: str
+    status: Optional[int]
+    tentativas: int
+    segundos: float
+    bytes: int
+    erro: Optional[str] = None
+
+
+class Crawler:
+    """
+    Baixa muitas páginas em paralelo, com educação:
+      • no máximo 'concorrencia' requisições ao mesmo tempo;
+      • token bucket por host (taxa_por_host, ou taxa_padrao para os demais);
+      • novas tentativas com backoff exponencial (+ jitter) em erros de rede,
+        timeouts e status 429/5xx — respeitando Retry-After quando vier;
+      • estatística de tempo por página (resumo()).
+
+    Uso:
+        async with Crawler() as crawler:
+            resposta = await crawler.baixar(url)   # None se esgotar as tentativas
+    """
+
+    def __init__(
+        self,
+        concorrencia: int = CRAWLER_CONCORRENCIA,
+        taxa_padrao: float = CRAWLER_TAXA,
+        taxa_por_host: Optional[Dict[str, float]] = None,
+        rajada: int = CRAWLER_RAJADA,
+        tentativas: int = CRAWLER_TENTATIVAS,
+        backoff: float = CRAWLER_BACKOFF,
+        timeout: float = CRAWLER_TIMEOUT,
+        cliente: Optional[httpx.AsyncClient] = None,
+    ):
+        self.concorrencia = concorrencia
+        self.taxa_padrao = taxa_padrao
+        self.taxa_por_host = dict(taxa_por_host or {})
+        self.rajada = rajada
+        self.tentativas = max(1, tentativas)
+        self.backoff = backoff
+        self.timeout = timeout
+        self.estatisticas: List[EstatisticaPagina] = []
+        self._cliente = cliente
+        self._cliente_proprio = cliente is None
+        self._semaforo = asyncio.Semaphore(concorrencia)
+        self._buckets: Dict[str, TokenBucket] = {}
+
+    async def __aenter__(self) -> "Crawler":
+        if self._cliente is None:
+            self._cliente = httpx.AsyncClient(
+                timeout=httpx.Timeout(self.timeout),
+                limits=httpx.Limits(max_connections=self.concorrencia),
+                follow_redirects=True,
+            )
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        if self._cliente_proprio and self._cliente is not None:
+            await self._cliente.aclose()
+            self._cliente = None
+
+    def _bucket(self, url: str) -> TokenBucket:
+        host = urlparse(url).netloc
+        if host not in self._buckets:
+            taxa = self.taxa_por_host.get(host, self.taxa_padrao)
+            self._buckets[host] = TokenBucket(taxa, self.rajada)
+        return self._buckets[host]
+
+    def _espera(self, tentativa: int, resposta: Optional[httpx.Response]) -> float:
+        if resposta is not None:
+            retry_after = resposta.headers.get("Retry-After", "")
+            if retry_after.isdigit():
+                return float(retry_after)
+        base = self.backoff * (2 ** (tentativa - 1))
+        return base + random.uniform(0, base / 2)
+
+    async def baixar(self, url: str, headers: Optional[Dict[str, str]] = None) -> Optional[httpx.Response]:
+        """
+        GET com concorrência limitada, taxa por host e novas tentativas.
+        Devolve a resposta final (qualquer status não retentável, ex.: 200, 304, 404)
+        ou None se todas as tentativas falharem.
+        """
+        inicio = time.perf_counter()
+        resposta: Optional[httpx.Response] = None
+        erro: Optional[str] = None
+        tentativa = 0
+        for tentativa in range(1, self.tentativas + 1):
+            resposta, erro = None, None
+            await self._bucket(url).aguardar()
+            try:
+                async with self._semaforo:
+                    resposta = await self._cliente.get(url, headers=headers)
+                if resposta.status_code not in STATUS_RETENTAVEIS:
+                    break
+                erro = f"HTTP {resposta.status_code}"
+            except httpx.HTTPError as e:
+                erro = f"{type(e).__name__}: {e}"
+            if tentativa < self.tentativas:
+                await asyncio.sleep(self._espera(tentativa, resposta))
+
+        final = resposta if erro is None else None
+        self.estatisticas.append(EstatisticaPagina(
+            url=url,
+            status=resposta.status_code if resposta is not None else None,
+            tentativas=tentativa,
+            segundos=time.perf_counter() - inicio,
+            bytes=len(resposta.content) if final is not None else 0,
+            erro=erro,
+        ))
+        return final
+
+    async def baixar_todos(self, urls: Iterable[str]) -> List[Optional[httpx.Response]]:
+        """Baixa todas as URLs (na ordem recebida) respeitando os limites do crawler."""
+        return await asyncio.gather(*(self.baixar(url) for url in urls))
+
+    def resumo(self) -> dict:
+        """Totais e percentis de tempo por página (s)."""
+        tempos = sorted(e.segundos for e in self.estatisticas)
+        if not tempos:
+            return {"paginas": 0}
+        return {
+            "paginas": len(tempos),
+            "erros": sum(1 for e in self.estatisticas if e.erro is not None),
+            "novas_tentativas": sum(e.tentativas - 1 for e in self.estatisticas),
+            "bytes": sum(e.bytes for e in self.estatisticas),
+            "p50": round(statistics.median(tempos), 3),
+            "p95": round(tempos[min(len(tempos) - 1, int(len(tempos) * 0.95))], 3),
+            "max": round(tempos[-1], 3),
+        }
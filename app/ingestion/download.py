@@ -0,0 +1,220 @@
+# app/ingestion/download.py
+
+import asyncio
+import io
+import os
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+import pandas as pd
+
+from app.core.workers import WORKERS
+
+# Onde estão os CSVs “largos” (um por recurso/subopção, todos os anos em colunas):
+# a área de download do site ou, para uso offline/testes, uma pasta local com os mesmos arquivos
+DOWNLOAD_FONTE = os.environ.get("DOWNLOAD_FONTE", "http://vitibrasil.cnpuv.embrapa.br/download/")
+
+# Colunas dos CSVs longos de data/ (as mesmas da raspagem página a página)
+COLUNAS_CSV = {
+    "producao": ['Ano', 'Categoria', 'Produto', 'Quantidade(L.)'],
+    "processamento": ['Opção', 'Ano', 'Categoria', 'Cultivar', 'Quantidade(Kg.)'],
+    "comercializacao": ['Ano', 'Categoria', 'Produto', 'Quantidade(L)'],
+    "importacao": ['Opção', 'Ano', 'Países', 'Quantidade(Kg.)', 'Valor (US$)'],
+    "exportacao": ['Opção', 'Ano', 'Países', 'Quantidade(Kg.)', 'Valor (US$)'],
+}
+
+# Arquivos largos de cada recurso: (descrição da subopção ou None, arquivo)
+ARQUIVOS_LARGOS: Dict[str, List[Tuple[Optional[str], str]]] = {
+    "producao": [(None, "Producao.csv")],
+    "processamento": [
+        ("Viniferas", "ProcessaViniferas.csv"),
+        ("Americanas e hibridas", "ProcessaAmericanas.csv"),
+        ("Uvas de mesa", "ProcessaMesa.csv"),
+        ("Sem classificação", "ProcessaSemclass.csv"),
+    ],
+    "comercializacao": [(None, "Comercio.csv")],
+    "importacao": [
+        ("Vinhos de mesa", "ImpVinhos.csv"),
+        ("Espumantes", "ImpEspumantes.csv"),
+        ("Uvas frescas", "ImpFrescas.csv"),
+        ("Uvas passas", "ImpPassas.csv"),
+        ("Suco de uva", "ImpSuco.csv"),
+    ],
+    "exportacao": [
+        ("Vinhos de mesa", "ExpVinho.csv"),
+        ("Espumantes", "ExpEspumantes.csv"),
+        ("Uvas frescas", "ExpUva.csv"),
+        ("Suco de uva", "ExpSuco.csv"),
+    ],
+}
+
+# Recursos com tabela país / quantidade / valor (cada ano ocupa duas colunas)
+RECURSOS_PAISES = ("importacao", "exportacao")
+
+# Linhas de item trazem o código da categoria no 'control' (ex.: "vm_Tinto");
+# as de categoria trazem o próprio nome (ex.: "VINHO DE MESA")
+PADRAO_ITEM = r"^[a-z]+_"
+
+
+def ler_largo(conteudo: bytes) -> Tuple[List[str], pd.DataFrame]:
+    """
+    Lê um CSV largo do site, tudo como texto: devolve o cabeçalho (sem
+    renomear os anos repetidos de importação/exportação) e as linhas, com
+    colunas posicionais. O separador varia entre os arquivos (';' ou TAB).
+    """
+    try:
+        texto = conteudo.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        texto = conteudo.decode("latin-1")
+    primeira = texto.split("\n", 1)[0]
+    sep = "\t" if primeira.count("\t") > primeira.count(";") else ";"
+    frame = pd.read_csv(io.StringIO(texto), sep=sep, header=None, dtype=str, keep_default_na=False)
+    cabecalho = frame.iloc[0].str.strip().tolist()
+    return cabecalho, frame.iloc[1:].reset_index(drop=True)
+
+
+def _numeros(serie: pd.Series) -> pd.Series:
+    return pd.to_numeric(serie.str.strip(), errors="coerce")
+
+
+def _formatar(numeros: pd.Series) -> pd.Series:
+    """Números como nas páginas do site ("1.234.567"); vazio ou não numérico → "-"."""
+    return numeros.map("{:,.0f}".format, na_action="ignore").str.replace(",", ".", regex=False).fillna("-")
+
+
+def _posicoes_anos(cabecalho: List[str]) -> List[int]:
+    return [i for i, coluna in enumerate(cabecalho) if coluna.isdigit()]
+
+
+def derreter_hierarquia(cabecalho: List[str], largo: pd.DataFrame) -> pd.DataFrame:
+    """
+    Largo (id, control, nome, <anos>...) → longo (Ano, Categoria, Produto, Quantidade),
+    ano a ano, na ordem do arquivo. Categoria = nome da última linha de categoria
+    (forward-fill); Produto = "-" na linha da própria categoria.
+    """
+    posicoes = _posicoes_anos(cabecalho)
+    descritivas = [i for i in range(len(cabecalho)) if i not in posicoes]
+    nomes = {i: cabecalho[i].lower() for i in descritivas}
+    nome = next(i for i in descritivas if nomes[i] not in ("id", "control"))
+    controle = next((i for i in descritivas if nomes[i] == "control"), None)
+
+    texto = largo[nome].str.strip()
+    if controle is not None:
+        item = largo[controle].str.strip().str.contains(PADRAO_ITEM, regex=True)
+    else:
+        # Sem 'control': as categorias vêm em caixa alta
+        item = texto != texto.str.upper()
+
+    base = pd.DataFrame({
+        "Categoria": texto.where(~item).ffill(),
+        "Produto": texto.where(item, "-"),
+    })
+    valores = largo[posicoes].set_axis([cabecalho[i] for i in posicoes], axis=1)
+    longo = pd.concat([base, valores], axis=1).melt(
+        id_vars=["Categoria", "Produto"], var_name="Ano", value_name="Quantidade"
+    )
+    # As páginas mostram "-" no lugar de zero
+    quantidade = _numeros(longo["Quantidade"])
+    longo["Quantidade"] = _formatar(quantidade.mask(quantidade == 0))
+    return longo[["Ano", "Categoria", "Produto", "Quantidade"]]
+
+
+def derreter_paises(cabecalho: List[str], largo: pd.DataFrame) -> pd.DataFrame:
+    """
+    Largo (id, país, <ano>, <ano>, ...) — cada ano em duas colunas, quantidade
+    e valor — → longo (Ano, Países, Quantidade, Valor), ano a ano, com a linha
+    "Total" de cada ano ao final (como no rodapé das páginas).
+    """
+    posicoes = _posicoes_anos(cabecalho)
+    quantidades, valores = posicoes[0::2], posicoes[1::2]
+    anos = [cabecalho[i] for i in quantidades]
+    if anos != [cabecalho[i] for i in valores]:
+        raise ValueError("Colunas de quantidade/valor desalinhadas no CSV largo.")
+    descritivas = [i for i in range(len(cabecalho)) if i not in posicoes]
+    pais = next(i for i in descritivas if cabecalho[i].lower() != "id")
+
+    def _derreter(colunas, nome):
+        bloco = largo[colunas].apply(_numeros)
+        bloco = pd.concat([largo[pais].str.strip().rename("Países"), bloco.set_axis(anos, axis=1)], axis=1)
+        return bloco.melt(id_vars=["Países"], var_name="Ano", value_name=nome)
+
+    longo = _derreter(quantidades, "Quantidade")
+    longo["Valor"] = _derreter(valores, "Valor")["Valor"].to_numpy()
+
+    totais = longo.groupby("Ano", sort=False)[["Quantidade", "Valor"]].sum(min_count=1).reset_index()
+    totais["Países"] = "Total"
+    longo = pd.concat([longo, totais], ignore_index=True)
+    # Total logo depois dos países do seu ano (ordenação estável)
+    ordem = longo["Ano"].map({ano: i for i, ano in enumerate(anos)})
+    longo = longo.iloc[ordem.argsort(kind="stable")]
+    # Países sem movimento no ano (quantidade e valor zerados) aparecem como "-" / "-" nas páginas
+    zerados = (longo["Quantidade"] == 0) & (longo["Valor"] == 0)
+    for coluna in ("Quantidade", "Valor"):
+        longo[coluna] = _formatar(longo[coluna].mask(zerados))
+    return longo[["Ano", "Países", "Quantidade", "Valor"]].reset_index(drop=True)
+
+
+def montar_longo(recurso: str, conteudos: Iterable[Tuple[Optional[str], bytes]]) -> pd.DataFrame:
+    """
+    CSVs largos de um recurso ((subopção, bytes) por arquivo) → frame longo com
+    as colunas de data/<recurso>.csv, ordenado por ano e, dentro do ano, por
+    subopção — a mesma ordem da raspagem página a página.
+    """
+    derreter = derreter_paises if recurso in RECURSOS_PAISES else derreter_hierarquia
+    partes = []
+    for opcao, conteudo in conteudos:
+        parte = derreter(*ler_largo(conteudo))
+        if opcao is not None:
+            parte.insert(0, "Opção", opcao)
+        partes.append(parte)
+    longo = pd.concat(partes, ignore_index=True)
+    longo = longo.sort_values("Ano", kind="stable", key=lambda anos: anos.astype(int))
+    longo.columns = COLUNAS_CSV[recurso]
+    return longo.reset_index(drop=True)
+
+
+def _local(fonte: str) -> bool:
+    return not fonte.startswith(("http://", "https://"))
+
+
+def _montar(
+    recurso: str,
+    conteudos: List[Tuple[Optional[str], Union[bytes, str]]],
+    normalizar: Optional[Callable[[pd.DataFrame], pd.DataFrame]],
+) -> pd.DataFrame:
+    """Roda no pool: lê os arquivos locais (conteúdo dado como caminho), derrete e normaliza."""
+    lidos = []
+    for opcao, conteudo in conteudos:
+        if isinstance(conteudo, str):
+            with open(conteudo, "rb") as f:
+                conteudo = f.read()
+        lidos.append((opcao, conteudo))
+    longo = montar_longo(recurso, lidos)
+    return normalizar(longo) if normalizar is not None else longo
+
+
+async def obter_longo(
+    recurso: str,
+    fonte: str = DOWNLOAD_FONTE,
+    baixar: Optional[Callable[[str], Awaitable]] = None,
+    normalizar: Optional[Callable[[pd.DataFrame], pd.DataFrame]] = None,
+) -> pd.DataFrame:
+    """
+    Todos os anos de 'recurso' (todas as subopções) com um download por arquivo
+    largo, em paralelo. 'fonte' é a URL base do site ou uma pasta local com os
+    mesmos arquivos; 'baixar' (url → resposta com .content) padrão é o cliente
+    HTTP compartilhado. Com 'normalizar' (ex.: o _normalizar_fallback do
+    recurso), devolve o frame já normalizado. A leitura dos arquivos locais e
+    o melt rodam no pool de trabalho (em processo, se WORKERS_PROCESSOS > 0),
+    fora do event loop. Levanta exceção em qualquer falha.
+    """
+    arquivos = ARQUIVOS_LARGOS[recurso]
+    if _local(fonte):
+        conteudos = [os.path.join(fonte, arquivo) for _, arquivo in arquivos]
+    else:
+        if baixar is None:
+            from app.core.http import baixar
+        base = fonte if fonte.endswith("/") else f"{fonte}/"
+        respostas = await asyncio.gather(*(baixar(f"{base}{arquivo}") for _, arquivo in arquivos))
+        conteudos = [resposta.content for resposta in respostas]
+    pares = list(zip((opcao for opcao, _ in arquivos), conteudos))
+    return await WORKERS.executar(_montar, recurso, pares, normalizar, processo=True)
@@ -0,0 +1,92 @@
+# app/ingestion/extracao.py
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, List, Optional, Sequence, Tuple
+
+import lxml.html
+
+# Processos para extrair páginas em lote (crawls completos); 0 ou 1 = no próprio processo
+EXTRACAO_PROCESSOS = int(os.environ.get("EXTRACAO_PROCESSOS", str(os.cpu_count() or 1)))
+
+# A tabela de dados das páginas da Embrapa: <table class="tb_base tb_dados">
+XPATH_TABELA = (
+    "//table[contains(concat(' ', normalize-space(@class), ' '), ' tb_base ')"
+    " and contains(concat(' ', normalize-space(@class), ' '), ' tb_dados ')]"
+)
+
+# (categoria, produto, valores) — produto "-" na linha da própria categoria
+LinhaHierarquia = Tuple[Optional[str], str, List[str]]
+# (país, quantidade, valor)
+LinhaPais = Tuple[str, str, str]
+
+
+def _tabela(html: str):
+    if not html or not html.strip():
+        return None
+    encontradas = lxml.html.fromstring(html).xpath(XPATH_TABELA)
+    return encontradas[0] if encontradas else None
+
+
+def _celulas(tabela) -> List[list]:
+    """Células <td> de cada <tr> da tabela (thead, tbody e tfoot), pulando linhas sem <td>."""
+    linhas = []
+    for tr in tabela.iter("tr"):
+        tds = tr.findall("td")
+        if tds:
+            linhas.append(tds)
+    return linhas
+
+
+def _texto(td) -> str:
+    return td.text_content().strip()
+
+
+def extrair_hierarquia(html: str) -> Optional[List[LinhaHierarquia]]:
+    """
+    Tabelas com hierarquia (produção, processamento, comercialização):
+    <td class="tb_item"> abre uma categoria, <td class="tb_subitem"> é um
+    produto/cultivar dela. Demais linhas (ex.: total no tfoot) são ignoradas.
+    Sem a tabela na página → None.
+    """
+    tabela = _tabela(html)
+    if tabela is None:
+        return None
+
+    linhas: List[LinhaHierarquia] = []
+    categoria_atual = None
+    for tds in _celulas(tabela):
+        classes = (tds[0].get("class") or "").split()
+        if "tb_item" in classes:
+            categoria_atual = _texto(tds[0])
+            linhas.append((categoria_atual, "-", [_texto(td) for td in tds[1:]]))
+        elif "tb_subitem" in classes:
+            linhas.append((categoria_atual, _texto(tds[0]), [_texto(td) for td in tds[1:]]))
+    return linhas
+
+
+def extrair_paises(html: str) -> Optional[List[LinhaPais]]:
+    """
+    Tabelas país / quantidade / valor (importação, exportação), incluindo a
+    linha de total do tfoot, como nos CSVs. Linhas com menos de três células
+    (ex.: um aviso num único <td colspan>) são puladas. Sem a tabela na página → None.
+    """
+    tabela = _tabela(html)
+    if tabela is None:
+        return None
+    return [(_texto(tds[0]), _texto(tds[1]), _texto(tds[2])) for tds in _celulas(tabela) if len(tds) >= 3]
+
+
+def mapear_em_processos(funcao: Callable, tarefas: Sequence[tuple], processos: int = EXTRACAO_PROCESSOS) -> list:
+    """
+    [funcao(*tarefa) for tarefa in tarefas], em um pool de 'processos' processos
+    quando compensa: a extração é CPU pura, então threads ficariam presas no GIL.
+    'funcao' e os argumentos precisam ser picláveis (funções de módulo, namedtuples).
+    """
+    if processos <= 1 or len(tarefas) < 2:
+        return [funcao(*tarefa) for tarefa in tarefas]
+    processos = min(processos, len(tarefas))
+    # Lotes grandes o bastante para diluir o custo de serializar cada página
+    lote = max(1, len(tarefas) // (processos * 4))
+    with ProcessPoolExecutor(max_workers=processos) as pool:
+        return list(pool.map(funcao, *zip(*tarefas), chunksize=lote))
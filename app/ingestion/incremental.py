@@ -0,0 +1,136 @@
+# app/ingestion/incremental.py
+
+import glob
+import hashlib
+import json
+import os
+from typing import Dict, Iterable, List, Optional
+
+import httpx
+import pandas as pd
+
+
+def chave_pagina(recurso: str, sub: Optional[str], ano: int) -> str:
+    return f"{recurso}|{sub or '-'}|{ano}"
+
+
+def _gravar_atomico(caminho: str, conteudo: bytes) -> None:
+    os.makedirs(os.path.dirname(caminho), exist_ok=True)
+    tmp = f"{caminho}.tmp-{os.getpid()}"
+    with open(tmp, "wb") as f:
+        f.write(conteudo)
+    os.replace(tmp, caminho)
+
+
+class ManifestoPaginas:
+    """
+    Manifesto (JSON) das páginas já raspadas, por (recurso, subopção, ano):
+    sha256 do corpo + ETag / Last-Modified devolvidos pelo servidor.
+      • cabecalhos(): If-None-Match / If-Modified-Since para a próxima visita;
+      • mudou(): 304, ou corpo com o mesmo sha256 → página inalterada (não re-extrai).
+    """
+
+    def __init__(self, caminho: str):
+        self.caminho = caminho
+        try:
+            with open(caminho, encoding="utf-8") as f:
+                self._entradas: Dict[str, dict] = json.load(f)
+        except (OSError, ValueError):
+            self._entradas = {}
+
+    def cabecalhos(self, recurso: str, sub: Optional[str], ano: int) -> Dict[str, str]:
+        entrada = self._entradas.get(chave_pagina(recurso, sub, ano), {})
+        cabecalhos = {}
+        if entrada.get("etag"):
+            cabecalhos["If-None-Match"] = entrada["etag"]
+        if entrada.get("last_modified"):
+            cabecalhos["If-Modified-Since"] = entrada["last_modified"]
+        return cabecalhos
+
+    def mudou(self, recurso: str, sub: Optional[str], ano: int, resposta: httpx.Response) -> bool:
+        if resposta.status_code == 304:
+            return False
+        entrada = self._entradas.get(chave_pagina(recurso, sub, ano))
+        return entrada is None or entrada["sha256"] != hashlib.sha256(resposta.content).hexdigest()
+
+    def registrar(self, recurso: str, sub: Optional[str], ano: int, resposta: httpx.Response) -> None:
+        chave = chave_pagina(recurso, sub, ano)
+        entrada = dict(self._entradas.get(chave, {}))
+        if resposta.status_code != 304:
+            entrada["sha256"] = hashlib.sha256(resposta.content).hexdigest()
+        # O servidor pode passar a mandar (ou deixar de mandar) os validadores
+        entrada["etag"] = resposta.headers.get("ETag", entrada.get("etag"))
+        entrada["last_modified"] = resposta.headers.get("Last-Modified", entrada.get("last_modified"))
+        self._entradas[chave] = entrada
+
+    def salvar(self) -> None:
+        _gravar_atomico(
+            self.caminho,
+            json.dumps(self._entradas, indent=1, sort_keys=True, ensure_ascii=False).encode("utf-8"),
+        )
+
+
+class Particoes:
+    """
+    As linhas de cada página guardadas em um CSV próprio:
+        <raiz>/<recurso>/<ano>.csv            (recursos sem subopção)
+        <raiz>/<recurso>/<ano>/<sub>.csv      (processamento, importação, exportação)
+    Uma página alterada reescreve só a sua partição; o CSV final do recurso é
+    remontado concatenando as partições (ano a ano, subopção a subopção).
+    Tudo é lido como texto, para reproduzir os valores exatamente como raspados.
+    """
+
+    def __init__(self, raiz: str):
+        self.raiz = raiz
+
+    def caminho(self, recurso: str, sub: Optional[str], ano: int) -> str:
+        if sub is None:
+            return os.path.join(self.raiz, recurso, f"{ano}.csv")
+        return os.path.join(self.raiz, recurso, str(ano), f"{sub}.csv")
+
+    def existe(self, recurso: str) -> bool:
+        return os.path.isdir(os.path.join(self.raiz, recurso))
+
+    def gravar(self, recurso: str, sub: Optional[str], ano: int, linhas: List[list], colunas: List[str]) -> None:
+        frame = pd.DataFrame(linhas, columns=colunas)
+        _gravar_atomico(
+            self.caminho(recurso, sub, ano),
+            frame.to_csv(index=False, encoding="utf-8").encode("utf-8"),
+        )
+
+    def semear(self, recurso: str, caminho_csv: str, paginas: Iterable) -> int:
+        """
+        Primeira execução: divide o CSV atual do recurso nas partições das
+        'paginas' (namedtuples com recurso, ano, sub e desc). Devolve quantas gravou.
+        """
+        frame = pd.read_csv(caminho_csv, dtype=str, keep_default_na=False)
+        chaves = ["Ano"] if "Opção" not in frame.columns else ["Opção", "Ano"]
+        grupos = {
+            chave if isinstance(chave, tuple) else (chave,): grupo
+            for chave, grupo in frame.groupby(chaves, sort=False)
+        }
+        gravadas = 0
+        for pagina in paginas:
+            chave = (str(pagina.ano),) if len(chaves) == 1 else (pagina.desc, str(pagina.ano))
+            grupo = grupos.get(chave)
+            if grupo is None:
+                continue
+            self.gravar(recurso, pagina.sub, pagina.ano, grupo.values.tolist(), frame.columns.tolist())
+            gravadas += 1
+        return gravadas
+
+    def consolidar(self, recurso: str, destino_csv: str) -> int:
+        """Remonta o CSV final do recurso a partir de todas as partições. Devolve o nº de linhas."""
+        base = os.path.join(self.raiz, recurso)
+        arquivos = glob.glob(os.path.join(base, "*.csv")) + glob.glob(os.path.join(base, "*", "*.csv"))
+
+        def ordem(caminho):
+            relativo = os.path.relpath(caminho, base).split(os.sep)
+            return (int(relativo[0].removesuffix(".csv")), relativo[-1])
+
+        frames = [pd.read_csv(a, dtype=str, keep_default_na=False) for a in sorted(arquivos, key=ordem)]
+        if not frames:
+            return 0
+        frame = pd.concat(frames, ignore_index=True)
+        _gravar_atomico(destino_csv, frame.to_csv(index=False, encoding="utf-8").encode("utf-8"))
+        return len(frame)
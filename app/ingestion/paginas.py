@@ -0,0 +1,120 @@
+# app/ingestion/paginas.py
+
+import asyncio
+import os
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from app.core.workers import WORKERS
+from app.ingestion.download import COLUNAS_CSV
+from app.ingestion.extracao import extrair_hierarquia, extrair_paises
+
+URL_BASE = "http://vitibrasil.cnpuv.embrapa.br/index.php"
+
+# Páginas de subopção baixadas ao mesmo tempo numa busca ao vivo por ano
+LIVE_CONCORRENCIA_SUBOPCOES = int(os.environ.get("LIVE_CONCORRENCIA_SUBOPCOES", "5"))
+
+# Subopções de cada recurso (código na URL → descrição, a coluna “Opção” dos CSVs)
+SUBOPCOES: Dict[str, Dict[str, str]] = {
+    "processamento": {
+        'subopt_01': 'Viniferas',
+        'subopt_02': 'Americanas e hibridas',
+        'subopt_03': 'Uvas de mesa',
+        'subopt_04': 'Sem classificação',
+    },
+    "importacao": {
+        'subopt_01': 'Vinhos de mesa',
+        'subopt_02': 'Espumantes',
+        'subopt_03': 'Uvas frescas',
+        'subopt_04': 'Uvas passas',
+        'subopt_05': 'Suco de uva',
+    },
+    "exportacao": {
+        'subopt_01': 'Vinhos de mesa',
+        'subopt_02': 'Espumantes',
+        'subopt_03': 'Uvas frescas',
+        'subopt_04': 'Suco de uva',
+    },
+}
+
+
+def url_pagina(recurso: str, ano: int, sub: Optional[str] = None) -> str:
+    """URL da página de um (recurso, ano[, subopção]) — a mesma usada pela raspagem."""
+    if recurso == "producao":
+        return f"{URL_BASE}?opcao=opt_02&ano={ano}"
+    if recurso == "comercializacao":
+        return f"{URL_BASE}?opcao=opt_04&ano={ano}"
+    if recurso == "processamento":
+        return f"{URL_BASE}?ano={ano}&opcao=opt_03&subopcao={sub}"
+    if recurso == "importacao":
+        return f"{URL_BASE}?opcao=opt_05&subopcao={sub}&ano={ano}"
+    if recurso == "exportacao":
+        return f"{URL_BASE}?opcao=opt_06&subopcao={sub}&ano={ano}"
+    raise KeyError(recurso)
+
+
+class TabelaNaoEncontrada(ValueError):
+    """A página veio, mas sem a tabela de dados (layout mudou, ano inexistente…)."""
+
+
+def linhas_da_pagina(recurso: str, ano: int, desc: Optional[str], html: str) -> List[list]:
+    """
+    Linhas de data/<recurso>.csv extraídas do HTML de uma página — o mesmo
+    mapeamento para a raspagem (data/scrape_to_csv.py) e para as buscas ao
+    vivo. Página sem tabela → TabelaNaoEncontrada (não vira zero linhas).
+    """
+    paises = recurso in ("importacao", "exportacao")
+    linhas = extrair_paises(html) if paises else extrair_hierarquia(html)
+    if linhas is None:
+        pagina = f"{ano}, {desc}" if desc else f"{ano}"
+        raise TabelaNaoEncontrada(f"Tabela não encontrada na página de {recurso} ({pagina}).")
+    if paises:
+        return [[desc, ano, pais, quantidade, valor] for pais, quantidade, valor in linhas]
+    if recurso == "processamento":
+        return [[desc, ano, categoria, cultivar, quantidade[0]] for categoria, cultivar, quantidade in linhas]
+    return [[ano, categoria, produto, quantidade[0]] for categoria, produto, quantidade in linhas]
+
+
+def _montar_ano(
+    recurso: str,
+    ano: int,
+    paginas: List[Tuple[Optional[str], str]],
+    normalizar: Optional[Callable[[pd.DataFrame], pd.DataFrame]],
+) -> pd.DataFrame:
+    linhas = [linha for desc, html in paginas for linha in linhas_da_pagina(recurso, ano, desc, html)]
+    frame = pd.DataFrame(linhas, columns=COLUNAS_CSV[recurso])
+    return normalizar(frame) if normalizar is not None else frame
+
+
+async def obter_ano(
+    recurso: str,
+    ano: int,
+    baixar: Optional[Callable[[str], Awaitable]] = None,
+    normalizar: Optional[Callable[[pd.DataFrame], pd.DataFrame]] = None,
+    concorrencia: int = LIVE_CONCORRENCIA_SUBOPCOES,
+) -> pd.DataFrame:
+    """
+    Um ano de um recurso, ao vivo: a página do ano ou, nos recursos com
+    subopções, as páginas de TODAS as subopções, baixadas ao mesmo tempo (no
+    máximo 'concorrencia' por vez) — cerca de uma ida e volta de latência, em
+    vez de uma por subopção — e juntadas no formato de data/<recurso>.csv
+    (na ordem das subopções).
+    Com 'normalizar', devolve o frame já normalizado. A extração roda no pool
+    de trabalho (em processo, se WORKERS_PROCESSOS > 0). Qualquer página com
+    erro ou sem tabela derruba a busca (dados incompletos não viram resposta
+    “ao vivo”).
+    """
+    if baixar is None:
+        from app.core.http import baixar
+    limite = asyncio.Semaphore(max(1, concorrencia))
+
+    async def _baixar(sub: Optional[str]):
+        async with limite:
+            return await baixar(url_pagina(recurso, ano, sub))
+
+    # Recursos sem subopção: uma única página (sub e descrição None)
+    subopcoes = SUBOPCOES.get(recurso, {None: None})
+    respostas = await asyncio.gather(*(_baixar(sub) for sub in subopcoes))
+    paginas = [(desc, resposta.text) for desc, resposta in zip(subopcoes.values(), respostas)]
+    return await WORKERS.executar(_montar_ano, recurso, ano, paginas, normalizar, processo=True)
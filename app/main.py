@@ -1,5 +1,6 @@
 # app/main.py
 
+from contextlib import asynccontextmanager
 from datetime import datetime, timedelta
 import os
 
@@ -8,7 +9,11 @@ from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from jose import JWTError, jwt
 
 from app.routers.recurso import router as dados_router
+from app.routers.batch import router as batch_router
 from app.routers.healthz import router as health_router
+from app.core.http import iniciar_cliente, fechar_cliente
+from app.core.health import MONITOR
+from app.core.workers import WORKERS
 
 from dotenv import load_dotenv
 
@@ -31,10 +36,24 @@ ADMIN_USERNAME = os.environ.get("ADMIN_USERNAME")
 ADMIN_PASSWORD = os.environ.get("ADMIN_PASSWORD")
 # ────────────────────────────────────────────────────────────────────────────────
 
+# ─── Ciclo de vida: cliente HTTP compartilhado + health-check em segundo plano ──
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Um único AsyncClient (pool keep-alive) reutilizado por todos os módulos CRUD
+    await iniciar_cliente()
+    # Verificação periódica das URLs “ao vivo”; /healthz/ só lê o último resultado
+    MONITOR.iniciar()
+    yield
+    await MONITOR.parar()
+    await fechar_cliente()
+    WORKERS.encerrar()
+# ────────────────────────────────────────────────────────────────────────────────
+
 app = FastAPI(
     title="API Vinicultura Embrapa",
     version="1.1.0",
-    description="Dados de vitivinicultura com health-check e autenticação JWT"
+    description="Dados de vitivinicultura com health-check e autenticação JWT",
+    lifespan=lifespan,
 )
 
 # ─── Rota de login / token ─────────────────────────────────────────────────────
@@ -80,6 +99,7 @@ app.include_router(
     tags=["monitoramento"]
 )
 # Agora, chamar GET http://127.0.0.1:8000/healthz/ retorna status=ok e detalhe, sem pedir token.
+# Também públicos: /healthz/live (liveness, sem rede) e /healthz/ready (readiness).
 
 
 # ─── 2) Endpoints de dados (protegidos por JWT) ─────────────────────────────────
@@ -91,6 +111,14 @@ app.include_router(
 )
 # Qualquer rota definida em `dados_router` estará disponível só com "Authorization: Bearer <JWT>".
 
+# POST /batch: várias consultas de dados com um único token (mesma proteção JWT)
+app.include_router(
+    batch_router,
+    dependencies=[Depends(verify_token)],
+    responses={401: {"description": "Não autorizado"}},
+    tags=["dados"]
+)
+
 # ─── 3) Rota raiz (também pública) ───────────────────────────────────────────────
 @app.get("/", tags=["raiz"], summary="Rota raiz")
 async def read_root():
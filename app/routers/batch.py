@@ -0,0 +1,136 @@
+# app/routers/batch.py
+
+import asyncio
+import json
+import os
+from typing import AsyncIterator, List, Optional
+
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+
+from app.core.cache import RESPOSTA_CACHE, RESPOSTA_GZIP_MIN_BYTES, comprimir
+from app.core.indices import Filtros
+from app.core.paginacao import serializar_pagina
+from app.core.store import STORE
+from app.core.workers import WORKERS, WORKERS_THREADS
+from app.routers.recurso import MAP_RECURSOS
+from app.schemas.batch import ConsultaBatch, PedidoBatch
+
+# ─── Limites do lote (via ambiente) ─────────────────────────────────────────────
+BATCH_MAX = int(os.environ.get("BATCH_MAX", "200"))                                  # consultas por requisição
+BATCH_CONCORRENCIA = int(os.environ.get("BATCH_CONCORRENCIA", str(WORKERS_THREADS)))  # consultas resolvidas ao mesmo tempo
+# ────────────────────────────────────────────────────────────────────────────────
+
+router = APIRouter(
+    prefix="",
+    tags=["dados"],
+)
+
+
+def _objeto(campos: dict, dados: Optional[bytes] = None) -> bytes:
+    """Envelope JSON de um resultado; 'dados' (JSON já serializado) é emendado sem reprocessar."""
+    texto = json.dumps(campos, ensure_ascii=False).encode("utf-8")
+    if dados is None:
+        return texto
+    return texto[:-1] + b', "dados": ' + dados + b"}"
+
+
+async def _resolver(indice: int, consulta: ConsultaBatch, limite: asyncio.Semaphore) -> bytes:
+    """
+    Resolve uma consulta do lote contra o STORE (dataset já carregado, sem
+    scraping) e devolve o seu objeto JSON. Erros viram o status da própria
+    consulta (ex.: 404, 400, 503) — não derrubam o lote.
+    """
+    campos = {"indice": indice, "recurso": consulta.recurso}
+    try:
+        if consulta.recurso not in MAP_RECURSOS:
+            raise HTTPException(status_code=404, detail="Recurso não encontrado")
+        filtros = Filtros.criar(
+            consulta.ano_inicio,
+            consulta.ano_fim,
+            {"opcao": consulta.opcao, "paises": consulta.paises,
+             "categoria": consulta.categoria, "produto": consulta.produto},
+        )
+        async with limite:
+            dataset = await STORE.obter_async(consulta.recurso)
+            resultado = dataset.resultado(consulta.ano)
+            # Mesmo cache de bytes das rotas de dados (escopo próprio: aqui a fonte é sempre o STORE)
+            escopo = (consulta.recurso, "batch", consulta.ano)
+            chave = (consulta.limit, consulta.cursor, filtros)
+            resposta = RESPOSTA_CACHE.obter(escopo, resultado.versao, chave)
+            if resposta is None:
+                resposta = await WORKERS.executar(
+                    serializar_pagina, resultado, filtros, consulta.limit, consulta.cursor, None
+                )
+                RESPOSTA_CACHE.guardar(escopo, resultado.versao, chave, resposta)
+    except HTTPException as he:
+        return _objeto({**campos, "status": he.status_code, "erro": he.detail})
+    except Exception as e:
+        return _objeto({**campos, "status": 500, "erro": f"Erro interno ao buscar '{consulta.recurso}': {e}"})
+
+    return _objeto(
+        {
+            **campos,
+            "status": 200,
+            "fonte": resultado.fonte,
+            "versao": resultado.versao,
+            "proximo_cursor": resposta.proximo_cursor,
+        },
+        resposta.conteudo,
+    )
+
+
+async def _em_ordem_de_chegada(consultas: List[ConsultaBatch], limite: asyncio.Semaphore) -> AsyncIterator[bytes]:
+    """NDJSON: uma linha por consulta, assim que fica pronta. Cliente desconectou → cancela o resto."""
+    tarefas = [asyncio.ensure_future(_resolver(i, c, limite)) for i, c in enumerate(consultas)]
+    try:
+        for proxima in asyncio.as_completed(tarefas):
+            yield await proxima + b"\n"
+    finally:
+        for tarefa in tarefas:
+            tarefa.cancel()
+
+
+@router.post(
+    "/batch",
+    summary="Várias consultas de dados numa única requisição",
+    description="Cada consulta tem os parâmetros de GET /{recurso}/ (ano, faixa de anos, filtros, limit/cursor). "
+                f"No máximo {BATCH_MAX} consultas por lote.",
+)
+async def consultar_lote(
+    pedido: PedidoBatch,
+    request: Request,
+    stream: bool = Query(False, description="Envia cada resultado (NDJSON) assim que fica pronto"),
+):
+    """
+    1) Recusa lotes acima de BATCH_MAX consultas (413).
+    2) Resolve as consultas em paralelo contra o STORE (no máximo
+       BATCH_CONCORRENCIA ao mesmo tempo, para não lotar a fila do pool de
+       trabalho), reaproveitando o RESPOSTA_CACHE.
+    3) Sem 'stream': um único array JSON, na ordem do pedido.
+       Com 'stream': NDJSON na ordem em que ficam prontas ('indice' indica a consulta).
+    Cada objeto traz indice, recurso, status e — se 200 — fonte, versao,
+    proximo_cursor e dados; senão, erro.
+    """
+    consultas = pedido.consultas
+    if len(consultas) > BATCH_MAX:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Lote com {len(consultas)} consultas; o máximo é {BATCH_MAX}.",
+        )
+
+    limite = asyncio.Semaphore(max(1, BATCH_CONCORRENCIA))
+    if stream:
+        return StreamingResponse(
+            _em_ordem_de_chegada(consultas, limite),
+            media_type="application/x-ndjson",
+            headers={"X-Fonte-Dados": "fallback"},
+        )
+
+    partes = await asyncio.gather(*(_resolver(i, c, limite) for i, c in enumerate(consultas)))
+    conteudo = b"[" + b", ".join(partes) + b"]"
+    headers = {"X-Fonte-Dados": "fallback", "Vary": "Accept-Encoding"}
+    if "gzip" in request.headers.get("accept-encoding", "").lower() and len(conteudo) >= RESPOSTA_GZIP_MIN_BYTES:
+        conteudo = await WORKERS.executar(comprimir, conteudo)
+        headers["Content-Encoding"] = "gzip"
+    return Response(content=conteudo, media_type="application/json", headers=headers)
@@ -1,20 +1,16 @@
 # app/routers/healthz.py
 
 import os
-import pandas as pd
-import urllib.request
+from datetime import datetime, timezone
+
 from fastapi import APIRouter, HTTPException
 
-router = APIRouter()
+from app.core.breaker import EMBRAPA_BREAKER
+from app.core.health import MONITOR
+from app.core.singleflight import SINGLEFLIGHT
+from app.core.workers import WORKERS
 
-# 5 URLs “ao vivo” (Embrapa)
-URLS_LIVE = {
-    "producao":       "http://vitibrasil.cnpuv.embrapa.br/index.php?opcao=opt_02",
-    "processamento":  "http://vitibrasil.cnpuv.embrapa.br/index.php?opcao=opt_03",
-    "comercializacao":"http://vitibrasil.cnpuv.embrapa.br/index.php?opcao=opt_04",
-    "importacao":     "http://vitibrasil.cnpuv.embrapa.br/index.php?opcao=opt_05",
-    "exportacao":     "http://vitibrasil.cnpuv.embrapa.br/index.php?opcao=opt_06",
-}
+router = APIRouter()
 
 # caminhos absolutos para os 5 CSVs de fallback
 ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
@@ -27,40 +23,68 @@ CSVS_FALLBACK = {
 }
 
 
+def _status_csvs() -> dict:
+    """Verifica (só em disco, sem rede) se cada CSV de fallback existe."""
+    csv_status = {}
+    for key, path_csv in CSVS_FALLBACK.items():
+        if os.path.exists(path_csv):
+            csv_status[f"csv_{key}"] = "existe"
+        else:
+            csv_status[f"csv_{key}"] = "falta"
+    return csv_status
+
+
 @router.get("/", summary="Health check detalhado")
 async def healthz():
     """
-    Retorna {"status":"ok", "detalhe": {...}}. Em 'detalhe' verificamos:
+    Retorna {"status":"ok", "detalhe": {...}, "circuito": {...}, "workers": {...},
+             "coalescencia": {...}, "verificado_em": ..., "idade_segundos": ...}.
+    Em 'detalhe' informamos:
+      • se cada URL "ao vivo" respondeu ao último HEAD feito em segundo plano
+        (resultado em cache; "pendente" até a primeira rodada terminar)
       • se cada CSV de fallback existe (checa o arquivo em disco)
-      • se cada URL "ao vivo" responde com HTTP HEAD
+    Em 'circuito', o estado do circuit breaker das chamadas ao vivo.
+    Em 'workers', a fila do pool de trabalho da camada CRUD (profundidade,
+    pico, rejeições) e o tempo de espera até cada tarefa começar.
+    Em 'coalescencia', quantas buscas lideraram e quantas pegaram carona
+    numa busca idêntica em andamento (SINGLEFLIGHT).
     """
-
     detalhe = {}
+    detalhe.update(MONITOR.resultado)
+    detalhe.update(_status_csvs())
+
+    idade = MONITOR.idade()
+    verificado_em = None
+    if MONITOR.verificado_em is not None:
+        verificado_em = datetime.fromtimestamp(MONITOR.verificado_em, tz=timezone.utc).isoformat()
+
+    return {
+        "status": "ok",
+        "detalhe": detalhe,
+        "circuito": EMBRAPA_BREAKER.status(),
+        "workers": WORKERS.metricas(),
+        "coalescencia": SINGLEFLIGHT.status(),
+        "verificado_em": verificado_em,
+        "idade_segundos": round(idade, 3) if idade is not None else None,
+    }
 
-    # 1) Verifica existência de cada CSV de fallback
-    csv_status = {}
-    for key, path_csv in CSVS_FALLBACK.items():
-        if os.path.exists(path_csv):
-            csv_status[f"csv_{key}"] = "existe"
-        else:
-            csv_status[f"csv_{key}"] = "falta"
 
-    # 2) Faz um HEAD rápido em cada URL. Se der erro (404, timeout, etc.), marca "falha".
-    live_status = {}
-    for key, url in URLS_LIVE.items():
-        try:
-            # Apenas a requisição HEAD, sem baixar todo o HTML
-            req = urllib.request.Request(url, method="HEAD")
-            with urllib.request.urlopen(req, timeout=5) as resp:
-                if resp.status == 200:
-                    live_status[f"live_{key}"] = "ok"
-                else:
-                    live_status[f"live_{key}"] = f"HTTP {resp.status}"
-        except Exception as e:
-            live_status[f"live_{key}"] = f"falha ({type(e).__name__})"
+@router.get("/live", summary="Liveness (processo está de pé)")
+async def liveness():
+    """Nunca toca a rede nem o disco: se o processo responde, está vivo."""
+    return {"status": "ok"}
 
-    # 3) Monta o dicionário “detalhe” unindo os dois status
-    detalhe.update(live_status)
-    detalhe.update(csv_status)
 
-    return {"status": "ok", "detalhe": detalhe}
+@router.get("/ready", summary="Readiness (pronto para servir dados)")
+async def readiness():
+    """
+    Pronto quando todos os CSVs de fallback existem: mesmo com a Embrapa fora
+    do ar, a API consegue responder a partir deles. Caso contrário, 503.
+    """
+    csv_status = _status_csvs()
+    if any(status != "existe" for status in csv_status.values()):
+        raise HTTPException(
+            status_code=503,
+            detail={"status": "indisponivel", "detalhe": csv_status}
+        )
+    return {"status": "ok", "detalhe": csv_status}
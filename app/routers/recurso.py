@@ -1,8 +1,9 @@
 # app/routers/recurso.py
 
-from typing import List, Optional
+from typing import List, Optional, Union
 
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from fastapi.params import Depends
 
 from app.crud.producao import buscar_producao
@@ -17,6 +18,27 @@ from app.schemas.comercializacao import Comercializacao
 from app.schemas.importacao import Importacao
 from app.schemas.exportacao import Exportacao
 
+from app.core.agregacao import AGREGACOES, agregar, separar_lista
+from app.core.cache import (
+    LIVE_CACHE,
+    RESPOSTA_CACHE,
+    RespostaSerializada,
+)
+from app.core.condicional import (
+    cabecalhos_validacao,
+    gerar_etag,
+    nao_modificado,
+    resposta_304,
+    versao_sem_crud,
+)
+from app.core.indices import Filtros
+from app.core.paginacao import PAGINA_MAX, serializar_pagina, versao_do_cursor
+from app.core.ranking import METRICAS_RANKING, RANKING_MAX
+from app.core.resultado import FONTE_FALLBACK, Resultado
+from app.core.store import STORE
+from app.core.streaming import FORMATOS_EXPORT, gerar_csv, gerar_ndjson
+from app.core.workers import WORKERS
+
 router = APIRouter(
     prefix="",
     tags=["dados"],
@@ -47,36 +69,128 @@ MAP_RECURSOS = {
 }
 
 
+def _filtros(
+    ano_inicio: Optional[int] = Query(None, description="Ano inicial da faixa (inclusivo)"),
+    ano_fim: Optional[int] = Query(None, description="Ano final da faixa (inclusivo)"),
+    opcao: Optional[List[str]] = Query(None, description="Opção (repetível: ?opcao=A&opcao=B)"),
+    paises: Optional[List[str]] = Query(None, description="País (repetível)"),
+    categoria: Optional[List[str]] = Query(None, description="Categoria (repetível)"),
+    produto: Optional[List[str]] = Query(None, description="Produto (repetível)"),
+) -> Filtros:
+    """Filtros comuns às rotas de dados: valores repetidos de um campo somam (OU), campos diferentes se combinam (E)."""
+    return Filtros.criar(
+        ano_inicio,
+        ano_fim,
+        {"opcao": opcao, "paises": paises, "categoria": categoria, "produto": produto},
+    )
+
+
 @router.get(
     "/{recurso}/",
     summary="Retorna dados de vitivinicultura",
     description="recurso até: producao, processamento, comercializacao, importacao, exportacao",
-    response_model=List[  # Lista de dicionários que obedecem ao schema correto
-        # O ‘response_model’ só é resolvido em tempo de definição, então teremos de usar um hack:
-        # - Em runtime, fastapi vai validar cada item usando schema_model
-        # Como workaround, definimos “response_model=List[dict]” e validamos manualmente abaixo.
-        dict  
+    # Documenta o formato no OpenAPI. Como a rota devolve um Response pronto,
+    # o FastAPI não revalida item a item: os dados já foram validados contra o
+    # schema do recurso quando o dataset foi carregado (STORE / LIVE_CACHE).
+    response_model=List[
+        Union[Producao, Processamento, Comercializacao, Importacao, Exportacao]
     ],
 )
 async def listar_recurso(
     recurso: str,
-    ano: Optional[int] = Query(None, description="Ano a filtrar")
+    request: Request,
+    ano: Optional[int] = Query(None, description="Ano a filtrar"),
+    limit: Optional[int] = Query(
+        None, ge=1, le=PAGINA_MAX,
+        description="Tamanho da página (sem 'limit', devolve todos os registros)"
+    ),
+    cursor: Optional[str] = Query(
+        None, description="Cursor opaco da próxima página (veja o header Link)"
+    ),
+    filtros: Filtros = Depends(_filtros),
 ):
     """
     1) Verifica se ‘recurso’ está no nosso MAP_RECURSOS.
     2) Se existir, chama a função CRUD correspondente: func_buscar(ano).
-    3) Valida cada item do resultado contra o schema Pydantic.
-    4) Retorna lista de dicts (já validados).
+    3) Aplica faixa de anos (ano_inicio/ano_fim) e filtros por coluna pelos
+       índices montados na carga (busca binária + interseção de bitmaps).
+       Se vier 'limit' e/ou 'cursor', recorta a página do resultado filtrado.
+    4) Serializa a página direto do DataFrame (já validado na carga contra o
+       schema Pydantic do recurso — não há validação por item aqui).
+       Os bytes finais (opcionalmente gzip) ficam no RESPOSTA_CACHE, por
+       consulta normalizada e versão dos dados.
+    5) Retorna a lista JSON; o header X-Fonte-Dados informa
+       se os dados vieram ao vivo ("fresh"/"stale") ou do CSV ("fallback") e,
+       havendo mais páginas, o header Link traz a URL da próxima (rel="next").
+    ETag (versão dos dados + consulta), Last-Modified e Cache-Control vão em
+    toda resposta; If-None-Match / If-Modified-Since válidos recebem 304.
     """
     if recurso not in MAP_RECURSOS:
         raise HTTPException(status_code=404, detail="Recurso não encontrado")
 
-    func_buscar = MAP_RECURSOS[recurso]["crud"]
-    schema_model = MAP_RECURSOS[recurso]["schema"]
+    # GET condicional antes da camada CRUD: se já sabemos qual versão seria
+    # servida e o cliente já a tem (If-None-Match / If-Modified-Since) → 304
+    consulta_etag = (ano, limit, cursor, filtros)
+    previsto = await versao_sem_crud(recurso, ano)
+    if previsto is not None:
+        etag = gerar_etag(recurso, previsto.versao, consulta_etag)
+        if nao_modificado(request, etag, previsto.gerado_em):
+            return resposta_304(recurso, etag, previsto.gerado_em, previsto.fonte)
+
+    # Com cursor: a página seguinte vem da mesma fonte/versão em que o cursor
+    # foi emitido (live e fallback disputam cada requisição, e o cursor de um
+    # não vale no outro). Se essa versão já não existe, segue o fluxo normal
+    # (e o cursor é recusado como expirado).
+    resultado = None
+    if cursor is not None:
+        resultado = await _buscar_versao(recurso, ano, versao_do_cursor(cursor))
+    if resultado is None:
+        # Executa a função CRUD (que tentará live + fallback)
+        resultado = await _buscar(recurso, ano)
+
+    etag = gerar_etag(recurso, resultado.versao, consulta_etag)
+    if nao_modificado(request, etag, resultado.gerado_em):
+        return resposta_304(recurso, etag, resultado.gerado_em, resultado.fonte)
+
+    # Bytes da resposta: reaproveita do RESPOSTA_CACHE se a mesma consulta já foi
+    # serializada para esta versão dos dados (e para a mesma codificação)
+    codificacao = "gzip" if "gzip" in request.headers.get("accept-encoding", "").lower() else None
+    # Live e fallback em escopos separados: alternar entre as fontes não descarta as respostas da outra
+    escopo = (recurso, ano, resultado.fonte == FONTE_FALLBACK)
+    consulta = (limit, cursor, codificacao, filtros)
+    resposta = RESPOSTA_CACHE.obter(escopo, resultado.versao, consulta)
+    cache_status = "HIT"
+    if resposta is None:
+        cache_status = "MISS"
+        # Filtrar + to_json + gzip é CPU: vai para o pool, sem segurar o event loop
+        resposta = await WORKERS.executar(serializar_pagina, resultado, filtros, limit, cursor, codificacao)
+        RESPOSTA_CACHE.guardar(escopo, resultado.versao, consulta, resposta)
 
-    # Executa a função CRUD (que tentará live + fallback)
+    headers = {
+        "X-Fonte-Dados": resultado.fonte,
+        "X-Cache": cache_status,
+        "Vary": "Accept-Encoding",
+        **cabecalhos_validacao(recurso, etag, resultado.gerado_em),
+    }
+    if resposta.codificacao is not None:
+        headers["Content-Encoding"] = resposta.codificacao
+    if resposta.proximo_cursor is not None:
+        proxima_url = request.url.include_query_params(cursor=resposta.proximo_cursor)
+        headers["Link"] = f'<{proxima_url}>; rel="next"'
+        headers["X-Proximo-Cursor"] = resposta.proximo_cursor
+
+    return Response(
+        content=resposta.conteudo,
+        media_type="application/json",
+        headers=headers,
+    )
+
+
+async def _buscar(recurso: str, ano: Optional[int]) -> Resultado:
+    """Chama a função CRUD do recurso (live + fallback), convertendo erros inesperados em 500."""
+    func_buscar = MAP_RECURSOS[recurso]["crud"]
     try:
-        resultado: List[dict] = await func_buscar(ano)
+        return await func_buscar(ano)
     except HTTPException as he:
         # Repassa HTTPException (503, 500 etc.)
         raise he
@@ -87,16 +201,183 @@ async def listar_recurso(
             detail=f"Erro interno ao buscar '{recurso}': {e}"
         )
 
-    # Validação Pydantic item‐a‐item
-    validated = []
-    for item in resultado:
-        try:
-            obj = schema_model(**item)
-            validated.append(obj.dict())
-        except Exception as e:
-            raise HTTPException(
-                status_code=500,
-                detail=f"Erro de validação no item: {item}. Detalhe: {e}"
-            )
-
-    return validated
+
+async def _buscar_versao(recurso: str, ano: Optional[int], versao: str) -> Optional[Resultado]:
+    """O resultado na 'versao' dada — do LIVE_CACHE ou do snapshot do STORE —, se ainda estiver disponível."""
+    resultado = LIVE_CACHE.por_versao((recurso, ano), versao)
+    if resultado is not None:
+        return resultado
+    try:
+        dataset = await STORE.obter_async(recurso)
+    except HTTPException:
+        return None
+    return dataset.resultado(ano) if dataset.versao == versao else None
+
+
+@router.get(
+    "/{recurso}/aggregate",
+    summary="Agrega os dados no servidor (soma, média ou máximo)",
+    description="Ex.: /exportacao/aggregate?group_by=ano,paises&metric=quantidade,valor_us&agg=sum",
+)
+async def agregar_recurso(
+    recurso: str,
+    request: Request,
+    group_by: str = Query("ano", description="Colunas de agrupamento, separadas por vírgula"),
+    metric: str = Query("quantidade", description="Colunas numéricas a agregar, separadas por vírgula"),
+    agg: str = Query("sum", description=f"Função de agregação: {', '.join(AGREGACOES)}"),
+    ano: Optional[int] = Query(None, description="Ano a filtrar antes de agregar"),
+    filtros: Filtros = Depends(_filtros),
+):
+    """
+    1) Busca os dados do recurso como em /{recurso}/ (live + fallback), com os mesmos filtros.
+    2) Agrega no servidor, vetorizado sobre o DataFrame já carregado.
+    3) O JSON resultante fica no RESPOSTA_CACHE por versão dos dados e
+       consulta normalizada: a mesma agregação não é recalculada até os dados mudarem.
+    """
+    if recurso not in MAP_RECURSOS:
+        raise HTTPException(status_code=404, detail="Recurso não encontrado")
+
+    colunas_grupo = separar_lista(group_by)
+    metricas = separar_lista(metric)
+    consulta_etag = ("aggregate", tuple(colunas_grupo), tuple(metricas), agg, ano, filtros)
+
+    previsto = await versao_sem_crud(recurso, ano)
+    if previsto is not None:
+        etag = gerar_etag(recurso, previsto.versao, consulta_etag)
+        if nao_modificado(request, etag, previsto.gerado_em):
+            return resposta_304(recurso, etag, previsto.gerado_em, previsto.fonte)
+
+    resultado = await _buscar(recurso, ano)
+
+    etag = gerar_etag(recurso, resultado.versao, consulta_etag)
+    if nao_modificado(request, etag, resultado.gerado_em):
+        return resposta_304(recurso, etag, resultado.gerado_em, resultado.fonte)
+
+    escopo = (recurso, "aggregate", ano, resultado.fonte == FONTE_FALLBACK)
+    consulta = (tuple(colunas_grupo), tuple(metricas), agg, filtros)
+    resposta = RESPOSTA_CACHE.obter(escopo, resultado.versao, consulta)
+    cache_status = "HIT"
+    if resposta is None:
+        cache_status = "MISS"
+        resposta = await WORKERS.executar(_serializar_agregado, resultado, filtros, colunas_grupo, metricas, agg)
+        RESPOSTA_CACHE.guardar(escopo, resultado.versao, consulta, resposta)
+
+    return Response(
+        content=resposta.conteudo,
+        media_type="application/json",
+        headers={
+            "X-Fonte-Dados": resultado.fonte,
+            "X-Cache": cache_status,
+            **cabecalhos_validacao(recurso, etag, resultado.gerado_em),
+        },
+    )
+
+
+def _serializar_agregado(
+    resultado: Resultado,
+    filtros: Filtros,
+    colunas_grupo: List[str],
+    metricas: List[str],
+    agg: str,
+) -> RespostaSerializada:
+    agregado = agregar(resultado.filtrar(filtros), colunas_grupo, metricas, agg)
+    return RespostaSerializada(agregado.to_json(orient="records", force_ascii=False).encode("utf-8"))
+
+
+@router.get(
+    "/{recurso}/ranking",
+    summary="Top N países por quantidade ou valor (importacao/exportacao)",
+    description="Ex.: /exportacao/ranking?ano=2022&opcao=Espumantes&metric=valor_us&n=10",
+)
+async def ranking_recurso(
+    recurso: str,
+    request: Request,
+    ano: int = Query(..., description="Ano do ranking"),
+    opcao: Optional[str] = Query(None, description="Linha de produto (sem 'opcao', soma todas)"),
+    metric: str = Query("quantidade", description=f"Métrica: {', '.join(METRICAS_RANKING)}"),
+    n: int = Query(10, ge=1, le=RANKING_MAX, description="Quantidade de países"),
+):
+    """
+    Os rankings de cada (ano, opcao, métrica) são calculados quando o dataset
+    é carregado no STORE (veja app/core/ranking.py): aqui é só uma consulta
+    ao índice e uma fatia do frame já ordenado.
+    """
+    if recurso not in MAP_RECURSOS:
+        raise HTTPException(status_code=404, detail="Recurso não encontrado")
+    if metric not in METRICAS_RANKING:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Métrica inválida: {metric}. Use uma de {list(METRICAS_RANKING)}"
+        )
+
+    dataset = await STORE.obter_async(recurso)
+    rankings = dataset.derivados.get("ranking")
+    if rankings is None:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Ranking não disponível para '{recurso}' (apenas importacao e exportacao)"
+        )
+
+    etag = gerar_etag(recurso, dataset.versao, ("ranking", ano, opcao, metric, n))
+    if nao_modificado(request, etag, dataset.modificado_em):
+        return resposta_304(recurso, etag, dataset.modificado_em, "fallback")
+
+    top = rankings.top(ano, opcao, metric, n)
+    return Response(
+        content=top.to_json(orient="records", force_ascii=False).encode("utf-8"),
+        media_type="application/json",
+        headers={
+            "X-Fonte-Dados": "fallback",
+            "X-Versao-Dados": dataset.versao,
+            **cabecalhos_validacao(recurso, etag, dataset.modificado_em),
+        },
+    )
+
+
+@router.get(
+    "/{recurso}/export",
+    summary="Exporta o dataset em streaming (NDJSON ou CSV)",
+    description="Envia os registros em blocos direto do dataset carregado em memória; "
+                "a memória não cresce com o tamanho do dataset.",
+    response_class=StreamingResponse,
+)
+async def exportar_recurso(
+    recurso: str,
+    request: Request,
+    format: str = Query("ndjson", description="Formato: ndjson ou csv"),
+    ano: Optional[int] = Query(None, description="Ano a filtrar"),
+    filtros: Filtros = Depends(_filtros),
+):
+    """
+    1) Verifica recurso e formato.
+    2) Pega o dataset do STORE (já normalizado e validado) e, se vier 'ano', a fatia do ano;
+       aplica os filtros (faixa de anos, opcao/paises/categoria/produto) pelos índices.
+    3) Devolve um StreamingResponse que serializa bloco a bloco.
+    """
+    if recurso not in MAP_RECURSOS:
+        raise HTTPException(status_code=404, detail="Recurso não encontrado")
+    if format not in FORMATOS_EXPORT:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Formato inválido: {format}. Use um de {sorted(FORMATOS_EXPORT)}"
+        )
+
+    dataset = await STORE.obter_async(recurso)
+    etag = gerar_etag(recurso, dataset.versao, ("export", format, ano, filtros))
+    if nao_modificado(request, etag, dataset.modificado_em):
+        return resposta_304(recurso, etag, dataset.modificado_em, "fallback")
+
+    frame = dataset.resultado(ano).filtrar(filtros)
+
+    gerador = gerar_ndjson(frame) if format == "ndjson" else gerar_csv(frame)
+    nome_arquivo = f"{recurso}{'_' + str(ano) if ano is not None else ''}.{format}"
+    return StreamingResponse(
+        gerador,
+        media_type=FORMATOS_EXPORT[format],
+        headers={
+            "Content-Disposition": f'attachment; filename="{nome_arquivo}"',
+            "X-Fonte-Dados": "fallback",
+            "X-Versao-Dados": dataset.versao,
+            **cabecalhos_validacao(recurso, etag, dataset.modificado_em),
+        },
+    )
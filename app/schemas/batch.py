@@ -0,0 +1,36 @@
+# app/schemas/batch.py
+
+from typing import List, Optional
+
+from pydantic import BaseModel, ConfigDict, Field
+
+from app.core.paginacao import PAGINA_MAX
+
+
+class ConsultaBatch(BaseModel):
+    """Uma consulta do lote: os mesmos parâmetros de GET /{recurso}/."""
+    recurso: str
+    ano: Optional[int] = None
+    ano_inicio: Optional[int] = None
+    ano_fim: Optional[int] = None
+    opcao: Optional[List[str]] = None
+    paises: Optional[List[str]] = None
+    categoria: Optional[List[str]] = None
+    produto: Optional[List[str]] = None
+    limit: Optional[int] = Field(None, ge=1, le=PAGINA_MAX)
+    cursor: Optional[str] = None
+
+
+class PedidoBatch(BaseModel):
+    model_config = ConfigDict(
+        json_schema_extra={
+            "example": {
+                "consultas": [
+                    {"recurso": "producao", "ano": 2022},
+                    {"recurso": "exportacao", "ano": 2022, "opcao": ["Espumantes"], "limit": 50},
+                ]
+            }
+        }
+    )
+
+    consultas: List[ConsultaBatch] = Field(..., min_length=1)
@@ -47,10 +47,18 @@ ano_min = st.sidebar.slider("Ano mínimo", 1970, 2023, 1970)
 
 # ─── Chamada à API ───────────────────────────────────────────────────────────────
 headers = {"Authorization": f"Bearer {st.session_state.token}"}
+
+# GET condicional: reaproveita o último JSON desta consulta se o ETag não mudou (304)
+cache_api = st.session_state.setdefault("cache_api", {})
+chave_cache = (recurso, ano_min)
+headers_consulta = dict(headers)
+if chave_cache in cache_api:
+    headers_consulta["If-None-Match"] = cache_api[chave_cache]["etag"]
+
 resp = requests.get(
     f"{API_URL}/{recurso}/",
-    params={"ano": ano_min},
-    headers=headers
+    params={"ano_inicio": ano_min},
+    headers=headers_consulta
 )
 try:
     resp.raise_for_status()
@@ -59,7 +67,14 @@ except requests.HTTPError as e:
     st.stop()
 
 # ─── Extração de JSON ─────────────────────────────────────────────────────────────
-json_obj = resp.json()
+if resp.status_code == 304:
+    json_obj = cache_api[chave_cache]["json"]
+    fonte_tabela = resp.headers.get("X-Fonte-Dados") or cache_api[chave_cache].get("fonte")
+else:
+    json_obj = resp.json()
+    fonte_tabela = resp.headers.get("X-Fonte-Dados")
+    if resp.headers.get("ETag"):
+        cache_api[chave_cache] = {"etag": resp.headers["ETag"], "json": json_obj, "fonte": fonte_tabela}
 
 # Detectamos se a resposta veio no formato {"source": "...", "data": [...]} ou se é só lista:
 if isinstance(json_obj, dict) and ("data" in json_obj):
@@ -113,19 +128,54 @@ else:
     st.dataframe(df, use_container_width=True)
 
     # ─── Botão de download ─────────────────────────────────────────────────────────
-    st.download_button(
-        "🔽 Baixar CSV",
-        df.to_csv(index=False),
-        f"{recurso}.csv",
-        "text/csv"
-    )
+    # O CSV vem pronto da API (/{recurso}/export), sem df.to_csv no cliente — e só
+    # é pedido no clique (não a cada rerun do Streamlit); fica guardado por consulta
+    exportados = st.session_state.setdefault("exportados", {})
+    if st.button("📄 Gerar CSV"):
+        resp_csv = requests.get(
+            f"{API_URL}/{recurso}/export",
+            params={"format": "csv", "ano_inicio": ano_min},
+            headers=headers,
+        )
+        if resp_csv.ok:
+            exportados[chave_cache] = {
+                "csv": resp_csv.content,
+                "fonte": resp_csv.headers.get("X-Fonte-Dados"),
+            }
+        else:
+            st.warning(f"Download indisponível (HTTP {resp_csv.status_code}).")
+
+    exportado = exportados.get(chave_cache)
+    if exportado is not None:
+        # O export pode vir de outra fonte que a tabela (ex.: fallback x ao vivo)
+        st.caption(f"CSV gerado a partir da fonte: **{exportado['fonte'] or 'desconhecida'}**")
+        if fonte_tabela and exportado["fonte"] != fonte_tabela:
+            st.warning(f"A tabela acima veio da fonte **{fonte_tabela}**; os valores podem diferir.")
+        st.download_button(
+            "🔽 Baixar CSV",
+            exportado["csv"],
+            f"{recurso}_{ano_min}.csv",
+            "text/csv"
+        )
+
+    # ─── Agregações no servidor (/{recurso}/aggregate) ─────────────────────────────
+    # A API devolve só as linhas agregadas (poucas centenas de bytes), sem groupby no cliente
+    def agregar_api(group_by: str, metric: str = "quantidade", agg: str = "sum") -> pd.DataFrame:
+        r = requests.get(
+            f"{API_URL}/{recurso}/aggregate",
+            params={"group_by": group_by, "metric": metric, "agg": agg, "ano_inicio": ano_min},
+            headers=headers,
+        )
+        if not r.ok:
+            return pd.DataFrame()
+        return pd.DataFrame(r.json())
 
     # ─── Gráfico de série temporal ────────────────────────────────────────────────
     if {"ano", "quantidade"}.issubset(df.columns):
-        df["quantidade"] = pd.to_numeric(df["quantidade"], errors="coerce").fillna(0)
-        series = df.groupby("ano")["quantidade"].sum()
+        series = agregar_api("ano")
         st.subheader("🔢 Série temporal de Quantidade")
-        st.line_chart(series)
+        if not series.empty:
+            st.line_chart(series.set_index("ano")["quantidade"])
     else:
         faltam = [c for c in ("ano", "quantidade") if c not in df.columns]
         st.info(f"Gráfico de série desativado, faltando coluna(s): {faltam}")
@@ -133,13 +183,15 @@ else:
     # ─── Bar chart top‐10 países ───────────────────────────────────────────────────
     if {"paises", "quantidade"}.issubset(df.columns):
         st.subheader(f"📊 Top 10 países por Quantidade em {ano_min}")
-        top10 = (
-            df.groupby("paises")["quantidade"]
-              .sum()
-              .sort_values(ascending=False)
-              .head(10)
+        # Ranking pré-calculado na API (/{recurso}/ranking): já vem ordenado e sem a linha "Total"
+        r = requests.get(
+            f"{API_URL}/{recurso}/ranking",
+            params={"ano": ano_min, "metric": "quantidade", "n": 10},
+            headers=headers,
         )
-        st.bar_chart(top10)
+        if r.ok and r.json():
+            top10 = pd.DataFrame(r.json()).set_index("paises")["quantidade"]
+            st.bar_chart(top10)
     else:
         faltam = [c for c in ("paises", "quantidade") if c not in df.columns]
         st.info(f"Bar chart desativado, faltando coluna(s): {faltam}")
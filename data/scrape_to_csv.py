@@ -1,342 +1,256 @@
-import requests
-from bs4 import BeautifulSoup
+import argparse
+import asyncio
+import os
+import sys
+import time
+from collections import namedtuple
+
 import datetime
 import pandas as pd
-import time
 
-def scrape_to_csv_producao(year):
-
-    url = "http://vitibrasil.cnpuv.embrapa.br/index.php?opcao=opt_02&ano="
-    CLASSE_TABELA = {'class': 'tb_base tb_dados'}
-
-    url = f"{url}{year}"
-    resposta = requests.get(url)
-    dados_ano = []
-
-    if resposta.status_code == 200:
-        soup = BeautifulSoup(resposta.text, 'html.parser')
-        tabela = soup.find('table', CLASSE_TABELA)
-
-        if not tabela:
-            print(f"[{year}] Tabela não encontrada.")
-            return []
-
-        linhas = tabela.find_all('tr')
-        categoria_atual = None
-
-        for linha in linhas:
-            colunas = linha.find_all('td')
-            if not colunas:
-                continue
-
-            primeira_coluna = colunas[0]
-
-            if 'tb_item' in primeira_coluna.get('class', []):
-                categoria_atual = primeira_coluna.text.strip()
-                quantidade = [col.text.strip() for col in colunas[1:]]
-
-                dados_ano.append([
-                    year,
-                    categoria_atual,
-                    "-",
-                    quantidade[0]
-                ])
-            elif 'tb_subitem' in primeira_coluna.get('class', []):
-                produto = primeira_coluna.text.strip()
-                quantidade = [col.text.strip() for col in colunas[1:]]
-
-                dados_ano.append([
-                    year,
-                    categoria_atual,
-                    produto,
-                    quantidade[0]
-                ])
-    else:
-        print("Não conseguiu pegar os dados")
-        
-    return dados_ano
-
-def scrape_to_csv_processamento(ano=None, sub='opt_01'):    
-    
-    url = f"http://vitibrasil.cnpuv.embrapa.br/index.php?ano={ano}&opcao=opt_03&subopcao={sub}"
-    resposta = requests.get(url)
-
-    if resposta.status_code == 200:
-        soup = BeautifulSoup(resposta.text, 'html.parser')
-
-        # Encontra a tabela (pode ajustar se tiver mais de uma tabela na página)
-        tabela = soup.find('table', {'class': 'tb_base tb_dados'})
-
-        if tabela:
-            linhas = tabela.find_all('tr')
-            dados = []
-            categoria_atual = None
-            
-            for linha in linhas:
-                colunas = linha.find_all('td')
-                
-                if not colunas:
-                    continue  # Pula linhas vazias
-                
-                primeira_coluna = colunas[0]
-                
-                if 'tb_item' in primeira_coluna.get('class', []):
-                    categoria_atual = primeira_coluna.text.strip()
-                    dados.append({
-                        'Categoria': categoria_atual,
-                        'Cultivar': '-',
-                        'Quantidade(Kg.)': [col.text.strip() for col in colunas[1:]]
-                    })
-                elif 'tb_subitem' in primeira_coluna.get('class', []):
-                    produto = primeira_coluna.text.strip()
-                    dados.append({
-                        'Categoria': categoria_atual,
-                        'Cultivar': produto,
-                        'Quantidade(Kg.)': [col.text.strip() for col in colunas[1:]]
-                    })
-            
-            return dados
+# ────────────────────────────────────────────────────────────────────────────────
+# Garante que o diretório raiz do projeto esteja no PYTHONPATH
+DATA_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(DATA_DIR)
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+# ────────────────────────────────────────────────────────────────────────────────
+
+from app.core.artefatos import MMAP_ATIVO  # noqa: E402
+from app.ingestion.crawler import Crawler, CRAWLER_CONCORRENCIA, CRAWLER_TAXA  # noqa: E402
+from app.ingestion.download import COLUNAS_CSV, DOWNLOAD_FONTE, obter_longo  # noqa: E402
+from app.ingestion.extracao import EXTRACAO_PROCESSOS, mapear_em_processos  # noqa: E402
+from app.ingestion.incremental import ManifestoPaginas, Particoes  # noqa: E402
+from app.ingestion.paginas import (  # noqa: E402
+    SUBOPCOES, TabelaNaoEncontrada, linhas_da_pagina as linhas_de_html, url_pagina,
+)
+
+# Partições por página + manifesto de hashes do modo incremental
+PARTICOES_DIR = os.path.join(DATA_DIR, "particoes")
+
+
+# ─── Páginas de cada recurso ────────────────────────────────────────────────────
+# Arquivo e colunas de cada CSV gerado (as mesmas de data/<recurso>.csv)
+CSVS = {recurso: (f"{recurso}.csv", colunas) for recurso, colunas in COLUNAS_CSV.items()}
+
+# Uma página a baixar: recurso, ano, subopção (ou None), descrição da subopção e URL
+Pagina = namedtuple("Pagina", ["recurso", "ano", "sub", "desc", "url"])
+
+
+def montar_paginas(anos, recursos=tuple(CSVS)):
+    """Todas as páginas, na ordem das linhas dos CSVs (recurso, ano a ano, subopção a subopção)."""
+    paginas = []
+    for recurso in recursos:
+        for ano in anos:
+            for sub, desc in SUBOPCOES.get(recurso, {None: None}).items():
+                paginas.append(Pagina(recurso, ano, sub, desc, url_pagina(recurso, ano, sub)))
+    return paginas
+
+
+def linhas_da_pagina(pagina, html):
+    """Extrai as linhas do CSV final a partir do HTML de uma página (sem tabela → nenhuma, com aviso)."""
+    try:
+        return linhas_de_html(pagina.recurso, pagina.ano, pagina.desc, html)
+    except TabelaNaoEncontrada as e:
+        print(e)
+        return []
+
+
+def gravar_csvs(linhas_por_recurso, destino=DATA_DIR):
+    """Grava os CSVs com linhas; devolve os recursos gravados."""
+    gravados = []
+    for recurso, linhas in linhas_por_recurso.items():
+        if len(linhas) > 0:
+            arquivo, colunas = CSVS[recurso]
+            df = pd.DataFrame(linhas, columns=colunas)
+            df.to_csv(os.path.join(destino, arquivo), index=False, encoding='utf-8', sep=',')
+            gravados.append(recurso)
+    return gravados
+
+
+def publicar_artefatos(recursos, destino=DATA_DIR, arrow=MMAP_ATIVO):
+    """
+    Regrava o Parquet (e o Arrow, se 'arrow') + manifesto de cada CSV recém
+    gravado — o CSV e seus artefatos são publicados juntos, e a API (que
+    recarrega quando o manifesto muda) não fica lendo o CSV por falta do
+    artefato. CSVs gravados fora da pasta servida pela API não têm artefato.
+    """
+    # Importar os módulos CRUD registra cada CSV (e sua normalização) no STORE
+    import app.crud.producao        # noqa: F401
+    import app.crud.processamento   # noqa: F401
+    import app.crud.comercializacao # noqa: F401
+    import app.crud.importacao      # noqa: F401
+    import app.crud.exportacao      # noqa: F401
+    from app.core.store import STORE
+
+    publicados = []
+    for recurso in recursos:
+        caminho = os.path.join(destino, CSVS[recurso][0])
+        if os.path.abspath(caminho) != os.path.abspath(STORE.caminho(recurso)):
+            continue
+        STORE.construir_artefato(recurso, arrow=arrow)
+        publicados.append(recurso)
+    return publicados
+
+
+# ─── Versão concorrente (crawler assíncrono) ────────────────────────────────────
+async def crawl(paginas, crawler, processos=EXTRACAO_PROCESSOS):
+    """
+    Baixa as páginas em paralelo (limites do crawler) e extrai as linhas de cada uma
+    (em 'processos' processos, depois de baixar tudo).
+    O resultado preserva a ordem de 'paginas', então as linhas dos CSVs saem sempre na mesma ordem.
+    """
+    respostas = await crawler.baixar_todos(p.url for p in paginas)
+
+    baixadas = []
+    for pagina, resposta in zip(paginas, respostas):
+        if resposta is None or resposta.status_code != 200:
+            status = resposta.status_code if resposta is not None else "falha"
+            print(f"Erro ao acessar {pagina.recurso} {pagina.desc or ''} {pagina.ano}: {status}")
+            continue
+        baixadas.append((pagina, resposta.text))
+    extraidas = mapear_em_processos(linhas_da_pagina, baixadas, processos)
+
+    linhas_por_recurso = {pagina.recurso: [] for pagina in paginas}
+    for (pagina, _), linhas in zip(baixadas, extraidas):
+        linhas_por_recurso[pagina.recurso].extend(linhas)
+    return linhas_por_recurso
+
+
+async def atualizar_incremental(
+    paginas, crawler, particoes, manifesto, destino=DATA_DIR, processos=EXTRACAO_PROCESSOS
+):
+    """
+    Atualização incremental: cada página vai com If-None-Match / If-Modified-Since
+    (quando o manifesto tem os validadores). 304 ou corpo com o mesmo sha256 →
+    página inalterada, nem é re-extraída; as alteradas são extraídas em lote
+    ('processos' processos). Só as partições das páginas alteradas são
+    regravadas, e só os CSVs dos recursos afetados são remontados.
+    Devolve (recursos regravados, contagem de páginas por situação).
+    """
+    # Primeira execução: semeia as partições a partir dos CSVs atuais
+    for recurso in dict.fromkeys(p.recurso for p in paginas):
+        caminho_csv = os.path.join(destino, CSVS[recurso][0])
+        if not particoes.existe(recurso) and os.path.exists(caminho_csv):
+            anos_csv = sorted(pd.read_csv(caminho_csv, usecols=["Ano"])["Ano"].unique())
+            particoes.semear(recurso, caminho_csv, montar_paginas(anos_csv, [recurso]))
+
+    respostas = await asyncio.gather(*(
+        crawler.baixar(p.url, manifesto.cabecalhos(p.recurso, p.sub, p.ano)) for p in paginas
+    ))
+
+    alteradas = []
+    contagem = {"inalteradas": 0, "alteradas": 0, "falhas": 0}
+    for pagina, resposta in zip(paginas, respostas):
+        if resposta is None or resposta.status_code not in (200, 304):
+            contagem["falhas"] += 1
+            continue
+        if manifesto.mudou(pagina.recurso, pagina.sub, pagina.ano, resposta):
+            alteradas.append((pagina, resposta.text))
+            contagem["alteradas"] += 1
         else:
-            print(f"Nenhuma tabela encontrada para o ano {ano}")
-            return None
-    else:
-        print(f"Erro ao acessar o ano {ano}: {resposta.status_code}")
-        return None
-
-def scrape_to_csv_comercializacao(year):
-
-    url = "http://vitibrasil.cnpuv.embrapa.br/index.php?opcao=opt_04&ano="
-    CLASSE_TABELA = {'class': 'tb_base tb_dados'}
-
-    url = f"{url}{year}"
-    resposta = requests.get(url)
-    dados_ano = []
-
-    if resposta.status_code == 200:
-        soup = BeautifulSoup(resposta.text, 'html.parser')
-        tabela = soup.find('table', CLASSE_TABELA)
-
-        if not tabela:
-            print(f"[{year}] Tabela não encontrada.")
-            return []
-
-        linhas = tabela.find_all('tr')
-        categoria_atual = None
-
-        for linha in linhas:
-            colunas = linha.find_all('td')
-            if not colunas:
-                continue
-
-            primeira_coluna = colunas[0]
-
-            if 'tb_item' in primeira_coluna.get('class', []):
-                categoria_atual = primeira_coluna.text.strip()
-                quantidade = [col.text.strip() for col in colunas[1:]]
-
-                dados_ano.append([
-                    year,
-                    categoria_atual,
-                    "-",
-                    quantidade[0]
-                ])
-            elif 'tb_subitem' in primeira_coluna.get('class', []):
-                produto = primeira_coluna.text.strip()
-                quantidade = [col.text.strip() for col in colunas[1:]]
-
-                dados_ano.append([
-                    year,
-                    categoria_atual,
-                    produto,
-                    quantidade[0]
-                ])
-    else:
-        print("Não conseguiu pegar os dados")
-        
-    return dados_ano
-
-def scrape_to_csv_importacao(ano=None, sub='opt_01'):
-
-    url = "http://vitibrasil.cnpuv.embrapa.br/index.php?opcao=opt_05&subopcao={}&ano={}".format(sub,ano)
-    resposta = requests.get(url)
-    dados_ano = []
-
-    if resposta.status_code == 200:
-        soup = BeautifulSoup(resposta.text, 'html.parser')
-        tabela = soup.find('table', {'class': 'tb_base tb_dados'})
-
-        if tabela:
-            linhas = tabela.find_all('tr')
-            categoria_atual = None
-
-            for linha in linhas:
-                colunas = linha.find_all('td')
-                if not colunas:
-                    continue
-
-                primeira_coluna = colunas[0]
-                pais = primeira_coluna.text.strip()
-                quantidade = colunas[1].text.strip()
-                valor = colunas[2].text.strip()
-
-                dados_ano.append([
-                    ano,
-                    pais,
-                    quantidade,
-                    valor
-                ])
-            return dados_ano
+            contagem["inalteradas"] += 1
+        manifesto.registrar(pagina.recurso, pagina.sub, pagina.ano, resposta)
+
+    regravados = []
+    for (pagina, _), linhas in zip(alteradas, mapear_em_processos(linhas_da_pagina, alteradas, processos)):
+        particoes.gravar(pagina.recurso, pagina.sub, pagina.ano, linhas, CSVS[pagina.recurso][1])
+        if pagina.recurso not in regravados:
+            regravados.append(pagina.recurso)
+
+    for recurso in regravados:
+        particoes.consolidar(recurso, os.path.join(destino, CSVS[recurso][0]))
+    # O manifesto só é salvo depois das partições: se algo falhar no meio,
+    # a próxima execução ainda vê essas páginas como alteradas
+    manifesto.salvar()
+    return regravados, contagem
+
+
+async def baixar_largos(recursos, anos, crawler, fonte=DOWNLOAD_FONTE):
+    """
+    Modo download: um CSV “largo” por recurso/subopção (todos os anos) em vez
+    de uma página por ano — ~13 requisições no lugar de centenas. Mantém só 'anos'.
+    """
+    async def baixar(url):
+        resposta = await crawler.baixar(url)
+        if resposta is None or resposta.status_code != 200:
+            status = resposta.status_code if resposta is not None else "falha"
+            raise RuntimeError(f"Erro ao baixar {url}: {status}")
+        return resposta
+
+    longos = await asyncio.gather(*(obter_longo(recurso, fonte, baixar) for recurso in recursos))
+    return {
+        recurso: longo[longo["Ano"].astype(int).isin(anos)].values.tolist()
+        for recurso, longo in zip(recursos, longos)
+    }
+
+
+async def main_async(args):
+    anos = range(args.ano_inicio, args.ano_fim + 1)
+    recursos = args.recursos or list(CSVS)
+    paginas = montar_paginas(anos, recursos)
+    if args.download:
+        print(f"Modo download: CSVs largos de {', '.join(recursos)} ({args.fonte})")
     else:
-        print(f"Erro ao acessar o ano {ano}: {resposta.status_code}")
-        return None
-
-def scrape_to_csv_exportacao(ano=None, sub='opt_01'):
-
-    url = "http://vitibrasil.cnpuv.embrapa.br/index.php?opcao=opt_06&subopcao={}&ano={}".format(sub,ano)
-    resposta = requests.get(url)
-    dados_ano = []
-
-    if resposta.status_code == 200:
-        soup = BeautifulSoup(resposta.text, 'html.parser')
-        tabela = soup.find('table', {'class': 'tb_base tb_dados'})
-
-        if tabela:
-            linhas = tabela.find_all('tr')
-            categoria_atual = None
-
-            for linha in linhas:
-                colunas = linha.find_all('td')
-                if not colunas:
-                    continue
-
-                primeira_coluna = colunas[0]
-                pais = primeira_coluna.text.strip()
-                quantidade = colunas[1].text.strip()
-                valor = colunas[2].text.strip()
-
-                dados_ano.append([
-                    ano,
-                    pais,
-                    quantidade,
-                    valor
-                ])
-            return dados_ano
+        print(f"{len(paginas)} páginas, concorrência {args.concorrencia}, {args.taxa} req/s por host")
+
+    inicio = time.perf_counter()
+    async with Crawler(concorrencia=args.concorrencia, taxa_padrao=args.taxa) as crawler:
+        if args.download:
+            linhas_por_recurso = await baixar_largos(recursos, anos, crawler, args.fonte)
+            gravados = gravar_csvs(linhas_por_recurso, args.destino)
+        elif args.incremental:
+            particoes = Particoes(args.particoes)
+            manifesto = ManifestoPaginas(os.path.join(args.particoes, "manifest.json"))
+            regravados, contagem = await atualizar_incremental(
+                paginas, crawler, particoes, manifesto, args.destino, args.processos
+            )
+            gravados = regravados
+        else:
+            linhas_por_recurso = await crawl(paginas, crawler, args.processos)
+            gravados = gravar_csvs(linhas_por_recurso, args.destino)
+    publicados = publicar_artefatos(gravados, args.destino, args.arrow)
+
+    print(f"Concluído em {time.perf_counter() - inicio:.1f}s — {crawler.resumo()}")
+    if args.incremental:
+        print(f"  páginas: {contagem}; CSVs regravados: {regravados or 'nenhum'}")
     else:
-        print(f"Erro ao acessar o ano {ano}: {resposta.status_code}")
-        return None
+        for recurso, linhas in linhas_por_recurso.items():
+            print(f"  {recurso}: {len(linhas)} linhas")
+    print(f"  artefatos publicados: {', '.join(publicados) or 'nenhum'}")
 
 
 if __name__ == "__main__":
-
-    years = range(1970, datetime.datetime.now().year - 1)
-    # years = range(1970, 1972)
-    #--------------------------------------------
-    # Producao
-    #--------------------------------------------
-    list_producao = []
-
-    for year in years:
-        data = scrape_to_csv_producao(year)
-        if(len(data)>0):
-            list_producao.extend(data)
-            time.sleep(1)
-            print("Dados do ano {} extraído".format(year))
-
-    if len(list_producao)>0:
-        df = pd.DataFrame(list_producao, columns=[
-            'Ano', 'Categoria', 'Produto', 'Quantidade(L.)'])
-        df.to_csv('./data/producao.csv', index=False, encoding='utf-8', sep=',')    
-
-
-    #--------------------------------------------
-    # Processamento
-    #--------------------------------------------
-    subs_processamento = {
-    'subopt_01': 'Viniferas',
-    'subopt_02': 'Americanas e hibridas',
-    'subopt_03': 'Uvas de mesa',
-    'subopt_04': 'Sem classificação'
-    }
-
-    list_processamento = []
-    for ano in years:
-        for sub, desc in subs_processamento.items():
-            print(f"Processando {desc} para o ano {ano}...")
-            dados = scrape_to_csv_processamento(ano, sub)
-            time.sleep(1) # Aguardar 1 segundo entre as requisições para evitar bloqueios
-            if dados:
-                for d in dados:
-                    list_processamento.append([desc, ano, d['Categoria'], d['Cultivar'], d['Quantidade(Kg.)'][0]])
-
-    if len(list_processamento)>0:
-        #Colunas: Opção,Ano,Categoria,Cultivar,Quantidade(Kg.)
-
-        df = pd.DataFrame(list_processamento, columns=[
-            'Opção', 'Ano', 'Categoria', 'Cultivar', 'Quantidade(Kg.)'])
-        df.to_csv('./data/processamento.csv', index=False, encoding='utf-8', sep=',')
-
-
-    #--------------------------------------------
-    # Importacao
-    #--------------------------------------------
-    subs_importacao = {
-        'subopt_01': 'Vinhos de mesa',
-        'subopt_02': 'Espumantes',
-        'subopt_03': 'Uvas frescas',
-        'subopt_04': 'Uvas passas',
-        'subopt_05': 'Suco de uva'
-    }
-    list_importacao = []
-    for ano in years:
-        for sub, desc in subs_importacao.items():
-            print("Processando {} para o ano {}...".format(desc, ano))
-            dados = scrape_to_csv_importacao(ano, sub)
-            time.sleep(1)  # Aguardar 1 segundo entre as requisições para evitar bloqueios
-            if dados:
-                for d in dados:
-                    list_importacao.append([desc,d[0], d[1], d[2], d[3]])
-    if len(list_importacao) > 0:
-        # Colunas: Opção,Ano,Países,Quantidade(Kg.),Valor (US$)
-        df = pd.DataFrame(list_importacao, columns=[
-            'Opção', 'Ano','Países', 'Quantidade(Kg.)', 'Valor (US$)'])
-        df.to_csv('./data/importacao.csv', index=False, encoding='utf-8', sep=',')
-
-    #--------------------------------------------
-    # Exportacao
-    #--------------------------------------------
-    subs_exportacao = {
-        'subopt_01': 'Vinhos de mesa',
-        'subopt_02': 'Espumantes',
-        'subopt_03': 'Uvas frescas',
-        'subopt_04': 'Suco de uva'
-    }
-    list_exportacao = []
-    for ano in years:
-        for sub, desc in subs_exportacao.items():
-            print("Processando {} para o ano {}...".format(desc, ano))
-            dados = scrape_to_csv_exportacao(ano, sub)
-            time.sleep(1)  # Aguardar 1 segundo entre as requisições para evitar bloqueios
-            if dados:
-                for d in dados:
-                    list_exportacao.append([desc,d[0], d[1], d[2], d[3]])
-    if len(list_exportacao) > 0:
-        # Colunas: Opção,Ano,Países,Quantidade(Kg.),Valor (US$)
-        df = pd.DataFrame(list_exportacao, columns=[
-            'Opção', 'Ano','Países', 'Quantidade(Kg.)', 'Valor (US$)'])
-        df.to_csv('./data/exportacao.csv', index=False, encoding='utf-8', sep=',')
-
-
-    #--------------------------------------------
-    # Comercializacao
-    #--------------------------------------------
-    list_comercializacao = []
-    for year in years:
-        data = scrape_to_csv_comercializacao(year)
-        if(len(data)>0):
-            list_comercializacao.extend(data)
-            time.sleep(1)
-            print("Dados do ano {} extraído".format(year))
-    if len(list_comercializacao)>0:
-        df = pd.DataFrame(list_comercializacao, columns=[
-            'Ano', 'Categoria', 'Produto', 'Quantidade(L)'])
-        df.to_csv('./data/comercializacao.csv', index=False, encoding='utf-8', sep=',')
+    parser = argparse.ArgumentParser(description="Raspa o site da Embrapa e gera os cinco CSVs de data/")
+    parser.add_argument("recursos", nargs="*", help=f"recursos (padrão: todos): {', '.join(CSVS)}")
+    parser.add_argument("--ano-inicio", type=int, default=1970)
+    # Mesmo intervalo da raspagem original: range(1970, ano atual - 1)
+    parser.add_argument("--ano-fim", type=int, default=datetime.datetime.now().year - 2)
+    parser.add_argument("--concorrencia", type=int, default=CRAWLER_CONCORRENCIA)
+    parser.add_argument("--taxa", type=float, default=CRAWLER_TAXA, help="requisições por segundo por host")
+    parser.add_argument(
+        "--processos", type=int, default=EXTRACAO_PROCESSOS,
+        help="processos para extrair as tabelas (0 ou 1 = no próprio processo)"
+    )
+    parser.add_argument("--destino", default=DATA_DIR, help="pasta onde gravar os CSVs")
+    parser.add_argument(
+        "--incremental", action="store_true",
+        help="só re-extrai páginas alteradas (manifesto de hashes + requisições condicionais)"
+    )
+    parser.add_argument("--particoes", default=PARTICOES_DIR, help="pasta das partições e do manifesto")
+    parser.add_argument(
+        "--download", action="store_true",
+        help="usa os CSVs largos da área de download (todos os anos de uma vez) em vez das páginas"
+    )
+    parser.add_argument(
+        "--fonte", default=DOWNLOAD_FONTE, help="URL base dos CSVs largos, ou pasta local com os mesmos arquivos"
+    )
+    parser.add_argument(
+        "--arrow", action="store_true", default=MMAP_ATIVO,
+        help="publica também <recurso>.arrow (Arrow IPC para memory-map com DATASETS_MMAP=1)"
+    )
+    args = parser.parse_args()
+    desconhecidos = set(args.recursos) - set(CSVS)
+    if desconhecidos:
+        parser.error(f"recurso(s) desconhecido(s): {sorted(desconhecidos)}")
+    asyncio.run(main_async(args))
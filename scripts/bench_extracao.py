@@ -0,0 +1,143 @@
+# scripts/bench_extracao.py
+
+import argparse
+import os
+import random
+import sys
+import time
+
+from bs4 import BeautifulSoup
+
+# ────────────────────────────────────────────────────────────────────────────────
+# Garante que o diretório raiz do projeto esteja no PYTHONPATH
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+# ────────────────────────────────────────────────────────────────────────────────
+
+from app.ingestion.extracao import extrair_hierarquia, extrair_paises, mapear_em_processos  # noqa: E402
+
+
+# ─── Parser anterior (BeautifulSoup + html.parser), como referência ────────────
+def hierarquia_bs4(html):
+    tabela = BeautifulSoup(html, 'html.parser').find('table', {'class': 'tb_base tb_dados'})
+    if not tabela:
+        return None
+    linhas, categoria_atual = [], None
+    for linha in tabela.find_all('tr'):
+        colunas = linha.find_all('td')
+        if not colunas:
+            continue
+        classes = colunas[0].get('class', [])
+        if 'tb_item' in classes:
+            categoria_atual = colunas[0].text.strip()
+            linhas.append((categoria_atual, "-", [col.text.strip() for col in colunas[1:]]))
+        elif 'tb_subitem' in classes:
+            linhas.append((categoria_atual, colunas[0].text.strip(), [col.text.strip() for col in colunas[1:]]))
+    return linhas
+
+
+def paises_bs4(html):
+    tabela = BeautifulSoup(html, 'html.parser').find('table', {'class': 'tb_base tb_dados'})
+    if not tabela:
+        return None
+    return [
+        (colunas[0].text.strip(), colunas[1].text.strip(), colunas[2].text.strip())
+        for colunas in (linha.find_all('td') for linha in tabela.find_all('tr'))
+        if colunas
+    ]
+
+
+# ─── Páginas sintéticas no formato do site ──────────────────────────────────────
+def _moldura(tabela, linhas_menu=40):
+    """Envolve a tabela no “resto” da página (cabeçalho, menus, rodapé), como no site."""
+    menu = "".join(
+        f'<tr><td><a href="index.php?opcao=opt_0{i % 7 + 1}" class="btn_opt">Opção {i}</a></td></tr>'
+        for i in range(linhas_menu)
+    )
+    return (
+        "<html><head><meta charset='utf-8'><title>Banco de dados de uva, vinho e derivados</title></head><body>"
+        f"<table class='tb_base tb_header'>{menu}</table>"
+        f"<div class='content_center'><p class='text_center'>Produção de vinhos, sucos e derivados - [2020]</p>"
+        f"{tabela}</div><div class='footer'>Embrapa Uva e Vinho</div></body></html>"
+    )
+
+
+def pagina_hierarquia(categorias=10, produtos=12, semente=0):
+    aleatorio = random.Random(semente)
+    corpo = []
+    for c in range(categorias):
+        corpo.append(f'<tr><td class="tb_item">\n  CATEGORIA {c}\n</td><td class="tb_item">{aleatorio.randint(0, 10**9):,}</td></tr>'.replace(",", "."))
+        for p in range(produtos):
+            valor = "-" if aleatorio.random() < 0.1 else f"{aleatorio.randint(0, 10**7):,}".replace(",", ".")
+            corpo.append(f'<tr><td class="tb_subitem">  Produto {c}.{p} &amp; cia</td><td class="tb_subitem">{valor}</td></tr>')
+    tabela = (
+        '<table class="tb_base tb_dados"><thead><tr><th>Produto</th><th>Quantidade (L.)</th></tr></thead>'
+        f'<tbody>{"".join(corpo)}</tbody>'
+        '<tfoot class="tb_total"><tr><td>Total</td><td>123.456</td></tr></tfoot></table>'
+    )
+    return _moldura(tabela)
+
+
+def pagina_paises(paises=130, semente=0):
+    aleatorio = random.Random(semente)
+    corpo = "".join(
+        f'<tr><td>País {i}</td><td>{aleatorio.randint(0, 10**6):,}</td><td>{aleatorio.randint(0, 10**6):,}</td></tr>'.replace(",", ".")
+        for i in range(paises)
+    )
+    tabela = (
+        '<table class="tb_base tb_dados"><thead><tr><th>Países</th><th>Quantidade (Kg)</th><th>Valor (US$)</th></tr></thead>'
+        f'<tbody>{corpo}</tbody>'
+        '<tfoot class="tb_total"><tr><td>Total</td><td>1.000</td><td>2.000</td></tr></tfoot></table>'
+    )
+    return _moldura(tabela)
+
+
+# ─── Medição ────────────────────────────────────────────────────────────────────
+def _cronometrar(funcao, paginas, repeticoes):
+    melhor = float("inf")
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        for html in paginas:
+            funcao(html)
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return melhor / len(paginas) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compara a extração lxml/XPath (app.ingestion.extracao) com o parser BeautifulSoup anterior"
+    )
+    parser.add_argument("--paginas", type=int, default=50, help="páginas sintéticas de cada tipo")
+    parser.add_argument("--repeticoes", type=int, default=3)
+    parser.add_argument("--processos", type=int, default=os.cpu_count() or 1, help="processos do teste de lote")
+    parser.add_argument("--html", nargs="*", default=[], help="páginas reais salvas do site (hierarquia)")
+    args = parser.parse_args()
+
+    casos = {
+        "hierarquia": ([pagina_hierarquia(semente=i) for i in range(args.paginas)], hierarquia_bs4, extrair_hierarquia),
+        "paises": ([pagina_paises(semente=i) for i in range(args.paginas)], paises_bs4, extrair_paises),
+    }
+    if args.html:
+        reais = [open(caminho, encoding="utf-8", errors="replace").read() for caminho in args.html]
+        casos["hierarquia (arquivos)"] = (reais, hierarquia_bs4, extrair_hierarquia)
+
+    for nome, (paginas, antigo, novo) in casos.items():
+        divergentes = sum(1 for html in paginas if antigo(html) != novo(html))
+        ms_antigo = _cronometrar(antigo, paginas, args.repeticoes)
+        ms_novo = _cronometrar(novo, paginas, args.repeticoes)
+        print(
+            f"{nome:>22}: bs4/html.parser {ms_antigo:7.2f} ms/página | lxml {ms_novo:6.2f} ms/página "
+            f"| {ms_antigo / ms_novo:5.1f}x | divergências: {divergentes}"
+        )
+
+    # Lote (como num crawl completo): serial vs pool de processos
+    lote = [(html,) for html in casos["hierarquia"][0] * 4]
+    for processos in (1, args.processos):
+        inicio = time.perf_counter()
+        mapear_em_processos(extrair_hierarquia, lote, processos)
+        print(f"{'lote':>22}: {len(lote)} páginas em {processos} processo(s): {time.perf_counter() - inicio:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
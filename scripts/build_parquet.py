@@ -0,0 +1,51 @@
+# scripts/build_parquet.py
+
+import argparse
+import os
+import sys
+import time
+
+# ────────────────────────────────────────────────────────────────────────────────
+# Garante que o diretório raiz do projeto esteja no PYTHONPATH
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+# ────────────────────────────────────────────────────────────────────────────────
+
+# Importar os módulos CRUD registra cada CSV (e sua normalização) no STORE
+import app.crud.producao        # noqa: E402,F401
+import app.crud.processamento   # noqa: E402,F401
+import app.crud.comercializacao # noqa: E402,F401
+import app.crud.importacao      # noqa: E402,F401
+import app.crud.exportacao      # noqa: E402,F401
+from app.core.artefatos import ARTEFATOS_DIR  # noqa: E402
+from app.core.store import STORE  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Gera data/parquet/<recurso>.parquet (normalizado, tipado, ordenado por ano) + manifest.json"
+    )
+    parser.add_argument("recursos", nargs="*", help="recursos a gerar (padrão: todos)")
+    parser.add_argument("--saida", default=ARTEFATOS_DIR, help="diretório de saída")
+    parser.add_argument(
+        "--arrow", action="store_true",
+        help="grava também <recurso>.arrow (Arrow IPC para memory-map com DATASETS_MMAP=1)"
+    )
+    args = parser.parse_args()
+
+    recursos = args.recursos or STORE.nomes()
+    for nome in recursos:
+        inicio = time.perf_counter()
+        entrada = STORE.construir_artefato(nome, args.saida, args.arrow)
+        ms = (time.perf_counter() - inicio) * 1000
+        arquivos = entrada["parquet"] + (f" + {entrada['arrow']}" if "arrow" in entrada else "")
+        print(
+            f"✔ {nome}: {entrada['linhas']} linhas → {arquivos} "
+            f"(csv sha256 {entrada['csv_sha256'][:12]}…, {ms:.0f} ms)"
+        )
+    print(f"\nManifesto: {os.path.join(args.saida, 'manifest.json')}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,32 @@
+# tests/conftest.py
+
+import httpx
+import pytest
+
+from app.core import http
+from app.main import app, verify_token
+
+
+def _rede_bloqueada(request: httpx.Request) -> httpx.Response:
+    raise httpx.ConnectError("Rede bloqueada nos testes", request=request)
+
+
+@pytest.fixture(autouse=True)
+def sem_rede(monkeypatch):
+    """
+    Nenhum teste fala com o site da Embrapa: toda chamada ao vivo (baixar,
+    sondar) falha na hora, e as rotas de dados respondem do fallback (STORE)
+    — comparações entre a listagem e /export, /aggregate, /ranking ficam
+    determinísticas com ou sem acesso à rede.
+    """
+    cliente = httpx.AsyncClient(transport=httpx.MockTransport(_rede_bloqueada))
+    monkeypatch.setattr(http, "obter_cliente", lambda: cliente)
+    yield
+
+
+@pytest.fixture
+def sem_autenticacao():
+    """Dispensa o JWT nas rotas de dados (para testar só o comportamento da rota)."""
+    app.dependency_overrides[verify_token] = lambda: "teste"
+    yield
+    app.dependency_overrides.pop(verify_token, None)
@@ -0,0 +1,39 @@
+# tests/test_agregacao.py
+
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+from app.main import app
+
+client = TestClient(app)
+
+pytestmark = pytest.mark.usefixtures("sem_autenticacao")
+
+
+def test_aggregate_igual_ao_groupby_no_cliente():
+    listagem = client.get("/exportacao/?ano=2020")
+    # Sem rede (conftest): a listagem vem do mesmo STORE que o /aggregate
+    assert listagem.headers["X-Fonte-Dados"] == "fallback"
+    registros = pd.DataFrame(listagem.json())
+    esperado = (
+        registros.groupby(["ano", "paises"])[["quantidade", "valor_us"]]
+        .sum()
+        .reset_index()
+    )
+
+    params = {"group_by": "ano,paises", "metric": "quantidade,valor_us", "agg": "sum", "ano": 2020}
+    resp = client.get("/exportacao/aggregate", params=params)
+    assert resp.status_code == 200
+    pd.testing.assert_frame_equal(pd.DataFrame(resp.json()), esperado)
+
+    # Mesma consulta, mesma versão dos dados → bytes do cache
+    assert client.get("/exportacao/aggregate", params=params).headers["x-cache"] == "HIT"
+
+
+@pytest.mark.parametrize("params", [
+    {"agg": "median"},
+    {"group_by": "inexistente"},
+    {"metric": "paises"},
+])
+def test_aggregate_parametros_invalidos(params):
+    assert client.get("/exportacao/aggregate", params=params).status_code == 400
@@ -0,0 +1,103 @@
+# tests/test_artefatos.py
+
+import os
+
+import pandas as pd
+
+from app.core.artefatos import ler_manifesto
+from app.core.store import DatasetStore
+
+
+def _store(tmp_path, csv, chamadas):
+    def normalizar(df):
+        chamadas.append(1)
+        return df.rename(columns={"Ano": "ano", "Quantidade": "quantidade"})
+
+    store = DatasetStore(artefatos_dir=str(tmp_path / "parquet"))
+    store.registrar("recurso", str(csv), normalizar)
+    return store
+
+
+def _tocar(caminho):
+    st = os.stat(caminho)
+    os.utime(caminho, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+
+
+def test_carrega_do_parquet_quando_corresponde_ao_csv(tmp_path):
+    csv = tmp_path / "recurso.csv"
+    csv.write_text("Ano,Quantidade\n1971,10\n1970,1\n")
+    chamadas = []
+
+    construtor = _store(tmp_path, csv, chamadas)
+    entrada = construtor.construir_artefato("recurso")
+    assert entrada["linhas"] == 2
+    assert ler_manifesto(str(tmp_path / "parquet"))["recurso"]["csv_sha256"] == entrada["csv_sha256"]
+
+    chamadas.clear()
+    dataset = _store(tmp_path, csv, chamadas).obter("recurso")
+    assert chamadas == []  # nada de read_csv + normalização
+    assert dataset.frame["ano"].tolist() == [1970, 1971]
+    assert dataset.por_ano(1971)["quantidade"].tolist() == [10]
+
+    # mtime mudou mas o conteúdo é o mesmo (ex.: git checkout) → confere sha256 e usa o Parquet
+    _tocar(csv)
+    _store(tmp_path, csv, chamadas).obter("recurso")
+    assert chamadas == []
+
+
+def test_csv_alterado_ignora_parquet_desatualizado(tmp_path):
+    csv = tmp_path / "recurso.csv"
+    csv.write_text("Ano,Quantidade\n1970,1\n")
+    chamadas = []
+    _store(tmp_path, csv, chamadas).construir_artefato("recurso")
+
+    csv.write_text("Ano,Quantidade\n1970,9\n")  # mesmo tamanho, conteúdo diferente
+    _tocar(csv)
+
+    chamadas.clear()
+    dataset = _store(tmp_path, csv, chamadas).obter("recurso")
+    assert chamadas == [1]
+    pd.testing.assert_series_equal(
+        dataset.frame["quantidade"], pd.Series([9], name="quantidade")
+    )
+
+
+def test_mmap_arrow_compartilha_paginas_e_troca_atomicamente(tmp_path):
+    csv = tmp_path / "recurso.csv"
+    csv.write_text("Ano,Quantidade\n1971,10.0\n1970,1.0\n")
+    chamadas = []
+    _store(tmp_path, csv, chamadas).construir_artefato("recurso", arrow=True)
+
+    store = DatasetStore(artefatos_dir=str(tmp_path / "parquet"), mmap=True)
+    store.registrar("recurso", str(csv), lambda df: df)
+    antigo = store.obter("recurso")
+    quantidade = antigo.frame["quantidade"].to_numpy()
+    # Coluna numérica é uma view (somente leitura) sobre o arquivo mapeado
+    assert not quantidade.flags.owndata and not quantidade.flags.writeable
+    assert antigo.frame["ano"].tolist() == [1970, 1971]
+
+    # Nova publicação substitui o .arrow atomicamente; o snapshot já mapeado segue íntegro
+    csv.write_text("Ano,Quantidade\n1971,20.0\n1970,2.0\n")
+    _tocar(csv)
+    _store(tmp_path, csv, chamadas).construir_artefato("recurso", arrow=True)
+
+    novo = store.obter("recurso")
+    assert novo.frame["quantidade"].tolist() == [2.0, 20.0]
+    assert antigo.frame["quantidade"].tolist() == [1.0, 10.0]
+
+
+def test_artefato_publicado_depois_da_carga_e_adotado(tmp_path):
+    csv = tmp_path / "recurso.csv"
+    csv.write_text("Ano,Quantidade\n1971,10\n1970,1\n")
+    chamadas = []
+    store = _store(tmp_path, csv, chamadas)
+    antigo = store.obter("recurso")  # ainda sem artefato: leu o CSV
+    assert chamadas == [1]
+
+    # O CSV não mudou, mas o artefato foi (re)publicado: o worker passa a usá-lo
+    _store(tmp_path, csv, []).construir_artefato("recurso")
+    chamadas.clear()
+    novo = store.obter("recurso")
+    assert novo is not antigo and chamadas == []
+    assert novo.versao == antigo.versao
+    assert store.obter("recurso") is novo
@@ -0,0 +1,55 @@
+# tests/test_batch.py
+
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.routers import batch
+
+client = TestClient(app)
+
+pytestmark = pytest.mark.usefixtures("sem_autenticacao")
+
+CONSULTAS = [
+    {"recurso": "producao", "ano": 1970},
+    {"recurso": "exportacao", "ano": 1970, "opcao": ["Espumantes"], "limit": 5},
+    {"recurso": "nao_existe"},
+    {"recurso": "producao", "ano_inicio": 1980, "ano_fim": 1970},
+]
+
+
+def test_lote_na_ordem_do_pedido_com_erros_por_consulta():
+    resp = client.post("/batch", json={"consultas": CONSULTAS})
+    assert resp.status_code == 200, resp.text
+    resultados = resp.json()
+    assert [r["indice"] for r in resultados] == [0, 1, 2, 3]
+    assert [r["status"] for r in resultados] == [200, 200, 404, 400]
+
+    # Mesmos dados de GET /{recurso}/ quando a resposta vem do fallback
+    producao = resultados[0]
+    assert producao["fonte"] == "fallback"
+    avulsa = client.get("/producao/?ano=1970")
+    if avulsa.headers["X-Fonte-Dados"] == "fallback":
+        assert producao["dados"] == avulsa.json()
+
+    espumantes = resultados[1]["dados"]
+    assert len(espumantes) == 5 and {r["opcao"] for r in espumantes} == {"Espumantes"}
+    assert resultados[1]["proximo_cursor"] is not None
+
+
+def test_stream_entrega_uma_linha_por_consulta():
+    resp = client.post("/batch?stream=true", json={"consultas": CONSULTAS})
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("application/x-ndjson")
+    linhas = [json.loads(linha) for linha in resp.text.splitlines()]
+    assert sorted(r["indice"] for r in linhas) == [0, 1, 2, 3]
+    assert {r["indice"]: r["status"] for r in linhas} == {0: 200, 1: 200, 2: 404, 3: 400}
+
+
+def test_limite_do_lote(monkeypatch):
+    monkeypatch.setattr(batch, "BATCH_MAX", 2)
+    resp = client.post("/batch", json={"consultas": CONSULTAS})
+    assert resp.status_code == 413
+    assert client.post("/batch", json={"consultas": []}).status_code == 422
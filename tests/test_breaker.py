@@ -0,0 +1,54 @@
+# tests/test_breaker.py
+
+import asyncio
+
+import pytest
+
+from app.core.breaker import CircuitBreaker, CircuitoAberto
+
+
+async def _falha():
+    raise ConnectionError("upstream fora do ar")
+
+
+async def _ok():
+    return "ok"
+
+
+def test_abre_apos_n_falhas_e_fecha_apos_sonda_bem_sucedida():
+    async def cenario():
+        breaker = CircuitBreaker("teste", limite_falhas=2, cooldown=60)
+
+        for _ in range(2):
+            with pytest.raises(ConnectionError):
+                await breaker.chamar(_falha)
+        assert breaker.estado == "aberto"
+
+        # Aberto: nem tenta o upstream
+        with pytest.raises(CircuitoAberto):
+            await breaker.chamar(_ok)
+
+        # Cooldown vencido → meio-aberto, só uma sonda passa
+        breaker.cooldown = 0
+        assert breaker.permite() is True
+        assert breaker.estado == "meio_aberto"
+        assert breaker.permite() is False
+        breaker.registrar_sucesso()
+
+        assert breaker.estado == "fechado"
+        assert await breaker.chamar(_ok) == "ok"
+
+    asyncio.run(cenario())
+
+
+def test_sonda_com_falha_reabre_o_circuito():
+    async def cenario():
+        breaker = CircuitBreaker("teste", limite_falhas=1, cooldown=0)
+        with pytest.raises(ConnectionError):
+            await breaker.chamar(_falha)
+        with pytest.raises(ConnectionError):
+            await breaker.chamar(_falha)  # sonda do meio-aberto
+        assert breaker.estado == "aberto"
+        assert breaker.status()["falhas_consecutivas"] == 2
+
+    asyncio.run(cenario())
@@ -0,0 +1,118 @@
+# tests/test_cache.py
+
+import asyncio
+
+import pandas as pd
+import pytest
+
+from app.core.cache import LiveCache
+
+
+def test_live_cache_fresh_stale_e_uma_unica_atualizacao():
+    chamadas = []
+
+    async def carregar():
+        chamadas.append(1)
+        await asyncio.sleep(0.01)
+        return pd.DataFrame({"ano": [len(chamadas)]})
+
+    async def cenario():
+        cache = LiveCache(ttl=60, max_stale=3600)
+
+        primeiro = await cache.obter(("producao", None), carregar)
+        assert primeiro.fonte == "fresh"
+        assert (await cache.obter(("producao", None), carregar)).fonte == "fresh"
+        assert len(chamadas) == 1
+
+        # Expira o TTL: serve o frame antigo e agenda UMA atualização
+        cache.ttl = 0
+        respostas = await asyncio.gather(
+            *(cache.obter(("producao", None), carregar) for _ in range(5))
+        )
+        assert {r.fonte for r in respostas} == {"stale"}
+        assert all(r.frame["ano"].tolist() == [1] for r in respostas)
+
+        await asyncio.sleep(0.05)
+        assert len(chamadas) == 2
+        cache.ttl = 60
+        atualizado = await cache.obter(("producao", None), carregar)
+        assert atualizado.frame["ano"].tolist() == [2]
+
+    asyncio.run(cenario())
+
+
+def test_carga_fria_continua_se_quem_esperava_desistir():
+    async def carregar():
+        await asyncio.sleep(0.05)
+        return pd.DataFrame({"ano": [2020]})
+
+    async def cenario():
+        cache = LiveCache(ttl=60, max_stale=3600)
+        espera = asyncio.ensure_future(cache.obter(("producao", 2020), carregar))
+        await asyncio.sleep(0.01)
+        espera.cancel()
+        await asyncio.gather(espera, return_exceptions=True)
+
+        await asyncio.sleep(0.1)
+        assert cache.espiar(("producao", 2020)) is not None
+
+    asyncio.run(cenario())
+
+
+def test_breaker_conta_a_carga_inteira_e_nao_cada_pagina():
+    from app.core.breaker import CircuitBreaker, CircuitoAberto
+
+    falhar = [True]
+
+    async def pagina(sub):
+        await asyncio.sleep(0.01)
+        if falhar[0] and sub == 3:
+            raise ConnectionError("503")
+        return sub
+
+    async def carregar():
+        # Como obter_ano: várias páginas baixadas juntas
+        paginas = await asyncio.gather(*(pagina(sub) for sub in range(5)))
+        return pd.DataFrame({"ano": paginas})
+
+    async def cenario():
+        breaker = CircuitBreaker("teste", limite_falhas=2, cooldown=60)
+        cache = LiveCache(ttl=60, max_stale=3600, breaker=breaker)
+
+        with pytest.raises(ConnectionError):
+            await cache.obter(("exportacao", 2020), carregar)
+        assert breaker.estado == "fechado" and breaker.falhas_consecutivas == 1
+
+        with pytest.raises(ConnectionError):
+            await cache.obter(("exportacao", 2021), carregar)
+        assert breaker.estado == "aberto"
+        with pytest.raises(CircuitoAberto):
+            await cache.obter(("exportacao", 2022), carregar)
+
+        # Meio-aberto: a sonda é a busca inteira, com todas as páginas
+        breaker.cooldown = 0
+        falhar[0] = False
+        resultado = await cache.obter(("exportacao", 2022), carregar)
+        assert resultado.frame["ano"].tolist() == [0, 1, 2, 3, 4]
+        assert breaker.estado == "fechado"
+
+    asyncio.run(cenario())
+
+
+def test_byte_cache_limita_bytes_e_descarta_versoes_antigas():
+    from app.core.cache import ByteCache, RespostaSerializada
+
+    cache = ByteCache(max_bytes=10)
+    cache.guardar(("producao", None), "v1", "a", RespostaSerializada(b"12345"))
+    cache.guardar(("producao", None), "v1", "b", RespostaSerializada(b"12345"))
+    assert cache.obter(("producao", None), "v1", "a") is not None  # "a" vira o mais recente
+
+    # Estoura o limite: sai o menos usado recentemente ("b")
+    cache.guardar(("producao", None), "v1", "c", RespostaSerializada(b"123"))
+    assert cache.obter(("producao", None), "v1", "b") is None
+    assert cache.total_bytes <= 10
+
+    # Nova versão do mesmo escopo: as entradas da versão antiga saem
+    cache.guardar(("producao", None), "v2", "a", RespostaSerializada(b"1"))
+    assert cache.obter(("producao", None), "v1", "a") is None
+    assert cache.total_bytes == 1
@@ -0,0 +1,39 @@
+# tests/test_condicional.py
+
+import pytest
+from fastapi.testclient import TestClient
+from app.main import app
+
+client = TestClient(app)
+
+pytestmark = pytest.mark.usefixtures("sem_autenticacao")
+
+
+def test_resposta_traz_validadores_e_cache_control():
+    resp = client.get("/producao/?ano=1970")
+    assert resp.status_code == 200
+    assert resp.headers["ETag"].startswith('W/"')
+    assert "Last-Modified" in resp.headers
+    assert "Cache-Control" in resp.headers
+
+
+def test_if_none_match_igual_retorna_304_sem_corpo():
+    etag = client.get("/producao/?ano=1970").headers["ETag"]
+    resp = client.get("/producao/?ano=1970", headers={"If-None-Match": etag})
+    assert resp.status_code == 304
+    assert resp.content == b""
+    assert resp.headers["ETag"] == etag
+
+
+def test_etag_depende_da_consulta():
+    etag = client.get("/producao/?ano=1970").headers["ETag"]
+    resp = client.get("/producao/?ano=1971", headers={"If-None-Match": etag})
+    assert resp.status_code == 200
+
+
+def test_if_modified_since():
+    ultima = client.get("/producao/?ano=1970").headers["Last-Modified"]
+    resp = client.get("/producao/?ano=1970", headers={"If-Modified-Since": ultima})
+    assert resp.status_code == 304
+    antiga = "Mon, 01 Jan 1990 00:00:00 GMT"
+    assert client.get("/producao/?ano=1970", headers={"If-Modified-Since": antiga}).status_code == 200
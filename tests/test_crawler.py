@@ -0,0 +1,82 @@
+# tests/test_crawler.py
+
+import asyncio
+import time
+
+import httpx
+
+from app.ingestion.crawler import Crawler, TokenBucket
+from data.scrape_to_csv import crawl, montar_paginas
+
+TABELA_PAISES = """
+<table class="tb_base tb_dados"><tbody>
+  <tr><td>Alemanha</td><td>{q}</td><td>10</td></tr>
+  <tr><td>Chile</td><td>5</td><td>7</td></tr>
+</tbody></table>
+"""
+
+
+def _crawler(handler, **kwargs):
+    cliente = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    kwargs.setdefault("backoff", 0.001)
+    return Crawler(cliente=cliente, **kwargs)
+
+
+def test_tenta_de_novo_em_503_e_registra_estatisticas():
+    chamadas = []
+
+    def handler(request):
+        chamadas.append(request.url)
+        if len(chamadas) < 3:
+            return httpx.Response(503)
+        return httpx.Response(200, text="ok")
+
+    async def cenario():
+        async with _crawler(handler, tentativas=4) as crawler:
+            resposta = await crawler.baixar("http://exemplo/pagina")
+        return resposta, crawler.resumo()
+
+    resposta, resumo = asyncio.run(cenario())
+    assert resposta.status_code == 200
+    assert len(chamadas) == 3
+    assert resumo["paginas"] == 1 and resumo["novas_tentativas"] == 2 and resumo["erros"] == 0
+
+
+def test_desiste_apos_esgotar_tentativas():
+    async def cenario():
+        async with _crawler(lambda request: httpx.Response(500), tentativas=2) as crawler:
+            return await crawler.baixar("http://exemplo/pagina"), crawler.resumo()
+
+    resposta, resumo = asyncio.run(cenario())
+    assert resposta is None
+    assert resumo["erros"] == 1
+
+
+def test_token_bucket_limita_a_taxa():
+    async def cenario():
+        bucket = TokenBucket(taxa=50, capacidade=1)
+        inicio = time.monotonic()
+        for _ in range(6):
+            await bucket.aguardar()
+        return time.monotonic() - inicio
+
+    # 1 ficha de saída + 5 esperas de 1/50 s
+    assert asyncio.run(cenario()) >= 0.09
+
+
+def test_crawl_preserva_a_ordem_da_versao_serial():
+    def handler(request):
+        ano = request.url.params["ano"]
+        return httpx.Response(200, text=TABELA_PAISES.format(q=ano))
+
+    paginas = montar_paginas(range(1970, 1972), ["exportacao"])
+
+    async def cenario():
+        async with _crawler(handler, concorrencia=4, taxa_padrao=1000, rajada=100) as crawler:
+            return await crawl(paginas, crawler)
+
+    linhas = asyncio.run(cenario())["exportacao"]
+    assert len(linhas) == 2 * 4 * 2  # anos × subopções × países
+    assert linhas[0] == ["Vinhos de mesa", 1970, "Alemanha", "1970", "10"]
+    assert linhas[2][0] == "Espumantes"
+    assert linhas[8][1] == 1971
@@ -0,0 +1,54 @@
+# tests/test_download.py
+
+import asyncio
+
+from app.crud.producao import _normalizar_fallback as normalizar_producao
+from app.ingestion.download import ARQUIVOS_LARGOS, obter_longo
+
+PRODUCAO = (
+    "id;control;produto;1970;1971\n"
+    "1;VINHO DE MESA;VINHO DE MESA;217208604;300\n"
+    "2;vm_Tinto;Tinto;174224052;nd\n"
+    "3;SUCO;SUCO;0;10\n"
+    "4;su_Uva;Uva;5;10\n"
+)
+PROCESSAMENTO = "id\tcontrol\tcultivar\t1970\t1971\n1\tTINTAS\tTINTAS\t10\t20\n2\tti_Alicante\tAlicante\t10\t20\n"
+PAISES = "Id;País;1970;1970;1971;1971\n1;Africa do Sul;0;0;10;20\n2;Alemanha;52297;30498;1;2\n"
+
+
+def _pasta(tmp_path, recurso, conteudo):
+    for _, arquivo in ARQUIVOS_LARGOS[recurso]:
+        (tmp_path / arquivo).write_text(conteudo, encoding="utf-8")
+    return str(tmp_path)
+
+
+def test_hierarquia_derretida_no_formato_do_fallback(tmp_path):
+    longo = asyncio.run(obter_longo("producao", _pasta(tmp_path, "producao", PRODUCAO)))
+    assert longo.columns.tolist() == ["Ano", "Categoria", "Produto", "Quantidade(L.)"]
+    assert longo.values.tolist()[:4] == [
+        ["1970", "VINHO DE MESA", "-", "217.208.604"],
+        ["1970", "VINHO DE MESA", "Tinto", "174.224.052"],
+        ["1970", "SUCO", "-", "-"],
+        ["1970", "SUCO", "Uva", "5"],
+    ]
+    normalizado = normalizar_producao(longo)
+    assert normalizado.loc[normalizado["ano"] == 1971, "quantidade"].tolist() == [300.0, 0.0, 10.0, 10.0]
+
+
+def test_subopcoes_intercaladas_por_ano(tmp_path):
+    longo = asyncio.run(obter_longo("processamento", _pasta(tmp_path, "processamento", PROCESSAMENTO)))
+    anos_opcoes = list(dict.fromkeys(zip(longo["Ano"], longo["Opção"])))
+    assert anos_opcoes == [(ano, opcao) for ano in ("1970", "1971") for opcao, _ in ARQUIVOS_LARGOS["processamento"]]
+
+
+def test_paises_com_quantidade_valor_e_total(tmp_path):
+    longo = asyncio.run(obter_longo("importacao", _pasta(tmp_path, "importacao", PAISES)))
+    vinhos = longo[longo["Opção"] == "Vinhos de mesa"]
+    assert vinhos.values.tolist() == [
+        ["Vinhos de mesa", "1970", "Africa do Sul", "-", "-"],
+        ["Vinhos de mesa", "1970", "Alemanha", "52.297", "30.498"],
+        ["Vinhos de mesa", "1970", "Total", "52.297", "30.498"],
+        ["Vinhos de mesa", "1971", "Africa do Sul", "10", "20"],
+        ["Vinhos de mesa", "1971", "Alemanha", "1", "2"],
+        ["Vinhos de mesa", "1971", "Total", "11", "22"],
+    ]
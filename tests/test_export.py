@@ -0,0 +1,35 @@
+# tests/test_export.py
+
+import io
+import json
+
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+from app.main import app
+
+client = TestClient(app)
+
+pytestmark = pytest.mark.usefixtures("sem_autenticacao")
+
+
+def test_export_ndjson_igual_a_listagem():
+    listagem = client.get("/importacao/?ano=1970")
+    # Sem rede (conftest), a listagem vem do mesmo STORE que o /export
+    assert listagem.headers["X-Fonte-Dados"] == "fallback"
+    resp = client.get("/importacao/export", params={"format": "ndjson", "ano": 1970})
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("application/x-ndjson")
+    assert [json.loads(linha) for linha in resp.text.splitlines()] == listagem.json()
+
+
+def test_export_csv_tem_um_unico_cabecalho():
+    resp = client.get("/producao/export", params={"format": "csv"})
+    assert resp.status_code == 200
+    df = pd.read_csv(io.StringIO(resp.text))
+    assert list(df.columns) == ["ano", "categoria", "produto", "quantidade"]
+    assert len(df) == len(client.get("/producao/").json())
+
+
+def test_export_formato_invalido():
+    assert client.get("/producao/export", params={"format": "xml"}).status_code == 400
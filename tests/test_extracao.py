@@ -0,0 +1,44 @@
+# tests/test_extracao.py
+
+from app.ingestion.extracao import extrair_hierarquia, extrair_paises, mapear_em_processos
+from scripts.bench_extracao import hierarquia_bs4, pagina_hierarquia, pagina_paises, paises_bs4
+
+
+def test_mesmas_linhas_que_o_parser_bs4():
+    for semente in range(3):
+        html = pagina_hierarquia(categorias=4, produtos=5, semente=semente)
+        assert extrair_hierarquia(html) == hierarquia_bs4(html)
+        html = pagina_paises(paises=20, semente=semente)
+        assert extrair_paises(html) == paises_bs4(html)
+
+
+def test_hierarquia_e_linha_de_total():
+    html = pagina_hierarquia(categorias=2, produtos=1)
+    linhas = extrair_hierarquia(html)
+    assert [(c, p) for c, p, _ in linhas] == [
+        ("CATEGORIA 0", "-"), ("CATEGORIA 0", "Produto 0.0 & cia"),
+        ("CATEGORIA 1", "-"), ("CATEGORIA 1", "Produto 1.0 & cia"),
+    ]
+    # O total do tfoot fica fora da hierarquia, mas entra na tabela de países (como nos CSVs)
+    assert extrair_paises(pagina_paises(paises=2))[-1] == ("Total", "1.000", "2.000")
+
+
+def test_paises_pula_linhas_incompletas():
+    html = (
+        '<table class="tb_base tb_dados"><tbody>'
+        '<tr><td colspan="3">Dados sujeitos a revisão</td></tr>'
+        '<tr><td>Alemanha</td><td>10</td><td>20</td></tr>'
+        '<tr><td>Chile</td><td>5</td></tr>'
+        '</tbody></table>'
+    )
+    assert extrair_paises(html) == [("Alemanha", "10", "20")]
+
+
+def test_sem_tabela():
+    assert extrair_hierarquia("<html><body><p>Erro</p></body></html>") is None
+    assert extrair_paises("") is None
+
+
+def test_pool_de_processos_preserva_a_ordem():
+    paginas = [(pagina_paises(paises=3, semente=i),) for i in range(6)]
+    assert mapear_em_processos(extrair_paises, paginas, 2) == [extrair_paises(*p) for p in paginas]
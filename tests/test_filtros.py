@@ -0,0 +1,54 @@
+# tests/test_filtros.py
+
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.indices import Filtros, construir_indice, filtrar
+from app.main import app
+
+client = TestClient(app)
+
+
+def _frame():
+    return pd.DataFrame({
+        "ano": [1970, 1970, 1971, 1971, 1972, 1972, 1972, 1973, 1973, 1974],
+        "paises": ["A", "B", "A", "C", "B", "A", "C", "A", "B", "C"],
+        "opcao": ["x", "y", "x", "x", "y", "y", "x", "x", "y", "x"],
+        "quantidade": [float(i) for i in range(10)],
+    })
+
+
+@pytest.mark.parametrize("filtros", [
+    Filtros.criar(1971, 1973),
+    Filtros.criar(ano_inicio=1972),
+    Filtros.criar(colunas={"paises": ["A", "C"]}),
+    Filtros.criar(1971, None, {"paises": ["A", "B"], "opcao": ["x"]}),
+    Filtros.criar(colunas={"paises": ["Z"]}),
+])
+def test_indice_igual_a_mascara(filtros):
+    frame = _frame()
+    indice = construir_indice(frame)
+    pd.testing.assert_frame_equal(filtrar(frame, filtros, indice), filtrar(frame, filtros))
+
+    # Fatia de um ano (como Dataset.resultado(ano)): posições relativas ao frame completo
+    fatia = frame.iloc[4:7]
+    pd.testing.assert_frame_equal(filtrar(fatia, filtros, indice, inicio=4), filtrar(fatia, filtros))
+
+
+@pytest.mark.usefixtures("sem_autenticacao")
+def test_rota_combina_faixa_e_valores_repetidos():
+    # Sem rede (conftest): as duas chamadas vêm do mesmo snapshot do STORE, não dos dados atuais do site
+    listagem = client.get("/exportacao/")
+    assert listagem.headers["X-Fonte-Dados"] == "fallback"
+    todos = pd.DataFrame(listagem.json())
+    params = [("ano_inicio", 2010), ("ano_fim", 2015), ("paises", "China"), ("paises", "Japão")]
+    resp = client.get("/exportacao/", params=params)
+    assert resp.status_code == 200
+    assert resp.headers["X-Fonte-Dados"] == "fallback"
+
+    esperado = todos[todos["ano"].between(2010, 2015) & todos["paises"].isin(["China", "Japão"])]
+    assert resp.json() == esperado.to_dict(orient="records")
+
+    assert client.get("/producao/", params={"paises": "China"}).status_code == 400
+    assert client.get("/producao/", params={"ano_inicio": 2021, "ano_fim": 2020}).status_code == 400
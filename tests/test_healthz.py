@@ -0,0 +1,25 @@
+# tests/test_healthz.py
+
+from fastapi.testclient import TestClient
+from app.main import app
+
+client = TestClient(app)
+
+def test_liveness():
+    resp = client.get("/healthz/live")
+    assert resp.status_code == 200
+    assert resp.json() == {"status": "ok"}
+
+def test_readiness_com_csvs_presentes():
+    resp = client.get("/healthz/ready")
+    assert resp.status_code == 200, resp.text
+    assert all(v == "existe" for v in resp.json()["detalhe"].values())
+
+def test_healthz_devolve_resultado_em_cache():
+    """/healthz/ não faz rede: sem lifespan, as URLs ao vivo ficam 'pendente'."""
+    resp = client.get("/healthz/")
+    assert resp.status_code == 200
+    body = resp.json()
+    assert "idade_segundos" in body
+    assert "csv_producao" in body["detalhe"]
+    assert "live_producao" in body["detalhe"]
@@ -0,0 +1,49 @@
+# tests/test_hedge.py
+
+import asyncio
+import time
+
+import pandas as pd
+
+import app.crud.producao  # noqa: F401  (registra o recurso no STORE)
+from app.core.hedge import ao_vivo_ou_fallback
+from app.core.resultado import FONTE_FALLBACK, FONTE_FRESH, Resultado
+
+
+def _ao_vivo(atraso, eventos, erro=None):
+    async def buscar():
+        try:
+            await asyncio.sleep(atraso)
+        except asyncio.CancelledError:
+            eventos.append("cancelado")
+            raise
+        if erro is not None:
+            raise erro
+        return Resultado(frame=pd.DataFrame({"ano": [2020]}), fonte=FONTE_FRESH, versao="live-1", gerado_em=0)
+    return buscar
+
+
+def test_ao_vivo_dentro_do_orcamento():
+    eventos = []
+    resultado = asyncio.run(ao_vivo_ou_fallback("producao", 2020, _ao_vivo(0.01, eventos), limite=1))
+    assert resultado.fonte == FONTE_FRESH
+    assert eventos == []
+
+
+def test_ao_vivo_lento_perde_para_o_fallback_e_e_cancelado():
+    eventos = []
+    inicio = time.perf_counter()
+    resultado = asyncio.run(ao_vivo_ou_fallback("producao", 2020, _ao_vivo(5, eventos), limite=0.2))
+    assert time.perf_counter() - inicio < 1
+    assert resultado.fonte == FONTE_FALLBACK
+    assert set(resultado.frame["ano"]) == {2020}
+    assert eventos == ["cancelado"]
+
+
+def test_falha_ao_vivo_cai_no_fallback_sem_esperar():
+    inicio = time.perf_counter()
+    resultado = asyncio.run(
+        ao_vivo_ou_fallback("producao", None, _ao_vivo(0, [], erro=ValueError("fora")), limite=10)
+    )
+    assert resultado.fonte == FONTE_FALLBACK
+    assert time.perf_counter() - inicio < 2
@@ -0,0 +1,33 @@
+# tests/test_http.py
+
+import asyncio
+import threading
+
+from app.core import http
+from app.core.http import obter_cliente
+
+
+def test_troca_de_loop_fecha_o_cliente_antigo(monkeypatch):
+    monkeypatch.setattr(http, "_cliente", None)
+    monkeypatch.setattr(http, "_loop", None)
+
+    # Um loop que segue rodando em outra thread (ex.: servidor) cria o cliente
+    loop_antigo = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop_antigo.run_forever, daemon=True)
+    thread.start()
+
+    async def _obter():
+        return obter_cliente()
+
+    try:
+        antigo = asyncio.run_coroutine_threadsafe(_obter(), loop_antigo).result(5)
+
+        # Outro loop pede o cliente: ganha um novo, e o antigo é fechado no loop dele
+        novo = asyncio.run(_obter())
+        assert novo is not antigo
+        asyncio.run_coroutine_threadsafe(asyncio.sleep(0.05), loop_antigo).result(5)
+        assert antigo.is_closed
+    finally:
+        loop_antigo.call_soon_threadsafe(loop_antigo.stop)
+        thread.join(5)
+        loop_antigo.close()
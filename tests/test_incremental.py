@@ -0,0 +1,77 @@
+# tests/test_incremental.py
+
+import asyncio
+import os
+
+import httpx
+import pandas as pd
+
+from app.ingestion.crawler import Crawler
+from app.ingestion.incremental import ManifestoPaginas, Particoes
+from data.scrape_to_csv import atualizar_incremental, montar_paginas
+
+PAGINA = """
+<table class="tb_base tb_dados"><tbody>
+  <tr><td class="tb_item">VINHO DE MESA</td><td>{total}</td></tr>
+  <tr><td class="tb_subitem">Tinto</td><td>{tinto}</td></tr>
+</tbody></table>
+"""
+
+
+def _rodar(tmp_path, paginas_html, condicional=True):
+    """Uma execução incremental de producao contra um 'site' em memória; devolve (regravados, contagem, requisições)."""
+    requisicoes = []
+
+    def handler(request):
+        ano = int(request.url.params["ano"])
+        requisicoes.append(request)
+        etag = f'"{hash(paginas_html[ano])}"'
+        if condicional and request.headers.get("If-None-Match") == etag:
+            return httpx.Response(304, headers={"ETag": etag})
+        return httpx.Response(200, text=paginas_html[ano], headers={"ETag": etag} if condicional else {})
+
+    async def cenario():
+        cliente = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        particoes = Particoes(str(tmp_path / "particoes"))
+        manifesto = ManifestoPaginas(str(tmp_path / "particoes" / "manifest.json"))
+        async with Crawler(cliente=cliente, taxa_padrao=1000, rajada=100) as crawler:
+            return await atualizar_incremental(
+                montar_paginas([1970, 1971], ["producao"]), crawler, particoes, manifesto, str(tmp_path)
+            )
+
+    regravados, contagem = asyncio.run(cenario())
+    return regravados, contagem, requisicoes
+
+
+def test_so_regrava_as_particoes_alteradas(tmp_path):
+    site = {
+        1970: PAGINA.format(total="3", tinto="1"),
+        1971: PAGINA.format(total="5", tinto="2"),
+    }
+    regravados, contagem, _ = _rodar(tmp_path, site)
+    assert regravados == ["producao"] and contagem["alteradas"] == 2
+    csv = tmp_path / "producao.csv"
+    assert pd.read_csv(csv)["Quantidade(L.)"].tolist() == [3, 1, 5, 2]
+
+    # Nada mudou: o servidor responde 304 e nenhum arquivo é regravado
+    mtime = os.stat(csv).st_mtime_ns
+    regravados, contagem, requisicoes = _rodar(tmp_path, site)
+    assert regravados == [] and contagem["inalteradas"] == 2
+    assert all("If-None-Match" in r.headers for r in requisicoes)
+    assert os.stat(csv).st_mtime_ns == mtime
+
+    # Só 1971 mudou: só a partição de 1971 é regravada
+    particao_1970 = tmp_path / "particoes" / "producao" / "1970.csv"
+    mtime_1970 = os.stat(particao_1970).st_mtime_ns
+    site[1971] = PAGINA.format(total="9", tinto="4")
+    regravados, contagem, _ = _rodar(tmp_path, site)
+    assert contagem == {"inalteradas": 1, "alteradas": 1, "falhas": 0}
+    assert os.stat(particao_1970).st_mtime_ns == mtime_1970
+    assert pd.read_csv(csv)["Quantidade(L.)"].tolist() == [3, 1, 9, 4]
+
+
+def test_sem_validadores_compara_o_sha256(tmp_path):
+    site = {1970: PAGINA.format(total="3", tinto="1"), 1971: PAGINA.format(total="5", tinto="2")}
+    _rodar(tmp_path, site, condicional=False)
+    regravados, contagem, _ = _rodar(tmp_path, site, condicional=False)
+    assert regravados == [] and contagem["inalteradas"] == 2
@@ -0,0 +1,60 @@
+# tests/test_paginacao.py
+
+import pytest
+from fastapi.testclient import TestClient
+from app.main import app
+
+client = TestClient(app)
+
+pytestmark = pytest.mark.usefixtures("sem_autenticacao")
+
+
+def _proximo_cursor(resp):
+    return resp.headers.get("X-Proximo-Cursor")
+
+
+def test_paginas_cobrem_o_resultado_completo_sem_repetir():
+    completo = client.get("/producao/?ano=1970").json()
+
+    paginas, cursor = [], None
+    while True:
+        params = {"ano": 1970, "limit": 20}
+        if cursor:
+            params["cursor"] = cursor
+        resp = client.get("/producao/", params=params)
+        assert resp.status_code == 200, resp.text
+        assert len(resp.json()) <= 20
+        paginas.extend(resp.json())
+        cursor = _proximo_cursor(resp)
+        if cursor is None:
+            assert "Link" not in resp.headers
+            break
+        assert 'rel="next"' in resp.headers["Link"]
+
+    assert paginas == completo
+
+
+def test_cursor_invalido_retorna_400():
+    resp = client.get("/producao/", params={"limit": 10, "cursor": "nao-e-um-cursor"})
+    assert resp.status_code == 400
+
+
+def test_cursor_continua_na_fonte_em_que_foi_emitido(monkeypatch):
+    import pandas as pd
+    from app.core.resultado import FONTE_FRESH, Resultado
+    from app.routers import recurso
+
+    primeira = client.get("/producao/", params={"ano": 1970, "limit": 5})
+    if primeira.headers["X-Fonte-Dados"] != "fallback":
+        pytest.skip("página inicial não veio do fallback")
+    cursor = _proximo_cursor(primeira)
+
+    # A corrida agora seria ganha pelo ao vivo, com outra versão
+    async def ao_vivo(recurso_, ano):
+        return Resultado(frame=pd.DataFrame({"ano": [1970]}), fonte=FONTE_FRESH, versao="live-1", gerado_em=0)
+    monkeypatch.setattr(recurso, "_buscar", ao_vivo)
+
+    resp = client.get("/producao/", params={"ano": 1970, "limit": 5, "cursor": cursor})
+    assert resp.status_code == 200, resp.text
+    assert resp.headers["X-Fonte-Dados"] == "fallback"
+    assert len(resp.json()) == 5
@@ -0,0 +1,93 @@
+# tests/test_paginas.py
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from app.crud.importacao import _normalizar_fallback as normalizar_importacao
+from app.ingestion.paginas import SUBOPCOES, TabelaNaoEncontrada, obter_ano, url_pagina
+from scripts.bench_extracao import pagina_hierarquia, pagina_paises
+
+
+class _Site:
+    """'baixar' falso: uma página por subopção, com latência, contando os downloads simultâneos."""
+
+    def __init__(self, paginas, atraso=0.01):
+        self.paginas = paginas
+        self.atraso = atraso
+        self.em_andamento = 0
+        self.pico = 0
+        self.urls = []
+
+    async def __call__(self, url):
+        self.urls.append(url)
+        self.em_andamento += 1
+        self.pico = max(self.pico, self.em_andamento)
+        try:
+            await asyncio.sleep(self.atraso)
+            return SimpleNamespace(text=self.paginas(url))
+        finally:
+            self.em_andamento -= 1
+
+
+def test_subopcoes_juntadas_na_ordem_e_no_formato_do_fallback():
+    site = _Site(lambda url: pagina_paises(paises=2, semente=int(url[-1])))
+    frame = asyncio.run(obter_ano("importacao", 2020, baixar=site))
+    assert frame.columns.tolist() == ["Opção", "Ano", "Países", "Quantidade(Kg.)", "Valor (US$)"]
+    # País 0, País 1 e Total de cada subopção, na ordem das subopções
+    assert frame["Opção"].tolist() == [desc for desc in SUBOPCOES["importacao"].values() for _ in range(3)]
+    assert set(frame["Ano"]) == {2020}
+    assert sorted(site.urls) == sorted(url_pagina("importacao", 2020, sub) for sub in SUBOPCOES["importacao"])
+
+    normalizado = normalizar_importacao(frame)
+    assert normalizado.loc[normalizado["paises"] == "Total", "valor_us"].tolist() == [2000.0] * 5
+
+
+def test_downloads_simultaneos_limitados():
+    site = _Site(lambda url: pagina_hierarquia(categorias=1, produtos=1))
+    frame = asyncio.run(obter_ano("processamento", 2020, baixar=site, concorrencia=2))
+    assert site.pico == 2
+    assert len(frame) == 2 * len(SUBOPCOES["processamento"])
+
+    site = _Site(lambda url: pagina_hierarquia(categorias=1, produtos=1))
+    asyncio.run(obter_ano("processamento", 2020, baixar=site))
+    assert site.pico == len(SUBOPCOES["processamento"])
+
+
+def test_falha_em_uma_subopcao_derruba_a_busca():
+    async def baixar(url):
+        if url.endswith("subopt_03&ano=2020"):
+            raise RuntimeError("503")
+        return SimpleNamespace(text=pagina_paises(paises=1))
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(obter_ano("exportacao", 2020, baixar=baixar))
+
+
+def test_pagina_sem_tabela_derruba_a_busca():
+    # Uma subopção sem tabela não vira “zero linhas” em cache como se fosse dado ao vivo
+    site = _Site(lambda url: "<html><body>Erro</body></html>" if "subopt_02" in url else pagina_paises(paises=1))
+    with pytest.raises(TabelaNaoEncontrada):
+        asyncio.run(obter_ano("exportacao", 2020, baixar=site))
+
+
+def test_pagina_unica_com_marcadores_do_site():
+    from app.crud.producao import _normalizar_fallback as normalizar_producao
+
+    html = (
+        '<table class="tb_base tb_dados"><tbody>'
+        '<tr><td class="tb_item">VINHO DE MESA</td><td class="tb_item">1.234</td></tr>'
+        '<tr><td class="tb_subitem">Tinto</td><td class="tb_subitem">nd</td></tr>'
+        '<tr><td class="tb_subitem">Branco</td><td class="tb_subitem">*</td></tr>'
+        '</tbody></table>'
+    )
+    site = _Site(lambda url: html)
+    frame = asyncio.run(obter_ano("producao", 2020, baixar=site, normalizar=normalizar_producao))
+    assert site.urls == [url_pagina("producao", 2020)]
+    assert frame.columns.tolist() == ["ano", "categoria", "produto", "quantidade"]
+    assert frame.values.tolist() == [
+        [2020, "VINHO DE MESA", "-", 1234.0],
+        [2020, "VINHO DE MESA", "Tinto", 0.0],
+        [2020, "VINHO DE MESA", "Branco", 0.0],
+    ]
@@ -0,0 +1,45 @@
+# tests/test_ranking.py
+
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+from app.main import app
+
+client = TestClient(app)
+
+pytestmark = pytest.mark.usefixtures("sem_autenticacao")
+
+
+def test_ranking_igual_a_ordenar_no_cliente():
+    listagem = client.get("/exportacao/?ano=2020")
+    # Sem rede (conftest): a listagem vem do mesmo STORE em que os rankings são pré-calculados
+    assert listagem.headers["X-Fonte-Dados"] == "fallback"
+    registros = pd.DataFrame(listagem.json())
+    registros = registros[(registros["opcao"] == "Vinhos de mesa") & (registros["paises"] != "Total")]
+    esperado = registros.sort_values(["valor_us", "paises"], ascending=[False, True]).head(5)
+
+    resp = client.get(
+        "/exportacao/ranking",
+        params={"ano": 2020, "opcao": "Vinhos de mesa", "metric": "valor_us", "n": 5},
+    )
+    assert resp.status_code == 200
+    top = resp.json()
+    assert [r["paises"] for r in top] == esperado["paises"].tolist()
+    assert [r["posicao"] for r in top] == [1, 2, 3, 4, 5]
+
+
+def test_ranking_sem_opcao_soma_as_linhas_de_produto():
+    listagem = client.get("/importacao/?ano=2021")
+    assert listagem.headers["X-Fonte-Dados"] == "fallback"
+    registros = pd.DataFrame(listagem.json())
+    somado = registros[registros["paises"] != "Total"].groupby("paises")["quantidade"].sum()
+
+    top = client.get("/importacao/ranking", params={"ano": 2021, "n": 3}).json()
+    assert [r["quantidade"] for r in top] == somado.sort_values(ascending=False).head(3).tolist()
+    assert all(r["opcao"] is None for r in top)
+
+
+def test_ranking_indisponivel_ou_invalido():
+    assert client.get("/producao/ranking", params={"ano": 2020}).status_code == 404
+    assert client.get("/exportacao/ranking", params={"ano": 2020, "metric": "paises"}).status_code == 400
+    assert client.get("/exportacao/ranking", params={"ano": 1800}).json() == []
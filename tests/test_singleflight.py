@@ -0,0 +1,81 @@
+# tests/test_singleflight.py
+
+import asyncio
+
+import pandas as pd
+import pytest
+
+from app.core.cache import LiveCache
+from app.core.http import UPSTREAM_MAX_CONCORRENTES
+from app.core.singleflight import SingleFlight, coalescer
+
+
+def test_chamadas_identicas_compartilham_uma_execucao():
+    singleflight = SingleFlight()
+    chamadas = []
+
+    @coalescer("producao", singleflight)
+    async def buscar(ano=None):
+        chamadas.append(ano)
+        await asyncio.sleep(0.02)
+        return f"dados-{ano}"
+
+    async def cenario():
+        respostas = await asyncio.gather(
+            *(buscar(2020) for _ in range(5)), buscar(ano=2020), buscar(2021), buscar()
+        )
+        # Terminado o voo, a próxima chamada executa de novo (não é cache)
+        respostas.append(await buscar(2020))
+        return respostas
+
+    respostas = asyncio.run(cenario())
+    assert respostas == ["dados-2020"] * 6 + ["dados-2021", "dados-None", "dados-2020"]
+    assert chamadas == [2020, 2021, None, 2020]
+    assert singleflight.status() == {"em_andamento": 0, "lideres": 4, "seguidores": 5}
+
+
+def test_erro_compartilhado_e_lider_cancelado_nao_derruba_as_demais():
+    singleflight = SingleFlight()
+
+    async def falha():
+        await asyncio.sleep(0.01)
+        raise ValueError("upstream fora")
+
+    async def lento():
+        await asyncio.sleep(0.05)
+        return 42
+
+    async def cenario():
+        resultados = await asyncio.gather(
+            *(singleflight.executar("x", falha) for _ in range(3)), return_exceptions=True
+        )
+        assert all(isinstance(r, ValueError) for r in resultados)
+
+        lider = asyncio.create_task(singleflight.executar("y", lento))
+        await asyncio.sleep(0)
+        seguidora = asyncio.create_task(singleflight.executar("y", lento))
+        await asyncio.sleep(0.01)
+        lider.cancel()
+        assert await seguidora == 42
+        with pytest.raises(asyncio.CancelledError):
+            await lider
+
+    asyncio.run(cenario())
+
+
+def test_limite_de_cargas_simultaneas_por_upstream():
+    ativas, pico = [0], [0]
+
+    async def carregar():
+        ativas[0] += 1
+        pico[0] = max(pico[0], ativas[0])
+        await asyncio.sleep(0.02)
+        ativas[0] -= 1
+        return pd.DataFrame({"ano": [2020]})
+
+    async def cenario():
+        cache = LiveCache(ttl=60, max_stale=3600, upstream="teste")
+        await asyncio.gather(*(cache.obter(("producao", ano), carregar) for ano in range(6)))
+
+    asyncio.run(cenario())
+    assert pico[0] == UPSTREAM_MAX_CONCORRENTES
@@ -0,0 +1,58 @@
+# tests/test_store.py
+
+import os
+
+import pytest
+from fastapi import HTTPException
+
+from app.core.store import DatasetStore
+
+
+def _normalizar(df):
+    return df.rename(columns={"Ano": "ano", "Quantidade": "quantidade"})
+
+
+def test_carrega_uma_vez_e_recarrega_quando_arquivo_muda(tmp_path):
+    csv = tmp_path / "recurso.csv"
+    csv.write_text("Ano,Quantidade\n1970,1\n1971,2\n")
+
+    store = DatasetStore()
+    store.registrar("recurso", str(csv), _normalizar)
+
+    primeiro = store.obter("recurso")
+    assert primeiro.frame["ano"].tolist() == [1970, 1971]
+    # Sem mudança no arquivo → mesmo snapshot em memória
+    assert store.obter("recurso") is primeiro
+
+    csv.write_text("Ano,Quantidade\n1970,1\n1971,2\n1972,3\n")
+    st = os.stat(csv)
+    os.utime(csv, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+
+    segundo = store.obter("recurso")
+    assert segundo is not primeiro
+    assert segundo.versao != primeiro.versao
+    assert segundo.frame["ano"].tolist() == [1970, 1971, 1972]
+
+
+def test_csv_inexistente_retorna_503(tmp_path):
+    store = DatasetStore()
+    store.registrar("recurso", str(tmp_path / "nao_existe.csv"), _normalizar)
+
+    with pytest.raises(HTTPException) as exc:
+        store.obter("recurso")
+    assert exc.value.status_code == 503
+
+
+def test_indice_de_anos_fatia_o_frame_ordenado(tmp_path):
+    csv = tmp_path / "recurso.csv"
+    csv.write_text("Ano,Quantidade\n1971,10\n1970,1\n1971,20\n1970,2\n")
+
+    store = DatasetStore()
+    store.registrar("recurso", str(csv), _normalizar)
+    dataset = store.obter("recurso")
+
+    assert dataset.anos == [1970, 1971]
+    # Ordenação estável: dentro do mesmo ano preserva a ordem do CSV
+    assert dataset.por_ano(1970)["quantidade"].tolist() == [1, 2]
+    assert dataset.por_ano(1971)["quantidade"].tolist() == [10, 20]
+    assert dataset.por_ano(1999).empty
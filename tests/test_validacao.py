@@ -0,0 +1,39 @@
+# tests/test_validacao.py
+
+import pandas as pd
+import pytest
+
+from app.core.validacao import ErroValidacao, validar_frame
+from app.schemas.exportacao import Exportacao
+
+
+def _frame(**sobrescrever):
+    dados = {
+        "ano": ["1970", "1971"],
+        "opcao": ["Vinhos de mesa", "Espumantes"],
+        "paises": ["Alemanha", "Angola"],
+        "quantidade": [1, 2.5],
+        "valor_us": [10, 20],
+        "coluna_extra": ["x", "y"],
+    }
+    dados.update(sobrescrever)
+    return pd.DataFrame(dados)
+
+
+def test_converte_tipos_e_mantem_so_campos_do_schema():
+    frame = validar_frame(_frame(), Exportacao)
+    assert list(frame.columns) == list(Exportacao.model_fields)
+    assert str(frame["ano"].dtype) == "int64"
+    assert str(frame["valor_us"].dtype) == "float64"
+
+
+def test_rejeita_valor_invalido():
+    with pytest.raises(ErroValidacao, match="ano"):
+        validar_frame(_frame(ano=["1970", "abc"]), Exportacao)
+    with pytest.raises(ErroValidacao, match="paises"):
+        validar_frame(_frame(paises=["Alemanha", None]), Exportacao)
+
+
+def test_rejeita_coluna_faltando():
+    with pytest.raises(ErroValidacao, match="faltando"):
+        validar_frame(_frame().drop(columns=["valor_us"]), Exportacao)
@@ -0,0 +1,52 @@
+# tests/test_workers.py
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from app.core.workers import PoolCheio, PoolTrabalho
+
+
+def test_fila_limitada_recusa_com_503_e_registra_metricas():
+    liberar = threading.Event()
+
+    async def cenario():
+        pool = PoolTrabalho(threads=1, processos=0, fila=1)
+        # 1 em execução + 1 na fila = capacidade; a terceira é recusada
+        tarefas = [asyncio.create_task(pool.executar(liberar.wait, 5)) for _ in range(2)]
+        await asyncio.sleep(0.05)
+        with pytest.raises(PoolCheio) as erro:
+            await pool.executar(sum, [1, 2])
+        assert erro.value.status_code == 503
+        assert pool.metricas()["fila"] == 1
+
+        liberar.set()
+        assert await asyncio.gather(*tarefas) == [True, True]
+        metricas = pool.metricas()
+        pool.encerrar()
+        return metricas
+
+    metricas = asyncio.run(cenario())
+    assert metricas["concluidas"] == 2
+    assert metricas["rejeitadas"] == 1
+    assert metricas["pico_fila"] == 1
+    assert metricas["fila"] == 0
+    # A segunda tarefa esperou a primeira terminar
+    assert metricas["espera_ms"]["max"] >= 40
+
+
+def test_trabalho_pesado_nao_segura_o_event_loop():
+    async def cenario():
+        pool = PoolTrabalho(threads=2, processos=0, fila=4)
+        pesada = asyncio.create_task(pool.executar(time.sleep, 0.3))
+        inicio = time.perf_counter()
+        # Uma “requisição barata” concorrente termina sem esperar a pesada
+        assert await pool.executar(sum, [1, 2, 3]) == 6
+        barata = time.perf_counter() - inicio
+        await pesada
+        pool.encerrar()
+        return barata
+
+    assert asyncio.run(cenario()) < 0.2